@@ -0,0 +1,4 @@
+import time
+
+# Taken when the app package is first imported, so startup can report the import time
+IMPORT_STARTED = time.perf_counter()
@@ -1,18 +1,25 @@
 import json
 import os
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from starlette.background import BackgroundTask
-from starlette.status import HTTP_201_CREATED
+from starlette.concurrency import run_in_threadpool
+from starlette.status import HTTP_201_CREATED, HTTP_202_ACCEPTED
 
 from app.core.config import settings
-from app.schemas.requests import score_resumes_form
-from app.schemas.responses import (ErrorResponse, ExtractCriteriaResponse,
-                                  ScoreResumesResponse)
+from app.schemas.requests import JobCriteria, RankCandidatesRequest, score_resumes_form
+from app.schemas.responses import (CandidateListResponse, ErrorResponse,
+                                  ExtractCriteriaResponse, JobStatusResponse,
+                                  JobSubmittedResponse, ScoreResumesResponse)
+from app.services.candidate_store import candidate_store
 from app.services.criteria_extractor import criteria_extractor
+from app.services.job_manager import job_manager
+from app.services.report_store import REPORT_FORMATS, REPORT_ID_PATTERN, report_store
 from app.services.resume_scorer import resume_scorer
+from app.utils.archive_handler import archive_handler
 from app.utils.file_handler import file_handler
 
 router = APIRouter()
@@ -34,11 +41,13 @@ router = APIRouter()
 )
 async def extract_criteria(
     file: UploadFile = File(..., description="Job description file (PDF or DOCX)"),
+    use_cache: bool = Form(True, description="Reuse cached LLM responses; set to false to force a fresh call"),
 ):
     """
     Extract key ranking criteria from a job description file.
     
     - **file**: Job description file (PDF or DOCX)
+    - **use_cache**: Reuse cached LLM responses (default true)
     
     Returns a list of extracted criteria.
     """
@@ -48,7 +57,7 @@ async def extract_criteria(
         file_handler.validate_file_size(file)
         
         # Extract criteria from job description
-        criteria = await criteria_extractor.extract_criteria_from_job_description(file)
+        criteria = await criteria_extractor.extract_criteria_from_job_description(file, use_cache=use_cache)
         
         return ExtractCriteriaResponse(criteria=criteria)
         
@@ -79,22 +88,28 @@ async def extract_criteria(
 )
 async def score_resumes(
     criteria: List[str] = Form(..., description="List of criteria to score resumes against"),
-    files: List[UploadFile] = File(..., description="Resume files to evaluate (PDF or DOCX)"),
+    files: List[UploadFile] = File(..., description="Resume files to evaluate (PDF or DOCX), or ZIP/tar archives of them"),
+    use_cache: bool = Form(True, description="Reuse cached LLM responses; set to false to force fresh scoring"),
+    pre_rank_top_k: Optional[int] = Form(None, ge=1, description="Only send this many best locally pre-ranked resumes to the LLM"),
 ):
     """
     Score multiple resumes against provided criteria.
     
     - **criteria**: List of criteria to score resumes against
-    - **files**: List of resume files to evaluate (PDF or DOCX)
+    - **files**: List of resume files to evaluate (PDF or DOCX), or ZIP/tar archives of them
+    - **use_cache**: Reuse cached LLM responses (default true)
+    - **pre_rank_top_k**: Shortlist size for local pre-ranking; the other resumes get a pre-screen score only
     
     Returns a URL to download the generated Excel/CSV report.
     """
     try:
-        # Validate files
-        file_handler.validate_files(files)
+        # Validate files and unpack resume archives
+        file_handler.validate_files(files, allow_archives=True)
+        files = await archive_handler.expand_archives(files)
         
         # Score resumes against criteria
-        output_path = await resume_scorer.score_resumes(criteria, files)
+        output_path = await resume_scorer.score_resumes(
+            criteria, files, use_cache=use_cache, pre_rank_top_k=pre_rank_top_k)
         
         # Get filename for URL
         filename = os.path.basename(output_path)
@@ -113,10 +128,305 @@ async def score_resumes(
         )
 
 
+@router.post(
+    "/score-resumes/multi-job",
+    response_model=ScoreResumesResponse,
+    status_code=HTTP_201_CREATED,
+    summary="Score resumes against the criteria of several roles",
+    description="Score one pool of resumes against the criteria of several roles and generate an Excel "
+                "report with one sheet per role.",
+    responses={
+        201: {"description": "Resumes successfully scored"},
+        400: {"model": ErrorResponse, "description": "Bad request"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        500: {"model": ErrorResponse, "description": "Server error"}
+    },
+    tags=["Resume Scoring"]
+)
+async def score_resumes_multi_job(
+    roles: str = Form(..., description='JSON list of roles, e.g. [{"name": "Backend Engineer", "criteria": ["Python"]}]'),
+    files: List[UploadFile] = File(..., description="Resume files to evaluate (PDF or DOCX), or ZIP/tar archives of them"),
+    use_cache: bool = Form(True, description="Reuse cached LLM responses; set to false to force fresh scoring"),
+):
+    """
+    Score one pool of resumes against the criteria of several roles.
+    
+    - **roles**: JSON list of objects with a role `name` and its `criteria`
+    - **files**: List of resume files to evaluate (PDF or DOCX), or ZIP/tar archives of them
+    - **use_cache**: Reuse cached LLM responses (default true)
+    
+    Each resume is parsed once, and the criteria of several roles are scored in the same
+    prompt where they fit. Returns a URL to download the report, which has one sheet per role.
+    """
+    try:
+        try:
+            jobs = TypeAdapter(List[JobCriteria]).validate_json(roles)
+        except ValidationError as ve:
+            raise HTTPException(status_code=422, detail=f"Invalid roles: {str(ve)}")
+        if not jobs or len(jobs) > settings.MULTI_JOB_MAX_ROLES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Between 1 and {settings.MULTI_JOB_MAX_ROLES} roles are required, got {len(jobs)}"
+            )
+        
+        # Validate files and unpack resume archives
+        file_handler.validate_files(files, allow_archives=True)
+        files = await archive_handler.expand_archives(files)
+        
+        # Score resumes against the criteria of every role
+        output_path = await resume_scorer.score_multi_job(
+            [(job.name, job.criteria) for job in jobs], files, use_cache=use_cache)
+        
+        # Get filename for URL
+        filename = os.path.basename(output_path)
+        file_url = f"{settings.API_PREFIX}/download/{filename}"
+        
+        return ScoreResumesResponse(file_url=file_url)
+        
+    except HTTPException as he:
+        # Re-raise HTTP exceptions as-is
+        raise he
+    except Exception as e:
+        # Log the error in a production environment
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to score resumes: {str(e)}"
+        )
+
+
+@router.post(
+    "/score-resumes/stream",
+    summary="Score resumes against criteria with streamed results",
+    description="Score multiple resumes against provided criteria, streaming each result as soon as it is "
+                "available (NDJSON or Server-Sent Events), followed by the leaderboard and report URL.",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Stream of result, error and complete events",
+            "content": {"application/x-ndjson": {}, "text/event-stream": {}}
+        },
+        400: {"model": ErrorResponse, "description": "Bad request"},
+        422: {"model": ErrorResponse, "description": "Validation error"}
+    },
+    tags=["Resume Scoring"]
+)
+async def stream_score_resumes(
+    criteria: List[str] = Form(..., description="List of criteria to score resumes against"),
+    files: List[UploadFile] = File(..., description="Resume files to evaluate (PDF or DOCX), or ZIP/tar archives of them"),
+    use_cache: bool = Form(True, description="Reuse cached LLM responses; set to false to force fresh scoring"),
+    pre_rank_top_k: Optional[int] = Form(None, ge=1, description="Only send this many best locally pre-ranked resumes to the LLM"),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="Stream format: ndjson or sse"),
+):
+    """
+    Score multiple resumes against provided criteria and stream the results.
+    
+    - **criteria**: List of criteria to score resumes against
+    - **files**: List of resume files to evaluate (PDF or DOCX), or ZIP/tar archives of them
+    - **use_cache**: Reuse cached LLM responses (default true)
+    - **pre_rank_top_k**: Shortlist size for local pre-ranking; the other resumes get a pre-screen score only
+    - **format**: `ndjson` (one JSON object per line) or `sse` (Server-Sent Events)
+    
+    Emits a `result` event per scored resume (a ResumeScoreResponse with its current rank),
+    an `error` event per resume that could not be scored, and a final `complete` event
+    with the leaderboard and the URL of the generated report.
+    """
+    # The form's uploads are closed once this handler returns, before the results are
+    # streamed, so keep them open until the stream ends; archive members are read from them
+    uploads = file_handler.detach_uploads(files)
+    
+    async def close_uploads():
+        for upload in uploads:
+            await upload.close()
+    
+    try:
+        # Validate files and unpack resume archives
+        file_handler.validate_files(uploads, allow_archives=True)
+        files = await archive_handler.expand_archives(uploads)
+    except BaseException:
+        await close_uploads()
+        raise
+    
+    def format_event(event: str, data: dict) -> str:
+        if format == "sse":
+            return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        return json.dumps({"event": event, **data}) + "\n"
+    
+    async def event_stream():
+        try:
+            async for event, data in resume_scorer.stream_scores(
+                    criteria, files, use_cache=use_cache, pre_rank_top_k=pre_rank_top_k):
+                if event == "complete":
+                    output_path = data.pop("output_path")
+                    data["file_url"] = f"{settings.API_PREFIX}/download/{os.path.basename(output_path)}"
+                yield format_event(event, data)
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            yield format_event("error", {"detail": f"Failed to score resumes: {str(e)}"})
+        finally:
+            await close_uploads()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream" if format == "sse" else "application/x-ndjson"
+    )
+
+
+@router.post(
+    "/jobs/score-resumes",
+    response_model=JobSubmittedResponse,
+    status_code=HTTP_202_ACCEPTED,
+    summary="Submit a background scoring job",
+    description="Queue resumes for scoring against provided criteria and return immediately with a job ID.",
+    responses={
+        202: {"description": "Scoring job accepted"},
+        400: {"model": ErrorResponse, "description": "Bad request"},
+        422: {"model": ErrorResponse, "description": "Validation error"},
+        500: {"model": ErrorResponse, "description": "Server error"}
+    },
+    tags=["Resume Scoring"]
+)
+async def submit_scoring_job(
+    criteria: List[str] = Form(..., description="List of criteria to score resumes against"),
+    files: List[UploadFile] = File(..., description="Resume files to evaluate (PDF or DOCX), or ZIP/tar archives of them"),
+    use_cache: bool = Form(True, description="Reuse cached LLM responses; set to false to force fresh scoring"),
+):
+    """
+    Submit resumes to be scored in the background.
+    
+    - **criteria**: List of criteria to score resumes against
+    - **files**: List of resume files to evaluate (PDF or DOCX), or ZIP/tar archives of them
+    - **use_cache**: Reuse cached LLM responses (default true)
+    
+    Returns the job ID and a URL to poll for progress.
+    """
+    try:
+        # Validate files and unpack resume archives
+        file_handler.validate_files(files, allow_archives=True)
+        files = await archive_handler.expand_archives(files)
+        
+        job_id = await job_manager.submit(criteria, files, use_cache=use_cache)
+        
+        return JobSubmittedResponse(job_id=job_id, status_url=f"{settings.API_PREFIX}/jobs/{job_id}")
+        
+    except HTTPException as he:
+        # Re-raise HTTP exceptions as-is
+        raise he
+    except Exception as e:
+        # Log the error in a production environment
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to submit scoring job: {str(e)}"
+        )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobStatusResponse,
+    summary="Get scoring job status",
+    description="Get per-resume progress, partial results, ETA and, once finished, the report URL of a scoring job.",
+    responses={
+        200: {"description": "Job status"},
+        404: {"model": ErrorResponse, "description": "Job not found"}
+    },
+    tags=["Resume Scoring"]
+)
+async def get_scoring_job(job_id: str):
+    """
+    Get the status of a background scoring job.
+    
+    - **job_id**: ID returned when the job was submitted
+    
+    Returns the job progress. The report can be downloaded from file_url once the job has completed.
+    """
+    status = await run_in_threadpool(job_manager.get_status, job_id)
+    if status is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job not found: {job_id}"
+        )
+    return JobStatusResponse(**status)
+
+
+@router.get(
+    "/candidates",
+    response_model=CandidateListResponse,
+    summary="List stored candidates",
+    description="List the candidates kept in the candidate store from previous scoring runs.",
+    responses={
+        200: {"description": "Stored candidates"},
+        400: {"model": ErrorResponse, "description": "Candidate store disabled"}
+    },
+    tags=["Candidates"]
+)
+async def list_candidates(
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of candidates returned"),
+    offset: int = Query(0, ge=0, description="Number of candidates to skip"),
+):
+    """
+    List stored candidates.
+    
+    - **limit**: Maximum number of candidates returned
+    - **offset**: Number of candidates to skip
+    
+    Returns candidate IDs that can be passed to /candidates/rank.
+    """
+    if not candidate_store.enabled:
+        raise HTTPException(status_code=400, detail="Candidate store is disabled")
+    candidates = await run_in_threadpool(candidate_store.list_candidates, limit=limit, offset=offset)
+    return CandidateListResponse(candidates=candidates)
+
+
+@router.post(
+    "/candidates/rank",
+    response_model=ScoreResumesResponse,
+    status_code=HTTP_201_CREATED,
+    summary="Rank stored candidates against criteria",
+    description="Rank candidates from the candidate store against new criteria without uploading their resumes again.",
+    responses={
+        201: {"description": "Candidates successfully ranked"},
+        400: {"model": ErrorResponse, "description": "Bad request"},
+        404: {"model": ErrorResponse, "description": "Candidates not found"},
+        500: {"model": ErrorResponse, "description": "Server error"}
+    },
+    tags=["Candidates"]
+)
+async def rank_candidates(request: RankCandidatesRequest):
+    """
+    Rank stored candidates against criteria.
+    
+    - **criteria**: List of criteria to rank candidates against
+    - **candidate_ids**: IDs of stored candidates to rank (all candidates if omitted)
+    - **use_cache**: Reuse cached LLM responses (default true)
+    
+    Only criteria a candidate has never been scored on are sent to the LLM.
+    Returns a URL to download the generated Excel/CSV report.
+    """
+    if not candidate_store.enabled:
+        raise HTTPException(status_code=400, detail="Candidate store is disabled")
+    try:
+        output_path = await resume_scorer.rank_candidates(
+            request.criteria, request.candidate_ids, use_cache=request.use_cache)
+        
+        # Get filename for URL
+        filename = os.path.basename(output_path)
+        file_url = f"{settings.API_PREFIX}/download/{filename}"
+        
+        return ScoreResumesResponse(file_url=file_url)
+        
+    except ValueError as ve:
+        raise HTTPException(status_code=404, detail=str(ve))
+    except Exception as e:
+        # Log the error in a production environment
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to rank candidates: {str(e)}"
+        )
+
+
 @router.get(
     "/download/{filename}",
     summary="Download generated report",
-    description="Download a generated Excel/CSV report.",
+    description="Download a generated report as Excel (.xlsx), CSV (.csv) or JSON (.json).",
     response_class=FileResponse,
     responses={
         200: {"description": "File downloaded successfully"},
@@ -126,18 +436,24 @@ async def score_resumes(
 )
 async def download_file(filename: str):
     """
-    Download a generated Excel/CSV report.
+    Download a generated report.
     
-    - **filename**: Name of the file to download
+    - **filename**: Name of the file to download. A report URL ends in .xlsx; replace the
+      extension with .csv or .json to get the same report in another format.
     
-    Returns the file for download.
+    The requested format is rendered on first download and reused afterwards.
     """
     try:
-        # Build file path
-        file_path = os.path.join(settings.UPLOAD_DIR, "reports", filename)
+        report_id, _, report_format = filename.rpartition(".")
+        if not REPORT_ID_PATTERN.fullmatch(report_id) or report_format not in REPORT_FORMATS:
+            raise HTTPException(
+                status_code=404,
+                detail=f"File not found: {filename}"
+            )
         
-        # Check if file exists
-        if not os.path.exists(file_path):
+        try:
+            file_path = await run_in_threadpool(report_store.render, report_id, report_format)
+        except FileNotFoundError:
             raise HTTPException(
                 status_code=404,
                 detail=f"File not found: {filename}"
@@ -147,8 +463,7 @@ async def download_file(filename: str):
         return FileResponse(
             path=file_path,
             filename=filename,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet" 
-                      if filename.endswith(".xlsx") else "text/csv"
+            media_type=REPORT_FORMATS[report_format]
         )
         
     except HTTPException as he:
@@ -1,5 +1,4 @@
-import os
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Union
 
 from pydantic import AnyHttpUrl, validator
 from pydantic_settings import BaseSettings
@@ -23,13 +22,118 @@ class Settings(BaseSettings):
     # OpenAI API Integration
     OPENAI_API_KEY: Optional[str] = None
     OPENAI_MODEL: str = "gpt-4o"
+    OPENAI_BASE_URL: Optional[str] = None  # Override for OpenAI-compatible endpoints
+    
+    # OpenAI HTTP connection pool
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0  # Seconds an idle connection is kept open
+    OPENAI_CONNECT_TIMEOUT: float = 10.0
+    OPENAI_TIMEOUT: float = 120.0  # Read/write timeout for a single request
+    OPENAI_MAX_CONCURRENT_REQUESTS: int = 20  # Max in-flight LLM requests per worker
+    
+    # OpenAI rate limiting and retries
+    OPENAI_RPM_LIMIT: int = 500  # Requests per minute, until the API reports the model's limit
+    OPENAI_TPM_LIMIT: int = 30000  # Tokens per minute, until the API reports the model's limit
+    OPENAI_MODEL_RATE_LIMITS: Dict[str, Dict[str, int]] = {}  # e.g. {"gpt-4o": {"rpm": 5000, "tpm": 800000}}
+    OPENAI_RATE_LIMITS_FROM_HEADERS: bool = True  # Follow the x-ratelimit-limit-* response headers
+    OPENAI_MIN_CONCURRENT_REQUESTS: int = 1  # Floor for the adaptive concurrency limit
+    OPENAI_MAX_RETRIES: int = 5
+    OPENAI_RETRY_BASE_DELAY: float = 1.0  # Seconds; doubled on every retry, with jitter
+    OPENAI_RETRY_MAX_DELAY: float = 60.0
+    
+    # Resume scoring
+    SCORING_CONCURRENCY: int = 10  # Max resumes processed at the same time
+    COMBINED_EXTRACTION_ENABLED: bool = True  # Extract name and scores in a single LLM call
+    STREAM_LEADERBOARD_SIZE: int = 10  # Candidates included in the final streamed event
+    
+    # Prompt compaction
+    TEXT_COMPACTION_ENABLED: bool = True  # Clean up and budget document text before prompting
+    RESUME_TOKEN_BUDGET: Optional[int] = 3000  # Max resume tokens per prompt; None disables truncation
+    JOB_DESCRIPTION_TOKEN_BUDGET: Optional[int] = 4000  # Max job description tokens per prompt, unless it is chunked
+    
+    # Criteria extraction
+    CRITERIA_CHUNK_TOKENS: Optional[int] = 2000  # Longer job descriptions are split into sections extracted in parallel; None disables
+    CRITERIA_MAX_CHUNKS: int = 8  # Job descriptions are compacted to fit this many chunks
+    
+    # Local pre-ranking before LLM scoring
+    PRE_RANK_ENABLED: bool = False
+    PRE_RANK_TOP_K: Optional[int] = 50  # Best pre-ranked resumes sent to the LLM
+    PRE_RANK_THRESHOLD: Optional[float] = None  # Resumes scoring at least this (0-100) are always sent
+    PRE_RANK_MIN_POOL: int = 20  # Pools of this size or smaller are not pre-ranked
+    PRE_RANK_HASH_DIM: int = 2 ** 14  # Size of the hashed n-gram feature space
+    
+    # Near-duplicate resume detection
+    DEDUP_ENABLED: bool = False  # Reuse the scores of near-identical resumes; scoring then waits until every upload is parsed
+    DEDUP_THRESHOLD: float = 0.9  # Minimum estimated Jaccard similarity of the resumes' word 3-grams
+    
+    # Batched scoring (several resumes per LLM request)
+    BATCH_SCORING_ENABLED: bool = False
+    BATCH_SCORING_TOKEN_BUDGET: int = 8000  # Max estimated prompt tokens per batched request
+    BATCH_SCORING_MAX_RESUMES: int = 10  # Max resumes packed into one request
+    LLM_CONTEXT_WINDOW: int = 128000  # Context window of OPENAI_MODEL, in tokens
+    
+    # Multi-job scoring (one resume pool ranked against several roles)
+    MULTI_JOB_MAX_ROLES: int = 20  # Roles per request
+    MULTI_JOB_COMBINED_SCORING: bool = True  # Score the criteria of several roles in one prompt when they fit
     
     # File Storage
     UPLOAD_DIR: str = "C:\\Users\\Subham\\Desktop\\amentities\\code\\resume-ranking\\uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_REQUEST_SIZE: int = 200 * 1024 * 1024  # 200MB, all files and fields of one request
+    
+    # Resume archives (ZIP or tar uploads of many resumes)
+    MAX_ARCHIVE_SIZE: int = 100 * 1024 * 1024  # 100MB per uploaded archive
+    ARCHIVE_MAX_MEMBERS: int = 1000  # Resumes per archive
+    ARCHIVE_MAX_UNCOMPRESSED_SIZE: int = 500 * 1024 * 1024  # Per archive; counts every member of a compressed tar
+    
+    # Document parsing
+    DOCUMENT_PARSER_EXECUTOR: str = "process"  # "process" or "thread"
+    DOCUMENT_PARSER_WORKERS: Optional[int] = None  # Defaults to the number of CPUs
+    DOCUMENT_PARSE_TIMEOUT_SECONDS: float = 60.0  # Per document; overrunning workers are killed in "process" mode, "thread" mode cannot interrupt them
+    DOCUMENT_MAX_PAGES: Optional[int] = 50  # Pages read from a PDF (None reads all)
+    DOCUMENT_SPOOL_THRESHOLD_BYTES: int = 5 * 1024 * 1024  # Larger documents are parsed from a temp file
+    
+    # Candidate store (resumes and scores kept for re-ranking)
+    CANDIDATE_STORE_ENABLED: bool = True
+    CANDIDATE_STORE_PATH: Optional[str] = None  # Defaults to UPLOAD_DIR/candidates/candidates.sqlite3
+    
+    # Background scoring jobs
+    JOB_STORE_PATH: Optional[str] = None  # Defaults to UPLOAD_DIR/jobs/jobs.sqlite3
+    JOB_MAX_CONCURRENT_JOBS: int = 2  # Jobs processed at the same time per worker
+    JOB_LEASE_SECONDS: int = 120  # A running job whose worker stops renewing its claim for this long is taken over
+    
+    # Reports (stored under UPLOAD_DIR/reports, rendered per format on first download)
+    REPORT_TTL_SECONDS: int = 7 * 24 * 3600  # Reports older than this are deleted
+    REPORTS_MAX_BYTES: int = 1024 * 1024 * 1024  # Oldest files are deleted above this total size
+    REPORT_JANITOR_INTERVAL_SECONDS: int = 3600
+    
+    # Extracted text cache (keyed by a hash of the file bytes)
+    TEXT_CACHE_ENABLED: bool = True
+    TEXT_CACHE_MAX_ENTRIES: int = 1000  # In-memory LRU tier
+    TEXT_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60  # 7 days
+    TEXT_CACHE_DISK_ENABLED: bool = False  # Persist entries under UPLOAD_DIR/cache/text
+    TEXT_CACHE_DISK_MAX_BYTES: int = 200 * 1024 * 1024  # 200MB
+    
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_BACKEND: str = "memory"  # "memory" or "sqlite"
+    LLM_CACHE_MAX_ENTRIES: int = 10000
+    LLM_CACHE_TTL_SECONDS: int = 30 * 24 * 60 * 60  # 30 days
+    LLM_CACHE_SQLITE_PATH: Optional[str] = None  # Defaults to UPLOAD_DIR/cache/llm_cache.sqlite3
+    
+    # Monitoring
+    METRICS_ENABLED: bool = True  # Serve Prometheus metrics on /metrics
+    SERVER_TIMING_ENABLED: bool = False  # Add a Server-Timing header with per-stage durations
+    
+    # Worker startup
+    WARMUP_ENABLED: bool = False  # Start parser workers and load tokenizers before serving requests
+    WARMUP_LLM_CONNECTIONS: int = 0  # Connections opened to the LLM API during warm-up
     
     # Supported file types
     SUPPORTED_FILE_TYPES: List[str] = ["application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]
+    SUPPORTED_ARCHIVE_TYPES: List[str] = ["application/zip", "application/x-zip-compressed", "application/x-tar",
+                                          "application/gzip", "application/x-gzip"]
     
     class Config:
         case_sensitive = True
@@ -37,7 +141,4 @@ class Settings(BaseSettings):
 
 
 # Initialize settings
-settings = Settings()
-
-# Create upload directory if it doesn't exist
-os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
\ No newline at end of file
+settings = Settings()
\ No newline at end of file
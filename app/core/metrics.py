@@ -0,0 +1,324 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+NAMESPACE = "resume_ranking"
+
+# Histogram buckets in seconds, from a fast cache hit up to a slow batched LLM request
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Stage timings of the current HTTP request, {stage: [seconds, spans]}; set by MetricsMiddleware
+_request_timings: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("request_timings", default=None)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class _Metric:
+    """Base class for a metric family with optional labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, Any] = {}
+        self._lock = Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        """Yield (sample name, labels, value) for every labelled series."""
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+    def render(self) -> List[str]:
+        """Render the family in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            # [count per bucket..., sum]; buckets are made cumulative when rendered
+            series = self._values.setdefault(key, [0] * len(self.buckets) + [0.0])
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[position] += 1
+                    break
+            series[-1] += value
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        with self._lock:
+            values = [(key, list(series)) for key, series in self._values.items()]
+        for key, series in values:
+            labels = tuple(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + (("le", _format_value(bound)),), cumulative
+            yield f"{self.name}_sum", labels, series[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class _CallbackMetric(_Metric):
+    """Metric read from a callback at scrape time, for statistics kept by other services."""
+
+    def __init__(self, name: str, documentation: str, kind: str,
+                 callback: Callable[[], Dict[LabelValues, float]], labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.callback = callback
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[Tuple[str, str]], float]]:
+        for key, value in self.callback().items():
+            yield self.name, tuple(zip(self.labelnames, key)), value
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics in the Prometheus text format.
+
+    Holds the application's counters, gauges and histograms, plus callback metrics that
+    read statistics from other services at scrape time. Stage spans are recorded in the
+    stage duration histogram and, during an HTTP request handled by MetricsMiddleware,
+    in that request's timing breakdown. Every worker process has its own registry.
+    """
+
+    def __init__(self):
+        """Create the application metrics."""
+        self._metrics: Dict[str, _Metric] = {}
+
+        self.http_requests = self.counter(
+            "http_requests_total", "HTTP requests handled", ["method", "handler", "status"])
+        self.http_request_duration = self.histogram(
+            "http_request_duration_seconds", "HTTP request duration", ["method", "handler"])
+        self.http_requests_in_flight = self.gauge(
+            "http_requests_in_flight", "HTTP requests being handled")
+        self.stage_duration = self.histogram(
+            "stage_duration_seconds", "Duration of pipeline stages", ["stage"])
+        self.llm_requests = self.counter(
+            "llm_requests_total", "LLM API requests sent, by outcome", ["model", "outcome"])
+        self.llm_retries = self.counter(
+            "llm_retries_total", "LLM API requests retried after an error", ["model"])
+        self.llm_tokens = self.counter(
+            "llm_tokens_total", "Tokens used by LLM API requests", ["model", "type"])
+        self.startup_duration = self.gauge(
+            "startup_duration_seconds", "Duration of the worker's startup phases", ["phase"])
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create and register a counter; names are prefixed with NAMESPACE."""
+        return self._register(Counter(f"{NAMESPACE}_{name}", documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Create and register a gauge; names are prefixed with NAMESPACE."""
+        return self._register(Gauge(f"{NAMESPACE}_{name}", documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Create and register a histogram; names are prefixed with NAMESPACE."""
+        return self._register(Histogram(f"{NAMESPACE}_{name}", documentation, labelnames, buckets))
+
+    def register_callback(self, name: str, documentation: str, kind: str,
+                          callback: Callable[[], Dict[LabelValues, float]],
+                          labelnames: Sequence[str] = ()) -> None:
+        """
+        Register a metric whose values are read when metrics are rendered.
+
+        Args:
+            name: Metric name, prefixed with NAMESPACE
+            documentation: Help text
+            kind: "counter" or "gauge"
+            callback: Returns the current value per tuple of label values
+            labelnames: Names of the labels
+        """
+        self._register(_CallbackMetric(f"{NAMESPACE}_{name}", documentation, kind, callback, labelnames))
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text format.
+
+        Returns:
+            str: Exposition text; a failing callback metric is skipped
+        """
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                print(f"Error collecting metric {metric.name}: {str(e)}")
+        return "\n".join(lines) + "\n"
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        """Record a finished stage span."""
+        self.stage_duration.observe(seconds, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            totals = timings.setdefault(stage, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += 1
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as a stage span; works in sync and async code."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str) -> Callable:
+        """Decorator timing every call of a coroutine function as a stage span."""
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.stage(stage):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def server_timing(timings: Dict[str, List[float]], total_seconds: float) -> str:
+        """
+        Format a request's stage timings as a Server-Timing header value.
+
+        Stages that ran several times (e.g. once per resume) report the sum of their
+        spans, which can exceed the total when they ran concurrently.
+        """
+        entries = []
+        for stage, (seconds, spans) in timings.items():
+            entry = f"{stage};dur={seconds * 1000:.1f}"
+            if spans > 1:
+                entry += f';desc="{int(spans)} spans"'
+            entries.append(entry)
+        entries.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording HTTP request metrics.
+
+    Requests are counted by method, handler (endpoint function name) and status. With
+    server_timing, responses carry a Server-Timing header with the stages recorded while
+    handling the request; for streamed responses it only covers the stages finished
+    before the response started.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, List[float]] = {}
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", metrics.server_timing(timings, time.perf_counter() - start))
+            await send(message)
+
+        metrics.http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.http_requests_in_flight.dec()
+            _request_timings.reset(token)
+            # The router stores the matched endpoint in the scope
+            handler = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            metrics.http_requests.inc(method=scope["method"], handler=handler, status=status)
+            metrics.http_request_duration.observe(time.perf_counter() - start,
+                                                  method=scope["method"], handler=handler)
+
+metrics = MetricsRegistry()
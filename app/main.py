@@ -1,15 +1,90 @@
+import importlib
+import os
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from app import IMPORT_STARTED
 from app.api.routes import router as api_router
 from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, metrics
+from app.services.document_processor import document_processor
+from app.services.job_manager import job_manager
+from app.services.llm_service import llm_service
+from app.services.report_store import report_store
+from app.utils.cache import llm_cache, text_cache
+from app.utils.file_handler import UploadLimitMiddleware
+from app.utils.text_compactor import text_compactor
+from app.utils.tokens import count_tokens
+
+# Libraries imported on first use that the warm-up loads ahead of time
+WARMUP_MODULES = ["openpyxl", "numpy"]
+
+
+async def warm_up() -> None:
+    """
+    Prepare the worker so its first requests do not pay one-off costs.
+
+    Starts the document parser workers, loads lazily imported libraries and the
+    tokenizer, and opens settings.WARMUP_LLM_CONNECTIONS connections to the LLM API.
+    """
+    for module in WARMUP_MODULES:
+        importlib.import_module(module)
+    count_tokens("")
+    await document_processor.warm_up()
+    if settings.WARMUP_LLM_CONNECTIONS > 0:
+        await llm_service.warm_up(settings.WARMUP_LLM_CONNECTIONS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the worker's services before it serves requests and stop them when it exits.
+
+    Clients and pools are created once per worker: here or on first use. Their
+    startup phases are reported in the startup_duration_seconds metric.
+    """
+    startup_started = time.perf_counter()
+    metrics.startup_duration.set(startup_started - IMPORT_STARTED, phase="import")
+    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    # Pick up scoring jobs interrupted by a previous shutdown
+    job_manager.resume_unfinished_jobs()
+    # Delete old reports periodically
+    report_store.start_janitor()
+    metrics.startup_duration.set(time.perf_counter() - startup_started, phase="startup")
+
+    if settings.WARMUP_ENABLED:
+        warmup_started = time.perf_counter()
+        try:
+            await warm_up()
+        except Exception as e:
+            print(f"Error warming up: {str(e)}")
+        metrics.startup_duration.set(time.perf_counter() - warmup_started, phase="warmup")
+    print(f"Worker ready {time.perf_counter() - IMPORT_STARTED:.2f}s after import started")
+
+    try:
+        yield
+    finally:
+        # Release pooled connections and parser workers when the worker stops
+        await report_store.stop_janitor()
+        await llm_service.close()
+        document_processor.shutdown_executor()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Resume Ranking API - Automate the process of ranking resumes based on job descriptions",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Reject oversized or mistyped uploads while they are received
+app.add_middleware(UploadLimitMiddleware, max_request_size=settings.MAX_REQUEST_SIZE,
+                   max_file_size=settings.MAX_FILE_SIZE, max_archive_size=settings.MAX_ARCHIVE_SIZE)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +94,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request metrics and, optionally, per-stage timings in a Server-Timing header
+if settings.METRICS_ENABLED or settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(MetricsMiddleware, server_timing=settings.SERVER_TIMING_ENABLED)
+
 # Include API routes
 app.include_router(api_router, prefix=settings.API_PREFIX)
 
@@ -27,6 +106,33 @@ app.include_router(api_router, prefix=settings.API_PREFIX)
 async def health_check():
     return {"status": "healthy"}
 
+# Statistics kept by the caches, the text compactor and the LLM scheduler, read at scrape time
+metrics.register_callback(
+    "text_cache_requests_total", "Extracted text cache lookups, by result", "counter",
+    lambda: {(result,): text_cache.stats()[key]
+             for result, key in (("memory_hit", "memory_hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))},
+    ["result"])
+metrics.register_callback(
+    "llm_cache_requests_total", "LLM response cache lookups, by result", "counter",
+    lambda: {("hit",): llm_cache.stats()["hits"], ("miss",): llm_cache.stats()["misses"]},
+    ["result"])
+metrics.register_callback(
+    "compaction_tokens_total", "Estimated document tokens before and after text compaction", "counter",
+    lambda: {("before",): text_compactor.stats()["tokens_before"], ("after",): text_compactor.stats()["tokens_after"]},
+    ["stage"])
+metrics.register_callback(
+    "llm_requests_in_flight", "LLM API requests being sent", "gauge",
+    lambda: {(): llm_service.rate_limiter.concurrency.in_flight})
+metrics.register_callback(
+    "llm_concurrency_limit", "Current adaptive limit on concurrent LLM API requests", "gauge",
+    lambda: {(): llm_service.rate_limiter.concurrency.limit})
+
+# Prometheus metrics endpoint
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+    async def get_metrics():
+        return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
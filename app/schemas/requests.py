@@ -40,6 +40,49 @@ class ScoreResumesRequest(BaseModel):
         }
 
 
+class RankCandidatesRequest(BaseModel):
+    """Model for ranking stored candidates against new criteria."""
+    criteria: List[str] = Field(..., min_length=1,
+                             description="List of criteria to rank candidates against")
+    candidate_ids: Optional[List[str]] = Field(None, 
+                                            description="IDs of stored candidates to rank; all candidates if omitted")
+    use_cache: bool = Field(True, 
+                         description="Reuse cached LLM responses; set to false to force fresh scoring")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "criteria": [
+                    "Must have certification XYZ",
+                    "5+ years of experience in Python development"
+                ],
+                "candidate_ids": [
+                    "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"
+                ],
+                "use_cache": True
+            }
+        }
+
+
+class JobCriteria(BaseModel):
+    """Model for one role of a multi-job scoring request (sent as JSON in the roles form field)."""
+    name: str = Field(..., min_length=1, 
+                   description="Role name, used as the name of the role's report sheet")
+    criteria: List[str] = Field(..., min_length=1, 
+                             description="List of criteria to score resumes against for this role")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "name": "Backend Engineer",
+                "criteria": [
+                    "5+ years of experience in Python development",
+                    "Experience with PostgreSQL"
+                ]
+            }
+        }
+
+
 # For actual form data handling with FastAPI
 def score_resumes_form(
     criteria: List[str] = Form(..., description="List of criteria to score resumes against"),
@@ -28,6 +28,10 @@ class ResumeScoreResponse(BaseModel):
                                 description="Scores for each criterion (0-5)")
     total_score: int = Field(..., 
                           description="Total score across all criteria")
+    pre_screen_score: Optional[float] = Field(None, 
+                                           description="Local pre-ranking score (0-100), when pre-ranking was used")
+    duplicate_of: Optional[str] = Field(None, 
+                                     description="File name of the resume this one nearly duplicates, whose scores it reuses")
 
     class Config:
         schema_extra = {
@@ -56,6 +60,134 @@ class ScoreResumesResponse(BaseModel):
         }
 
 
+class CandidateSummary(BaseModel):
+    """A candidate kept in the candidate store."""
+    id: str = Field(..., 
+                 description="Candidate ID (SHA-256 of the resume file)")
+    filename: str = Field(..., 
+                       description="Name of the uploaded resume file")
+    candidate_name: Optional[str] = Field(None, 
+                                       description="Name of the candidate, if known")
+    scored_criteria: int = Field(..., 
+                              description="Number of distinct criteria the candidate has been scored on")
+    created_at: float = Field(..., 
+                           description="Unix time the candidate was first stored")
+
+
+class CandidateListResponse(BaseModel):
+    """Response model for listing stored candidates."""
+    candidates: List[CandidateSummary] = Field(..., 
+                                            description="Stored candidates")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "candidates": [
+                    {
+                        "id": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08",
+                        "filename": "resume1.pdf",
+                        "candidate_name": "John Doe",
+                        "scored_criteria": 3,
+                        "created_at": 1709469296.0
+                    }
+                ]
+            }
+        }
+
+
+class JobSubmittedResponse(BaseModel):
+    """Response model for submitting a background scoring job."""
+    job_id: str = Field(..., 
+                     description="ID of the scoring job")
+    status_url: str = Field(..., 
+                         description="URL to poll for the job status")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "job_id": "3f2b9c1e8d7a4b6c9e0f1a2b3c4d5e6f",
+                "status_url": "/api/v1/jobs/3f2b9c1e8d7a4b6c9e0f1a2b3c4d5e6f"
+            }
+        }
+
+
+class JobResumeStatus(BaseModel):
+    """Status of a single resume within a scoring job."""
+    filename: str = Field(..., 
+                       description="Name of the uploaded resume file")
+    status: str = Field(..., 
+                     description="pending, completed or failed")
+    candidate_name: Optional[str] = Field(None, 
+                                       description="Name of the candidate, once scored")
+    scores: Optional[Dict[str, int]] = Field(None, 
+                                          description="Scores for each criterion (0-5), once scored")
+    total_score: Optional[int] = Field(None, 
+                                    description="Total score across all criteria, once scored")
+    pre_screen_score: Optional[float] = Field(None, 
+                                           description="Local pre-ranking score (0-100), when pre-ranking was used")
+    stage: Optional[str] = Field(None, 
+                              description="LLM or Pre-screen, when pre-ranking was used")
+    error: Optional[str] = Field(None, 
+                              description="Error message if the resume could not be scored")
+
+
+class JobStatusResponse(BaseModel):
+    """Response model for the status of a background scoring job."""
+    job_id: str = Field(..., 
+                     description="ID of the scoring job")
+    status: str = Field(..., 
+                     description="queued, running, completed or failed")
+    total: int = Field(..., 
+                    description="Number of resumes in the job")
+    completed: int = Field(..., 
+                        description="Number of resumes scored so far")
+    failed: int = Field(..., 
+                     description="Number of resumes that could not be scored")
+    progress: float = Field(..., 
+                         description="Fraction of resumes processed (0-1)")
+    eta_seconds: Optional[float] = Field(None, 
+                                      description="Estimated seconds until the job finishes")
+    file_url: Optional[str] = Field(None, 
+                                 description="URL to download the report once the job has completed")
+    error: Optional[str] = Field(None, 
+                              description="Error message if the job failed")
+    resumes: List[JobResumeStatus] = Field(..., 
+                                        description="Per-resume progress and partial results")
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "job_id": "3f2b9c1e8d7a4b6c9e0f1a2b3c4d5e6f",
+                "status": "running",
+                "total": 2,
+                "completed": 1,
+                "failed": 0,
+                "progress": 0.5,
+                "eta_seconds": 4.2,
+                "file_url": None,
+                "error": None,
+                "resumes": [
+                    {
+                        "filename": "resume1.pdf",
+                        "status": "completed",
+                        "candidate_name": "John Doe",
+                        "scores": {"5+ years of experience in Python development": 4},
+                        "total_score": 4,
+                        "error": None
+                    },
+                    {
+                        "filename": "resume2.docx",
+                        "status": "pending",
+                        "candidate_name": None,
+                        "scores": None,
+                        "total_score": None,
+                        "error": None
+                    }
+                ]
+            }
+        }
+
+
 class ErrorResponse(BaseModel):
     """Standard error response model."""
     detail: str = Field(..., 
@@ -0,0 +1,247 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.core.config import settings
+from app.utils.criteria import normalize_criterion
+
+
+class CandidateStore:
+    """
+    Local index of every resume that has been scored.
+
+    Candidates are keyed by a SHA-256 hash of the resume file bytes and keep their
+    extracted text, name and the scores they received per criterion and model, so a
+    stored pool can be ranked against new criteria without uploading it again. Scores
+    are stored under the normalized criterion (see normalize_criterion). Candidates
+    with a MinHash signature are indexed by its LSH band hashes (see
+    DuplicateDetector), so near-duplicates of a new resume are found without scanning
+    the store.
+    """
+
+    def __init__(self):
+        """Initialize the store; the database is opened on first use."""
+        self.enabled = settings.CANDIDATE_STORE_ENABLED
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_id(content: bytes) -> str:
+        """
+        Build the candidate ID for a resume.
+
+        Args:
+            content: Raw resume file bytes
+
+        Returns:
+            str: Candidate ID
+        """
+        return hashlib.sha256(content).hexdigest()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = settings.CANDIDATE_STORE_PATH or os.path.join(
+                settings.UPLOAD_DIR, "candidates", "candidates.sqlite3")
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS candidates (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    candidate_name TEXT,
+                    text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS candidate_scores (
+                    candidate_id TEXT NOT NULL,
+                    criterion TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    scored_at REAL NOT NULL,
+                    PRIMARY KEY (candidate_id, criterion, model)
+                );
+                CREATE TABLE IF NOT EXISTS candidate_bands (
+                    band_hash INTEGER NOT NULL,
+                    candidate_id TEXT NOT NULL,
+                    PRIMARY KEY (band_hash, candidate_id)
+                ) WITHOUT ROWID;
+                """
+            )
+            # Stores created before near-duplicate detection have no signature column
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(candidates)")}
+            if "signature" not in columns:
+                conn.execute("ALTER TABLE candidates ADD COLUMN signature BLOB")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def save_candidate(self, candidate_id: str, filename: str, text: str,
+                       candidate_name: Optional[str] = None, scores: Optional[Dict[str, int]] = None,
+                       model: Optional[str] = None, signature: Optional[bytes] = None,
+                       band_hashes: Optional[List[int]] = None) -> None:
+        """
+        Insert or update a candidate, with its scores and MinHash signature, in one transaction.
+
+        Args:
+            candidate_id: ID from make_id
+            filename: Name of the uploaded resume file
+            text: Extracted resume text
+            candidate_name: Candidate name, if known (an existing name is kept otherwise)
+            scores: Mapping of criterion to score (0-5), if scored
+            model: Name of the model that produced the scores
+            signature: Signature from DuplicateDetector.signature, if computed
+            band_hashes: Band hashes of the signature, from DuplicateDetector.band_hashes
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO candidates (id, filename, candidate_name, text, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET filename = excluded.filename, "
+                "candidate_name = COALESCE(excluded.candidate_name, candidates.candidate_name), "
+                "updated_at = excluded.updated_at",
+                (candidate_id, filename, candidate_name, text, now, now),
+            )
+            if scores:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO candidate_scores (candidate_id, criterion, model, score, scored_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(candidate_id, normalize_criterion(criterion), model, score, now)
+                     for criterion, score in scores.items()],
+                )
+            if signature:
+                self.conn.execute("UPDATE candidates SET signature = ? WHERE id = ?", (signature, candidate_id))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO candidate_bands (band_hash, candidate_id) VALUES (?, ?)",
+                    [(band_hash, candidate_id) for band_hash in band_hashes or ()],
+                )
+            self.conn.commit()
+
+    def find_by_bands(self, band_hashes: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Get the candidates sharing at least one LSH band hash.
+
+        Args:
+            band_hashes: Band hashes to match, e.g. of every resume in an upload
+
+        Returns:
+            List[Dict[str, Any]]: Candidate ID, filename, name, signature and the set of
+            matched band hashes of each match
+        """
+        band_hashes = list(dict.fromkeys(band_hashes))
+        if not self.enabled or not band_hashes:
+            return []
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(band_hashes), 500):
+                chunk = band_hashes[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                for row in self.conn.execute(
+                    f"SELECT b.band_hash, c.id, c.filename, c.candidate_name, c.signature, c.created_at "
+                    f"FROM candidate_bands b JOIN candidates c ON c.id = b.candidate_id "
+                    f"WHERE b.band_hash IN ({placeholders})",
+                    chunk,
+                ):
+                    match = found.setdefault(row["id"], {
+                        "id": row["id"], "filename": row["filename"], "candidate_name": row["candidate_name"],
+                        "signature": row["signature"], "created_at": row["created_at"], "band_hashes": set(),
+                    })
+                    match["band_hashes"].add(row["band_hash"])
+        return sorted(found.values(), key=lambda match: (match["created_at"], match["id"]))
+
+    def get_scores(self, candidate_ids: Iterable[str], criteria: List[str], model: str) -> Dict[str, Dict[str, int]]:
+        """
+        Look up stored scores for several candidates at once.
+
+        Args:
+            candidate_ids: IDs of the candidates
+            criteria: Criteria to look up (matched after normalization)
+            model: Only scores produced by this model are returned
+
+        Returns:
+            Dict[str, Dict[str, int]]: Candidate ID -> criterion (as passed in) -> score, for the scores found
+        """
+        wanted = list(dict.fromkeys(candidate_ids))
+        scores: Dict[str, Dict[str, int]] = {candidate_id: {} for candidate_id in wanted}
+        if not self.enabled or not wanted or not criteria:
+            return scores
+        keys = list({normalize_criterion(criterion) for criterion in criteria})
+        criterion_placeholders = ", ".join("?" for _ in keys)
+        rows = []
+        with self._lock:
+            # Stay below SQLite's limit on query parameters
+            chunk_size = max(1, 500 - len(keys) - 1)
+            for start in range(0, len(wanted), chunk_size):
+                chunk = wanted[start:start + chunk_size]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows.extend(self.conn.execute(
+                    f"SELECT candidate_id, criterion, score FROM candidate_scores "
+                    f"WHERE candidate_id IN ({placeholders}) AND model = ? AND criterion IN ({criterion_placeholders})",
+                    (*chunk, model, *keys),
+                ).fetchall())
+        stored: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            stored.setdefault(row["candidate_id"], {})[row["criterion"]] = row["score"]
+        for candidate_id, by_key in stored.items():
+            scores[candidate_id] = {
+                criterion: by_key[normalize_criterion(criterion)]
+                for criterion in criteria if normalize_criterion(criterion) in by_key
+            }
+        return scores
+
+    def get_candidates(self, candidate_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Get candidates with their text.
+
+        Args:
+            candidate_ids: IDs to fetch; all candidates if None
+
+        Returns:
+            List[Dict[str, Any]]: Candidates in the requested order (or by creation time)
+        """
+        with self._lock:
+            if candidate_ids is None:
+                rows = self.conn.execute("SELECT * FROM candidates ORDER BY created_at, id").fetchall()
+                return [dict(row) for row in rows]
+            found = {}
+            # Stay below SQLite's limit on query parameters
+            for start in range(0, len(candidate_ids), 500):
+                chunk = candidate_ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                for row in self.conn.execute(f"SELECT * FROM candidates WHERE id IN ({placeholders})", chunk):
+                    found[row["id"]] = dict(row)
+        return [found[candidate_id] for candidate_id in candidate_ids if candidate_id in found]
+
+    def list_candidates(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        List stored candidates without their text.
+
+        Args:
+            limit: Maximum number of candidates returned
+            offset: Number of candidates to skip
+
+        Returns:
+            List[Dict[str, Any]]: Candidate ID, filename, name, creation time and number of scored criteria
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT c.id, c.filename, c.candidate_name, c.created_at, "
+                "COUNT(DISTINCT s.criterion) AS scored_criteria "
+                "FROM candidates c LEFT JOIN candidate_scores s ON s.candidate_id = c.id "
+                "GROUP BY c.id ORDER BY c.created_at, c.id LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+candidate_store = CandidateStore()
@@ -1,33 +1,57 @@
+import hashlib
 from typing import List
 
 from fastapi import UploadFile
 
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.services.document_processor import document_processor
-from app.services.llm_service import llm_service
+from app.services.llm_service import CRITERIA_PROMPT_VERSION, llm_service
+from app.utils.cache import llm_cache
 
 
 class CriteriaExtractor:
     """Service for extracting ranking criteria from job descriptions."""
     
     @staticmethod
-    async def extract_criteria_from_job_description(file: UploadFile) -> List[str]:
+    def _document_cache_key(content: bytes) -> str:
+        # The criteria also depend on how the text is compacted and chunked
+        options = (f"{settings.TEXT_COMPACTION_ENABLED} {settings.JOB_DESCRIPTION_TOKEN_BUDGET} "
+                   f"{settings.CRITERIA_CHUNK_TOKENS} {settings.CRITERIA_MAX_CHUNKS}")
+        return llm_cache.make_key("criteria_document", llm_service.model, CRITERIA_PROMPT_VERSION,
+                                  f"{hashlib.sha256(content).hexdigest()} {options}")
+    
+    @staticmethod
+    async def extract_criteria_from_job_description(file: UploadFile, use_cache: bool = True) -> List[str]:
         """
         Extract key ranking criteria from a job description file.
         
+        The criteria are cached by a hash of the file content, so a job description that
+        is uploaded again is neither parsed nor sent to the LLM.
+        
         Args:
             file: UploadFile object containing the job description
-            
+            use_cache: Whether cached criteria and LLM responses may be used
+        
         Returns:
             List[str]: List of extracted criteria
         """
+        with metrics.stage("upload_read"):
+            content = await file.read()
+        cache_key = CriteriaExtractor._document_cache_key(content)
+        if use_cache:
+            cached = await llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         # Extract text from the job description file
-        job_description_text = await document_processor.extract_text_from_file(file)
-
-        print(job_description_text)
+        job_description_text = await document_processor.extract_text_from_bytes(content, file.filename)
         
         # Use LLM to extract criteria from the text
-        criteria = await llm_service.extract_criteria_from_job_description(job_description_text)
+        criteria = await llm_service.extract_criteria_from_job_description(
+            job_description_text, use_cache=use_cache)
         
+        await llm_cache.set(cache_key, criteria)
         return criteria
 
 criteria_extractor = CriteriaExtractor()
\ No newline at end of file
@@ -1,16 +1,106 @@
+import asyncio
+import importlib
+import io
+import multiprocessing
 import os
-from typing import Dict, List, Tuple, Union
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple, Union
 
-import docx
-import fitz  # PyMuPDF
 from fastapi import UploadFile
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.cache import text_cache
+from app.utils.text_compactor import PAGE_BREAK, text_compactor
 
 
 class DocumentProcessor:
     """Service for processing PDF and DOCX documents."""
     
+    # Parsing is CPU-bound, so it runs in a pool shared by every request in the worker
+    _executor: Optional[Executor] = None
+    # One slot per pool worker, so documents only reach the pool when a worker is free
+    _slots: Optional[asyncio.Semaphore] = None
+    _slots_loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    @staticmethod
+    def _worker_count() -> int:
+        return settings.DOCUMENT_PARSER_WORKERS or os.cpu_count() or 1
+    
+    @classmethod
+    def get_executor(cls) -> Executor:
+        """
+        Get the executor used for document parsing, creating it on first use.
+        
+        settings.DOCUMENT_PARSER_EXECUTOR selects a process pool ("process") or a
+        thread pool ("thread") with settings.DOCUMENT_PARSER_WORKERS workers.
+        """
+        if cls._executor is None:
+            workers = cls._worker_count()
+            if settings.DOCUMENT_PARSER_EXECUTOR == "process":
+                # Spawn rather than fork: the server process already runs threads
+                cls._executor = ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            elif settings.DOCUMENT_PARSER_EXECUTOR == "thread":
+                cls._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="document-parser")
+            else:
+                raise ValueError(f"Unsupported document parser executor: {settings.DOCUMENT_PARSER_EXECUTOR}")
+        return cls._executor
+    
+    @classmethod
+    def shutdown_executor(cls) -> None:
+        """Shut down the parsing pool, if it was started."""
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+    
+    @classmethod
+    def _discard_executor(cls, executor: Executor) -> None:
+        """
+        Stop a process pool that is stuck on a document or broken, killing its workers.
+        
+        The next parse starts a new pool. Thread pools cannot be interrupted and are kept.
+        """
+        if not isinstance(executor, ProcessPoolExecutor):
+            return
+        if cls._executor is executor:
+            cls._executor = None
+        # ProcessPoolExecutor has no public way to stop a busy worker
+        processes = list((executor._processes or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+    
+    @classmethod
+    def _parse_slots(cls) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if cls._slots is None or cls._slots_loop is not loop:
+            cls._slots = asyncio.Semaphore(cls._worker_count())
+            cls._slots_loop = loop
+        return cls._slots
+    
+    @classmethod
+    async def warm_up(cls) -> None:
+        """
+        Start every parsing worker and load the parser libraries in it.
+        
+        Workers and libraries are otherwise started on first use, which slows down the
+        first documents a new worker parses.
+        """
+        executor = cls.get_executor()
+        workers = cls._worker_count()
+        loop = asyncio.get_running_loop()
+        # Concurrent tasks make the pool start a process (or thread) for each of them
+        await asyncio.gather(*(loop.run_in_executor(executor, DocumentProcessor._load_parsers)
+                               for _ in range(workers)))
+    
+    @staticmethod
+    def _load_parsers() -> None:
+        importlib.import_module("docx")
+        importlib.import_module("fitz")
+    
     @staticmethod
     async def extract_text_from_file(file: UploadFile) -> str:
         """
@@ -23,51 +113,140 @@ class DocumentProcessor:
             str: Extracted text content
             
         Raises:
-            ValueError: If file format is not supported
+            ValueError: If file format is not supported, parsing fails or takes longer
+                than settings.DOCUMENT_PARSE_TIMEOUT_SECONDS
         """
-        # Save the uploaded file temporarily
-        temp_file_path = os.path.join(settings.UPLOAD_DIR, file.filename)
-        with open(temp_file_path, "wb") as temp_file:
+        with metrics.stage("upload_read"):
             content = await file.read()
-            temp_file.write(content)
+        return await DocumentProcessor.extract_text_from_bytes(content, file.filename)
+    
+    @staticmethod
+    async def extract_text_from_bytes(content: bytes, filename: str) -> str:
+        """
+        Extract text content from the bytes of a PDF or DOCX file.
+        
+        Documents are parsed straight from memory. Only documents larger than
+        settings.DOCUMENT_SPOOL_THRESHOLD_BYTES are spooled to a uniquely named
+        temporary file, which avoids copying them to the parser process.
+        
+        Args:
+            content: Raw file bytes
+            filename: Original file name, used to pick the parser
             
-        try:
-            # Extract text based on file extension
-            file_ext = os.path.splitext(file.filename)[1].lower()
+        Returns:
+            str: Extracted text content
             
-            if file_ext == ".pdf":
-                text = DocumentProcessor._extract_text_from_pdf(temp_file_path)
-            elif file_ext in [".docx", ".doc"]:
-                text = DocumentProcessor._extract_text_from_docx(temp_file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_ext}")
-                
+        Raises:
+            ValueError: If file format is not supported, parsing fails or takes longer
+                than settings.DOCUMENT_PARSE_TIMEOUT_SECONDS
+        """
+        file_ext = os.path.splitext(filename)[1].lower()
+        
+        # Skip parsing entirely if these exact bytes were extracted before
+        cache_key = text_cache.make_key(content, file_ext)
+        cached_text = text_cache.get(cache_key)
+        if cached_text is not None:
+            return cached_text
+        
+        # Extract text based on file extension
+        if file_ext == ".pdf":
+            parser, extra_args = DocumentProcessor._extract_text_from_pdf, (settings.DOCUMENT_MAX_PAGES,)
+        elif file_ext in [".docx", ".doc"]:
+            parser, extra_args = DocumentProcessor._extract_text_from_docx, ()
+        else:
+            raise ValueError(f"Unsupported file format: {file_ext}")
+        
+        temp_file_path = None
+        source: Union[bytes, str] = content
+        if len(content) > settings.DOCUMENT_SPOOL_THRESHOLD_BYTES:
+            fd, temp_file_path = tempfile.mkstemp(suffix=file_ext, dir=settings.UPLOAD_DIR)
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(content)
+            source = temp_file_path
+            
+        try:
+            with metrics.stage("parse"):
+                text = await DocumentProcessor._parse_in_executor(parser, source, extra_args, filename)
+            text_cache.set(cache_key, text)
             return text
         finally:
-            # Clean up the temporary file
-            if os.path.exists(temp_file_path):
+            # Clean up the spooled file
+            if temp_file_path and os.path.exists(temp_file_path):
                 os.remove(temp_file_path)
                 
     @staticmethod
-    def _extract_text_from_pdf(file_path: str) -> str:
-        """Extract text from a PDF file."""
-        text = ""
+    async def _parse_in_executor(parser, source: Union[bytes, str], extra_args: Tuple, filename: str) -> str:
+        """
+        Run a parser in the parsing pool, off the event loop.
+        
+        A document is only handed to the pool once a worker is free for it, so
+        settings.DOCUMENT_PARSE_TIMEOUT_SECONDS counts its parsing and not its time in the
+        queue. In a process pool, a document that takes longer has its worker killed along
+        with the rest of the pool, so it cannot keep a worker busy for later uploads; the
+        other documents that were being parsed in that pool are retried in the new pool.
+        In a thread pool the timeout only stops waiting; the parse runs on in its thread,
+        which keeps its slot until it finishes.
+        """
+        loop = asyncio.get_running_loop()
+        slots = DocumentProcessor._parse_slots()
+        
+        def release(future: asyncio.Future) -> None:
+            slots.release()
+            if not future.cancelled():
+                # Retrieved here too, for parses nobody waits for any more
+                future.exception()
+        
+        for attempt in range(2):
+            await slots.acquire()
+            try:
+                executor = DocumentProcessor.get_executor()
+                future = loop.run_in_executor(executor, parser, source, *extra_args)
+            except BaseException:
+                slots.release()
+                raise
+            # The slot is freed when the parse ends, not when waiting for it stops
+            future.add_done_callback(release)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future),
+                                              timeout=settings.DOCUMENT_PARSE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                DocumentProcessor._discard_executor(executor)
+                raise ValueError(
+                    f"Timed out extracting text from {filename} "
+                    f"after {settings.DOCUMENT_PARSE_TIMEOUT_SECONDS} seconds")
+            except BrokenProcessPool:
+                # Killed after another document timed out, or a worker crashed
+                DocumentProcessor._discard_executor(executor)
+                if attempt:
+                    raise ValueError(f"Document parser crashed while extracting text from {filename}")
+    
+    @staticmethod
+    def _extract_text_from_pdf(source: Union[bytes, str], max_pages: Optional[int] = None) -> str:
+        """Extract text from PDF bytes or a PDF file path, reading at most max_pages pages."""
+        import fitz  # PyMuPDF, imported where documents are parsed
+        
         try:
-            # Open the PDF file
-            with fitz.open(file_path) as pdf:
+            # Open the PDF from memory or from disk
+            if isinstance(source, bytes):
+                pdf_document = fitz.open(stream=source, filetype="pdf")
+            else:
+                pdf_document = fitz.open(source)
+            with pdf_document as pdf:
                 # Extract text from each page
-                for page in pdf:
-                    text += page.get_text()
-            return text
+                page_count = pdf.page_count if max_pages is None else min(pdf.page_count, max_pages)
+                # Page breaks let compaction recognize running headers and footers
+                return PAGE_BREAK.join(pdf[page_number].get_text() for page_number in range(page_count))
         except Exception as e:
             raise ValueError(f"Error extracting text from PDF: {str(e)}")
     
     @staticmethod
-    def _extract_text_from_docx(file_path: str) -> str:
-        """Extract text from a DOCX file."""
+    def _extract_text_from_docx(source: Union[bytes, str]) -> str:
+        """Extract text from DOCX bytes or a DOCX file path."""
+        import docx
+        
         try:
-            # Open the DOCX file
-            doc = docx.Document(file_path)
+            # Open the DOCX from memory or from disk
+            doc = docx.Document(io.BytesIO(source) if isinstance(source, bytes) else source)
             # Extract text from paragraphs
             full_text = []
             for para in doc.paragraphs:
@@ -77,18 +256,21 @@ class DocumentProcessor:
             raise ValueError(f"Error extracting text from DOCX: {str(e)}")
             
     @staticmethod
-    async def get_candidate_name_from_resume(resume_text: str) -> str:
+    async def get_candidate_name_from_resume(resume_text: str, use_cache: bool = True) -> str:
         """
         Extract candidate name from resume text using GPT-4.
         
         Args:
             resume_text: The extracted text from a resume
+            use_cache: Whether a cached LLM response may be used
             
         Returns:
             str: The candidate's name or a placeholder if not found
         """
         from app.services.llm_service import llm_service
 
+        # Drop page artifacts first so they do not use up the characters that are sent
+        resume_text = text_compactor.compact(resume_text, record_stats=False)
         prompt = f"""
         Extract the candidate's full name from the following resume text.
         Return only the name, without any additional text or explanation.
@@ -99,7 +281,8 @@ class DocumentProcessor:
         """
 
         try:
-            name = await llm_service.get_completion(prompt)
+            with metrics.stage("name_extraction"):
+                name = await llm_service.get_completion(prompt, use_cache=use_cache)
             return name.strip() or "Unnamed Candidate"
         except Exception as e:
             print(f"Error extracting name: {str(e)}")
@@ -0,0 +1,128 @@
+import hashlib
+import re
+import zlib
+from typing import Dict, List
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Words per shingle; resumes are compared by the sets of their word 3-grams
+SHINGLE_SIZE = 3
+
+# MinHash signature layout. Signatures are stored in the candidate store, so changing
+# any of these requires clearing its signatures.
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+# Fixed, so signatures are comparable across processes and restarts
+PERMUTATION_SEED = 20240517
+
+
+class DuplicateDetector:
+    """
+    Near-duplicate detection for resumes with MinHash signatures and LSH.
+
+    A resume's signature holds, for each of NUM_PERMUTATIONS hash functions, the
+    minimum hash of its word shingles; the fraction of equal positions in two
+    signatures estimates the Jaccard similarity of their shingle sets. Signatures are
+    split into LSH_BANDS bands whose hashes index them, so only resumes sharing a band
+    (likely above a similarity of about 0.7) are compared instead of every pair. NumPy
+    is imported on first use.
+    """
+
+    def __init__(self):
+        """Initialize the detector; the hash functions are created on first use."""
+        self._multipliers = None
+        self._offsets = None
+
+    def _hash_functions(self):
+        import numpy as np
+
+        if self._multipliers is None:
+            rng = np.random.default_rng(PERMUTATION_SEED)
+            # Multiply-shift hashing: odd multipliers, keeping the high 32 bits
+            self._multipliers = rng.integers(1, 2 ** 63, NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+            self._offsets = rng.integers(0, 2 ** 63, NUM_PERMUTATIONS, dtype=np.uint64)
+        return self._multipliers, self._offsets
+
+    def signature(self, text: str) -> bytes:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: Extracted resume text
+
+        Returns:
+            bytes: Signature (NUM_PERMUTATIONS 32-bit values); empty if the text has no words
+        """
+        import numpy as np
+
+        words = WORD_PATTERN.findall(text.casefold())
+        if not words:
+            return b""
+        size = min(SHINGLE_SIZE, len(words))
+        shingles = {" ".join(words[position:position + size]) for position in range(len(words) - size + 1)}
+        # crc32 is stable across processes, unlike hash()
+        hashed = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        multipliers, offsets = self._hash_functions()
+        with np.errstate(over="ignore"):
+            # Products wrap around modulo 2 ** 64
+            permuted = (hashed[:, None] * multipliers[None, :] + offsets[None, :]) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32).tobytes()
+
+    @staticmethod
+    def band_hashes(signature: bytes) -> List[int]:
+        """
+        Hash each band of a signature, for the LSH index.
+
+        Returns:
+            List[int]: One signed 64-bit hash per band (the band number is part of the hash)
+        """
+        if not signature:
+            return []
+        band_bytes = LSH_ROWS * 4
+        return [
+            int.from_bytes(hashlib.blake2b(bytes([band]) + signature[band * band_bytes:(band + 1) * band_bytes],
+                                           digest_size=8).digest(), "big", signed=True)
+            for band in range(LSH_BANDS)
+        ]
+
+    @staticmethod
+    def similarity(first: bytes, second: bytes) -> float:
+        """Estimate the Jaccard similarity of the texts two signatures were computed from."""
+        import numpy as np
+
+        if not first or len(first) != len(second):
+            return 0.0
+        return float(np.mean(np.frombuffer(first, dtype=np.uint32) == np.frombuffer(second, dtype=np.uint32)))
+
+    def find_duplicates(self, signatures: List[bytes], threshold: float) -> Dict[int, int]:
+        """
+        Find near-duplicates within a list of signatures.
+
+        Each signature is compared only with the earlier ones sharing an LSH band. The
+        first of a group of near-duplicates is kept as the original.
+
+        Args:
+            signatures: Signatures in upload order
+            threshold: Minimum estimated similarity of a duplicate to its original
+
+        Returns:
+            Dict[int, int]: Position of each duplicate -> position of its original
+        """
+        buckets: Dict[int, List[int]] = {}
+        duplicates: Dict[int, int] = {}
+        for position, signature in enumerate(signatures):
+            band_hashes = self.band_hashes(signature)
+            candidates = sorted({original for band_hash in band_hashes for original in buckets.get(band_hash, ())})
+            original = next((candidate for candidate in candidates
+                             if self.similarity(signature, signatures[candidate]) >= threshold), None)
+            if original is not None:
+                duplicates[position] = original
+                continue
+            # Only originals are indexed, so every duplicate points at an original
+            for band_hash in band_hashes:
+                buckets.setdefault(band_hash, []).append(position)
+        return duplicates
+
+duplicate_detector = DuplicateDetector()
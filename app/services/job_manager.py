@@ -0,0 +1,359 @@
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.resume_scorer import resume_scorer
+
+
+class JobStore:
+    """SQLite-backed store for scoring jobs and the status of each resume in them."""
+
+    def __init__(self, path: str):
+        """
+        Open the store and create the tables if needed.
+
+        Args:
+            path: Path of the SQLite database file
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                criteria TEXT NOT NULL,
+                use_cache INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                lease_until REAL,
+                output_path TEXT,
+                error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS job_items (
+                job_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                stored_path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                PRIMARY KEY (job_id, idx)
+            );
+            """
+        )
+        # Stores created before jobs were claimed have no lease column
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "lease_until" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def create_job(self, job_id: str, criteria: List[str], use_cache: bool, items: List[Dict[str, str]]) -> None:
+        """Insert a queued job with one pending item per resume."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, criteria, use_cache, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(criteria), int(use_cache), time.time()),
+            )
+            self._conn.executemany(
+                "INSERT INTO job_items (job_id, idx, filename, stored_path, status) VALUES (?, ?, ?, ?, 'pending')",
+                [(job_id, index, item["filename"], item["stored_path"]) for index, item in enumerate(items)],
+            )
+            self._conn.commit()
+
+    def update_job(self, job_id: str, **fields: Any) -> None:
+        """Update columns of a job."""
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def claim_job(self, job_id: str, lease_seconds: float) -> bool:
+        """
+        Mark a job as running in this worker, unless another worker holds it.
+
+        A job can be claimed while it is queued, or while it is running but its lease has
+        expired because the worker running it stopped. The check and the update are one
+        statement, so of several workers claiming the same job only one succeeds.
+
+        Args:
+            job_id: ID of the job
+            lease_seconds: Seconds the claim is valid for unless it is renewed
+
+        Returns:
+            bool: Whether this worker now holds the job
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?), lease_until = ? "
+                "WHERE id = ? AND (status = 'queued' OR (status = 'running' AND COALESCE(lease_until, 0) < ?))",
+                (now, now + lease_seconds, job_id, now),
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def get_job_status(self, job_id: str) -> Optional[str]:
+        """Return the status of a job, or None if it does not exist."""
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["status"] if row else None
+
+    def update_item(self, job_id: str, index: int, status: str,
+                    result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        """Record the outcome of one resume."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_items SET status = ?, result = ?, error = ? WHERE job_id = ? AND idx = ?",
+                (status, json.dumps(result) if result is not None else None, error, job_id, index),
+            )
+            self._conn.commit()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job and its items, or None if it does not exist."""
+        with self._lock:
+            job = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            items = self._conn.execute(
+                "SELECT * FROM job_items WHERE job_id = ? ORDER BY idx", (job_id,)
+            ).fetchall()
+        job = dict(job)
+        job["criteria"] = json.loads(job["criteria"])
+        job["items"] = [
+            {**dict(item), "result": json.loads(item["result"]) if item["result"] else None}
+            for item in items
+        ]
+        return job
+
+    def unfinished_job_ids(self) -> List[str]:
+        """Return IDs of jobs that are queued or were interrupted while running."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+
+class JobManager:
+    """
+    Service for running resume scoring as background jobs.
+
+    Uploaded resumes are copied under settings.UPLOAD_DIR/jobs and tracked in a SQLite
+    store, so unfinished jobs are picked up again when the worker restarts. Resumes that
+    were already scored before the restart are not scored again.
+    """
+
+    def __init__(self):
+        """Initialize the job manager; the store is opened on first use."""
+        self._store: Optional[JobStore] = None
+        self._job_slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def jobs_dir(self) -> str:
+        return os.path.join(settings.UPLOAD_DIR, "jobs")
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore(settings.JOB_STORE_PATH or os.path.join(self.jobs_dir, "jobs.sqlite3"))
+        return self._store
+
+    async def submit(self, criteria: List[str], files: List[UploadFile], use_cache: bool = True) -> str:
+        """
+        Persist the uploads and start scoring them in the background.
+
+        Args:
+            criteria: List of criteria to score against
+            files: List of resume files to evaluate
+            use_cache: Whether cached LLM responses may be used
+
+        Returns:
+            str: ID of the new job
+        """
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        await run_in_threadpool(os.makedirs, job_dir, exist_ok=True)
+
+        items = []
+        for index, resume_file in enumerate(files):
+            filename = os.path.basename(resume_file.filename)
+            stored_path = os.path.join(job_dir, f"{index}_{filename}")
+            await run_in_threadpool(self._write_file, stored_path, await resume_file.read())
+            items.append({"filename": filename, "stored_path": stored_path})
+
+        await run_in_threadpool(self.store.create_job, job_id, criteria, use_cache, items)
+        self._start(job_id)
+        return job_id
+
+    @staticmethod
+    def _write_file(path: str, content: bytes) -> None:
+        with open(path, "wb") as stored_file:
+            stored_file.write(content)
+
+    def resume_unfinished_jobs(self) -> None:
+        """
+        Pick up jobs that are queued or were running when a worker stopped.
+
+        Every worker calls this at startup, and each job is run by the worker that claims
+        it first. A job whose worker stopped while running it is taken over once its lease
+        (settings.JOB_LEASE_SECONDS) expires.
+        """
+        for job_id in self.store.unfinished_job_ids():
+            self._start(job_id)
+
+    def get_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the progress of a job.
+
+        Args:
+            job_id: ID of the job
+
+        Returns:
+            Optional[Dict[str, Any]]: Job status with per-resume results, or None if the job does not exist
+        """
+        job = self.store.get_job(job_id)
+        if job is None:
+            return None
+
+        total = len(job["items"])
+        completed = sum(1 for item in job["items"] if item["status"] == "completed")
+        failed = sum(1 for item in job["items"] if item["status"] == "failed")
+        done = completed + failed
+
+        # Estimate the remaining time from the average pace so far
+        eta_seconds = None
+        if job["status"] == "running" and job["started_at"] and 0 < done < total:
+            elapsed = time.time() - job["started_at"]
+            eta_seconds = round(elapsed / done * (total - done), 1)
+        elif job["status"] in ("completed", "failed"):
+            eta_seconds = 0.0
+
+        file_url = None
+        if job["output_path"]:
+            file_url = f"{settings.API_PREFIX}/download/{os.path.basename(job['output_path'])}"
+
+        return {
+            "job_id": job_id,
+            "status": job["status"],
+            "total": total,
+            "completed": completed,
+            "failed": failed,
+            "progress": round(done / total, 4) if total else 1.0,
+            "eta_seconds": eta_seconds,
+            "file_url": file_url,
+            "error": job["error"],
+            "resumes": [self._resume_status(item, job["criteria"]) for item in job["items"]],
+        }
+
+    @staticmethod
+    def _resume_status(item: Dict[str, Any], criteria: List[str]) -> Dict[str, Any]:
+        """Get the status fields of one resume of a job."""
+        status = {"filename": item["filename"], "status": item["status"], "error": item["error"]}
+        result = item["result"]
+        if result:
+            status.update({
+                "candidate_name": result["Candidate Name"],
+                # Pre-screened resumes have no LLM scores
+                "scores": {c: result[c] for c in criteria if result.get(c) is not None},
+                "total_score": result["Total Score"],
+                "pre_screen_score": result.get("Pre-Screen Score"),
+                "stage": result.get("Stage"),
+            })
+        return status
+
+    def _start(self, job_id: str) -> None:
+        if job_id in self._tasks:
+            return
+        task = asyncio.create_task(self._run(job_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _run(self, job_id: str) -> None:
+        """Claim a job once a slot is free and run it, unless another worker runs it."""
+        if self._job_slots is None:
+            self._job_slots = asyncio.Semaphore(max(1, settings.JOB_MAX_CONCURRENT_JOBS))
+
+        while True:
+            async with self._job_slots:
+                if await run_in_threadpool(self.store.claim_job, job_id, settings.JOB_LEASE_SECONDS):
+                    await self._run_claimed(job_id)
+                    return
+            # Held by another worker: wait in case that worker stops before finishing it
+            if await run_in_threadpool(self.store.get_job_status, job_id) not in ("queued", "running"):
+                return
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS)
+
+    async def _renew_lease(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            await run_in_threadpool(self.store.update_job, job_id,
+                                    lease_until=time.time() + settings.JOB_LEASE_SECONDS)
+
+    async def _run_claimed(self, job_id: str) -> None:
+        """Score the pending resumes of a claimed job and write its report."""
+        renewal = asyncio.create_task(self._renew_lease(job_id))
+        try:
+            job = await run_in_threadpool(self.store.get_job, job_id)
+            pending: List[Dict[str, Any]] = []
+            files: List[UploadFile] = []
+
+            async def on_result(position: int, row: Dict) -> None:
+                await run_in_threadpool(self.store.update_item, job_id, pending[position]["idx"], "completed",
+                                        result=row)
+
+            async def on_error(position: int, error: Exception) -> None:
+                await run_in_threadpool(self.store.update_item, job_id, pending[position]["idx"], "failed",
+                                        error=str(error))
+
+            try:
+                for item in job["items"]:
+                    if item["status"] in ("completed", "failed"):
+                        continue
+                    try:
+                        resume_file = open(item["stored_path"], "rb")
+                    except OSError as e:
+                        # e.g. removed by a cleanup, or UPLOAD_DIR changed since the job was submitted
+                        await run_in_threadpool(self.store.update_item, job_id, item["idx"], "failed",
+                                                error=f"Stored resume missing: {str(e)}")
+                        continue
+                    pending.append(item)
+                    files.append(UploadFile(file=resume_file, filename=item["filename"]))
+
+                await resume_scorer.score_rows(job["criteria"], files, bool(job["use_cache"]),
+                                               on_result=on_result, on_error=on_error)
+
+                # Build the report from every scored resume, including ones scored before a restart
+                job = await run_in_threadpool(self.store.get_job, job_id)
+                results = [item["result"] for item in job["items"] if item["status"] == "completed"]
+                output_path = resume_scorer.generate_report(results, job["criteria"])
+                await run_in_threadpool(self.store.update_job, job_id, status="completed",
+                                        finished_at=time.time(), output_path=output_path)
+            except Exception as e:
+                print(f"Error running scoring job {job_id}: {str(e)}")
+                await run_in_threadpool(self.store.update_job, job_id, status="failed",
+                                        finished_at=time.time(), error=str(e))
+            finally:
+                for resume_file in files:
+                    await resume_file.close()
+
+            shutil.rmtree(os.path.join(self.jobs_dir, job_id), ignore_errors=True)
+        finally:
+            renewal.cancel()
+
+job_manager = JobManager()
@@ -1,32 +1,154 @@
+import asyncio
 import json
-from typing import Any, Dict, List, Optional, Union
-
-from openai import OpenAI
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, Union
 
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.cache import llm_cache
+from app.utils.criteria import criterion_ids, normalize_criterion
+from app.utils.rate_limiter import RateLimiter
+from app.utils.text_compactor import text_compactor
+from app.utils.tokens import estimate_tokens
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# Bump a version whenever its prompt changes, so stale cached responses are not reused
+COMPLETION_PROMPT_VERSION = "1"
+CRITERIA_PROMPT_VERSION = "2"
+SCORING_PROMPT_VERSION = "2"
+COMBINED_SCORING_PROMPT_VERSION = "2"
+BATCH_SCORING_PROMPT_VERSION = "2"
+
+BATCH_SCORING_SYSTEM_PROMPT = (
+    "You extract candidate names from several resumes and score each resume against criteria. "
+    "Return only a JSON object with a result for every resume ID."
+)
+
+# Estimated completion tokens for a batched result: per resume, plus per criterion score
+BATCH_OUTPUT_TOKENS_PER_RESUME = 30
+BATCH_OUTPUT_TOKENS_PER_CRITERION = 15
+
+# Completion tokens allowed for scoring a single resume, and the estimate per criterion
+# (score and justification) used to decide how many criteria fit in one call
+SCORING_MAX_TOKENS = 1000
+SCORING_OUTPUT_TOKENS_PER_CRITERION = 40
 
 
 class LLMService:
     """Service for interacting with Language Models (LLMs)."""
     
     def __init__(self):
-        """Initialize the LLM service with appropriate API keys."""
-        print(settings.OPENAI_API_KEY)
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        """Initialize the LLM service; the API client is created on first use."""
+        self._client: Optional["AsyncOpenAI"] = None
         self.model = settings.OPENAI_MODEL
+        self.rate_limiter = RateLimiter()
+    
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """
+        Get the API client, creating it on first use.
+        
+        A single pooled HTTP client is shared by every request in the worker. The openai
+        and httpx packages are only imported here, which keeps them out of the import of
+        the app.
+        """
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(settings.OPENAI_TIMEOUT, connect=settings.OPENAI_CONNECT_TIMEOUT),
+            )
+            self._client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.OPENAI_BASE_URL,
+                http_client=http_client,
+                max_retries=0,  # Retries are scheduled by the rate limiter
+            )
+        return self._client
+    
+    async def _create_chat_completion(self, **kwargs: Any):
+        """
+        Send a chat completion request through the shared async client.
+        
+        Requests are scheduled by the rate limiter: they respect the model's requests and
+        tokens per minute and an adaptive concurrency limit (at most
+        settings.OPENAI_MAX_CONCURRENT_REQUESTS), and are retried when throttled or when
+        they fail transiently.
+        """
+        model = kwargs["model"]
+        estimated_tokens = sum(estimate_tokens(message["content"]) for message in kwargs["messages"])
+        estimated_tokens += kwargs.get("max_tokens") or 0
+        
+        async def send():
+            try:
+                with metrics.stage("llm_request"):
+                    raw_response = await self.client.chat.completions.with_raw_response.create(**kwargs)
+            except Exception as e:
+                outcome = "throttled" if RateLimiter.is_throttle(e) else "error"
+                metrics.llm_requests.inc(model=model, outcome=outcome)
+                raise
+            self.rate_limiter.update_limits(model, raw_response.headers)
+            response = raw_response.parse()
+            metrics.llm_requests.inc(model=model, outcome="success")
+            if response.usage:
+                metrics.llm_tokens.inc(response.usage.prompt_tokens, model=model, type="prompt")
+                metrics.llm_tokens.inc(response.usage.completion_tokens, model=model, type="completion")
+            return response
+        
+        return await self.rate_limiter.run(
+            model, estimated_tokens, send,
+            used_tokens=lambda response: response.usage.total_tokens if response.usage else None,
+        )
+    
+    async def warm_up(self, connections: int) -> None:
+        """
+        Open pooled connections to the API before the first request needs them.
+        
+        Each connection is opened by listing the models; failures are only logged, since
+        the API may not support the call or may be unreachable at startup.
+        
+        Args:
+            connections: Number of connections to open, at most
+                settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS of them are kept open
+        """
+        results = await asyncio.gather(*(self.client.models.list() for _ in range(connections)),
+                                       return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            print(f"Error opening LLM API connections during warm-up: {str(errors[0])}")
+    
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool, if the client was created."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
     
-    async def get_completion(self, prompt: str) -> str:
+    async def get_completion(self, prompt: str, use_cache: bool = True) -> str:
         """
         Get a simple text completion from the LLM.
         
         Args:
             prompt: The prompt to send to the LLM
+            use_cache: Whether a cached response may be returned (fresh responses are always cached)
             
         Returns:
             str: The generated text
         """
+        cache_key = llm_cache.make_key("completion", self.model, COMPLETION_PROMPT_VERSION, prompt)
+        if use_cache:
+            cached = await llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            response = self.client.chat.completions.create(
+            response = await self._create_chat_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": "You are a helpful assistant."},
@@ -36,75 +158,188 @@ class LLMService:
                 max_tokens=100
             )
             
-            return response.choices[0].message.content.strip()
+            completion = response.choices[0].message.content.strip()
+            await llm_cache.set(cache_key, completion)
+            return completion
             
         except Exception as e:
             raise Exception(f"Error getting completion: {str(e)}")
     
-    async def extract_criteria_from_job_description(self, job_description: str) -> List[str]:
+    @metrics.timed("criteria_extraction")
+    async def extract_criteria_from_job_description(self, job_description: str, use_cache: bool = True) -> List[str]:
         """
         Extract key ranking criteria from a job description using LLM.
         
+        A job description longer than settings.CRITERIA_CHUNK_TOKENS is compacted to at
+        most settings.CRITERIA_MAX_CHUNKS chunks, which are split at section boundaries.
+        Criteria are extracted from every chunk in parallel, then merged in document
+        order, without duplicates.
+        
         Args:
             job_description: The text content of the job description
+            use_cache: Whether cached responses may be returned (fresh responses are always cached)
             
         Returns:
             List[str]: List of extracted criteria
+            
+        Raises:
+            Exception: If the LLM request fails or no criteria were found
         """
+        chunk_tokens = settings.CRITERIA_CHUNK_TOKENS
+        if chunk_tokens:
+            job_description = text_compactor.compact(job_description, chunk_tokens * settings.CRITERIA_MAX_CHUNKS)
+            chunks = text_compactor.split(job_description, chunk_tokens)[:settings.CRITERIA_MAX_CHUNKS]
+        else:
+            job_description = text_compactor.compact(job_description, settings.JOB_DESCRIPTION_TOKEN_BUDGET)
+            chunks = [job_description]
+        
+        try:
+            if len(chunks) == 1:
+                criteria = await self._extract_criteria(chunks[0], use_cache)
+            else:
+                chunk_criteria = await asyncio.gather(
+                    *(self._extract_criteria(chunk, use_cache, section=True) for chunk in chunks))
+                criteria = self._merge_criteria(chunk_criteria)
+        except Exception as e:
+            raise Exception(f"Error extracting criteria from job description: {str(e)}")
+        
+        if not criteria:
+            raise Exception("Error extracting criteria from job description: No criteria found")
+        return criteria
+    
+    async def _extract_criteria(self, text: str, use_cache: bool, section: bool = False) -> List[str]:
+        """Extract the criteria in a whole job description, or in one section of it."""
+        cache_key = llm_cache.make_key("criteria_section" if section else "criteria", self.model,
+                                       CRITERIA_PROMPT_VERSION, text)
+        if use_cache:
+            cached = await llm_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        if section:
+            # Sections such as benefits or company information may contain no criteria
+            task = ("Please analyze the following section of a longer job description and extract the key criteria "
+                    "it states that would be used to rank candidates. If it states none, return an empty list.")
+        else:
+            task = ("Please analyze the following job description and extract key criteria "
+                    "that would be used to rank candidates.")
         prompt = f"""
         You are an expert HR assistant tasked with extracting key ranking criteria from job descriptions.
         
-        Please analyze the following job description and extract key criteria that would be used to rank candidates.
+        {task}
         Focus on required skills, certifications, experience levels, and qualifications.
         
-        Return the criteria as a comma-separated list within <criteria></criteria> tags.
+        Return a JSON object with a "criteria" key holding the list of criteria, one string per criterion.
         Each criterion should be specific and measurable.
         
         Job Description:
-        {job_description}
+        {text}
         """
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You extract ranking criteria from job descriptions. Return the criteria as a comma-separated list within <criteria></criteria> tags."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,  # Low temperature for more focused and consistent output
-                max_tokens=1000
-            )
-            
-            # Extract content from the response
-            content = response.choices[0].message.content
-            
-            # Extract criteria from the XML-like tags
-            start_tag = "<criteria>"
-            end_tag = "</criteria>"
-            start_index = content.find(start_tag) + len(start_tag)
-            end_index = content.find(end_tag)
-            
-            if start_index != -1 and end_index != -1:
-                criteria_string = content[start_index:end_index].strip()
-                return [criterion.strip() for criterion in criteria_string.split(",")]
-            else:
-                raise ValueError("Criteria not found in the expected format")
+        response = await self._create_chat_completion(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "You extract ranking criteria from job descriptions. Return only a JSON object of the form {\"criteria\": [\"...\"]}."},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,  # Low temperature for more focused and consistent output
+            max_tokens=1000,
+            response_format={"type": "json_object"}
+        )
+        
+        criteria = self._parse_criteria(response.choices[0].message.content)
+        await llm_cache.set(cache_key, criteria)
+        return criteria
+    
+    @staticmethod
+    def _parse_criteria(content: str) -> List[str]:
+        """
+        Read the criteria from an extraction response.
+        
+        Raises:
+            ValueError: If the response is not a JSON object with a list of criteria
+        """
+        data = json.loads(content)
+        criteria = data.get("criteria") if isinstance(data, dict) else None
+        if not isinstance(criteria, list):
+            raise ValueError("Criteria not found in the expected format")
+        return LLMService._merge_criteria([[str(criterion) for criterion in criteria if criterion is not None]])
+    
+    @staticmethod
+    def _merge_criteria(criteria_lists: List[List[str]]) -> List[str]:
+        """Merge lists of criteria in order, dropping blanks and duplicates (see normalize_criterion)."""
+        merged: List[str] = []
+        seen = set()
+        for criteria in criteria_lists:
+            for criterion in criteria:
+                criterion = criterion.strip()
+                key = normalize_criterion(criterion)
+                if key and key not in seen:
+                    seen.add(key)
+                    merged.append(criterion)
+        return merged
+    
+    @staticmethod
+    def _compact_resume(resume_text: str, record_stats: bool = True) -> str:
+        return text_compactor.compact(resume_text, settings.RESUME_TOKEN_BUDGET, record_stats=record_stats)
+    
+    def _score_memo_key(self, resume_text: str, criterion: str) -> str:
+        return llm_cache.make_key("criterion_score", self.model, SCORING_PROMPT_VERSION, resume_text, [criterion])
+    
+    def _name_memo_key(self, resume_text: str) -> str:
+        return llm_cache.make_key("candidate_name", self.model, COMBINED_SCORING_PROMPT_VERSION, resume_text)
+    
+    async def _get_memoized_scores(self, resume_text: str, criteria: List[str],
+                                   with_justification: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up the scores a resume already received for individual criteria.
+        
+        Scores are memoized per (resume text, normalized criterion), whichever scoring call
+        produced them, so reordering the criteria or changing one of them only requires
+        scoring the criteria that are new. Only the combined scoring call asks for
+        justifications; its entries are marked "justified".
+        
+        Args:
+            resume_text: The compacted text content of the resume
+            criteria: List of criteria to look up
+            with_justification: Treat entries without a justification as missing
             
-        except Exception as e:
-            raise Exception(f"Error extracting criteria from job description: {str(e)}")
-    async def score_resume_against_criteria(self, resume_text: str, criteria: List[str]) -> Dict[str, int]:
+        Returns:
+            Dict[str, Dict[str, Any]]: Criterion -> "score" and "justification", for memoized criteria only
+        """
+        entries = await llm_cache.get_many([self._score_memo_key(resume_text, criterion) for criterion in criteria])
+        return {criterion: entry for criterion, entry in zip(criteria, entries)
+                if entry is not None and (entry.get("justified") or not with_justification)}
+    
+    async def _memoize_scores(self, resume_text: str, results: Dict[str, Dict[str, Any]], justified: bool) -> None:
+        await llm_cache.set_many({self._score_memo_key(resume_text, criterion): {**entry, "justified": justified}
+                                  for criterion, entry in results.items()})
+    
+    @staticmethod
+    def _format_criteria(criteria: List[str]) -> str:
+        return "\n".join([f"- {criterion_id}: {criterion}" for criterion_id, criterion in criterion_ids(criteria).items()])
+    
+    @metrics.timed("llm_scoring")
+    async def score_resume_against_criteria(self, resume_text: str, criteria: List[str],
+                                            use_cache: bool = True) -> Dict[str, int]:
         """
         Score a resume against the provided criteria using LLM.
         
+        Only criteria without a memoized score are sent to the LLM.
+        
         Args:
             resume_text: The text content of the resume
             criteria: List of criteria to score against
+            use_cache: Whether memoized scores may be used (fresh scores are always memoized)
             
         Returns:
             Dict[str, int]: Dictionary mapping each criterion to a score (0-5)
         """
-        # Format criteria for the prompt
-        criteria_text = "\n".join([f"- {criterion}" for criterion in criteria])
+        resume_text = self._compact_resume(resume_text)
+        results = await self._get_memoized_scores(resume_text, criteria) if use_cache else {}
+        missing = [criterion for criterion in criteria if criterion not in results]
+        if not missing:
+            return self._split_results(results, criteria)[0]
         
         prompt = f"""
         You are an expert HR assistant tasked with scoring resumes against specific criteria.
@@ -112,25 +347,25 @@ class LLMService:
         Please analyze the following resume and score it against each criterion on a scale of 0-5,
         where 0 means "not mentioned or not relevant" and 5 means "exceeds expectations".
         
-        Criteria:
-        {criteria_text}
+        Criteria (ID: criterion):
+        {self._format_criteria(missing)}
         
         Resume:
         {resume_text}
         
         For each criterion, provide a score (0-5) and a brief justification.
-        Return the results in JSON format with the criterion as the key and the score as the value.
+        Return the results in JSON format with the criterion ID (e.g. "C1") as the key and the score as the value.
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = await self._create_chat_completion(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": "You score resumes against criteria. Return only a JSON object mapping each criterion to a score from 0-5."},
+                    {"role": "system", "content": "You score resumes against criteria. Return only a JSON object mapping each criterion ID to a score from 0-5."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,  # Low temperature for more consistent scoring
-                max_tokens=1000,
+                max_tokens=SCORING_MAX_TOKENS,
                 response_format={"type": "json_object"}
             )
             
@@ -138,30 +373,320 @@ class LLMService:
             content = response.choices[0].message.content
             data = json.loads(content)
             
-            # Ensure we have scores for all criteria
-            scores = {}
-            for criterion in criteria:
-                # Find the matching criterion in the response
-                # This handles slight variations in formatting
-                matching_key = next((k for k in data.keys() if criterion.lower() in k.lower()), None)
-                
-                if matching_key:
-                    # Get the score, ensuring it's an integer from 0-5
-                    raw_score = data[matching_key]
-                    if isinstance(raw_score, dict) and "score" in raw_score:
-                        # Handle if the LLM returns objects with score property
-                        score = min(5, max(0, int(raw_score["score"])))
-                    else:
-                        # Handle if the LLM returns direct score values
-                        score = min(5, max(0, int(raw_score)))
-                    scores[criterion] = score
-                else:
-                    # Default to 0 if no match found
-                    scores[criterion] = 0
-                    
-            return scores
+            fresh = self._parse_scores(data, missing)
+            await self._memoize_scores(resume_text, fresh, justified=False)
+            results.update(fresh)
+            return self._split_results(results, criteria)[0]
             
         except Exception as e:
             raise Exception(f"Error scoring resume against criteria: {str(e)}")
+    
+    @metrics.timed("llm_scoring")
+    async def score_resume_with_name(self, resume_text: str, criteria: List[str],
+                                     use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Extract the candidate name and score a resume against the criteria in a single LLM call.
+        
+        Only criteria without a memoized, justified score are sent to the LLM; no call is
+        made if the name and every score are already memoized.
+        
+        Args:
+            resume_text: The text content of the resume
+            criteria: List of criteria to score against
+            use_cache: Whether memoized results may be used (fresh results are always memoized)
+            
+        Returns:
+            Dict[str, Any]: "candidate_name", "scores" (criterion -> 0-5) and
+            "justifications" (criterion -> text)
+        """
+        resume_text = self._compact_resume(resume_text)
+        results = await self._get_memoized_scores(resume_text, criteria, with_justification=True) if use_cache else {}
+        candidate_name = await llm_cache.get(self._name_memo_key(resume_text)) if use_cache else None
+        missing = [criterion for criterion in criteria if criterion not in results]
+        
+        if missing or candidate_name is None:
+            # A call is needed for the name alone; score every criterion in it then
+            to_score = missing or criteria
+            
+            prompt = f"""
+            You are an expert HR assistant tasked with scoring resumes against specific criteria.
+            
+            Please analyze the following resume. First identify the candidate's full name.
+            Then score the resume against each criterion on a scale of 0-5,
+            where 0 means "not mentioned or not relevant" and 5 means "exceeds expectations".
+            
+            Criteria (ID: criterion):
+            {self._format_criteria(to_score)}
+            
+            Resume:
+            {resume_text}
+            
+            Return a JSON object of the form:
+            {{"candidate_name": "<full name>", "scores": {{"<criterion ID>": {{"score": <0-5>, "justification": "<brief justification>"}}}}}}
+            Use each criterion ID (e.g. "C1") exactly as written above as a key in "scores".
+            If you can't find a name, use "Unnamed Candidate".
+            """
+            
+            try:
+                response = await self._create_chat_completion(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": "You extract the candidate name from a resume and score it against criteria. Return only a JSON object with candidate_name and scores."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.1,  # Low temperature for more consistent scoring
+                    max_tokens=SCORING_MAX_TOKENS,
+                    response_format={"type": "json_object"}
+                )
+                
+                # Parse the response
+                content = response.choices[0].message.content
+                data = json.loads(content)
+                if not isinstance(data.get("scores"), dict):
+                    raise ValueError("Scores not found in the expected format")
+                
+                candidate_name = str(data.get("candidate_name") or "").strip() or "Unnamed Candidate"
+                fresh = self._parse_scores(data["scores"], to_score)
+                
+            except Exception as e:
+                raise Exception(f"Error scoring resume with name extraction: {str(e)}")
+            
+            await llm_cache.set(self._name_memo_key(resume_text), candidate_name)
+            await self._memoize_scores(resume_text, fresh, justified=True)
+            results.update(fresh)
+        
+        scores, justifications = self._split_results(results, criteria)
+        return {"candidate_name": candidate_name, "scores": scores, "justifications": justifications}
+    
+    @staticmethod
+    def _format_batch_resume(resume_id: str, resume_text: str) -> str:
+        return f'<resume id="{resume_id}">\n{resume_text}\n</resume>'
+    
+    @staticmethod
+    def _build_batch_prompt(resume_blocks: List[str], criteria: List[str]) -> str:
+        criteria_text = LLMService._format_criteria(criteria)
+        resumes_text = "\n\n".join(resume_blocks)
+        return f"""
+        You are an expert HR assistant tasked with scoring resumes against specific criteria.
+        
+        Below are several resumes, each wrapped in <resume id="..."></resume> tags.
+        Evaluate every resume independently. For each one, identify the candidate's full name and
+        score it against each criterion on a scale of 0-5, where 0 means "not mentioned or not relevant"
+        and 5 means "exceeds expectations".
+        
+        Criteria (ID: criterion):
+        {criteria_text}
+        
+        Resumes:
+        {resumes_text}
+        
+        Return a JSON object of the form:
+        {{"results": {{"<resume id>": {{"candidate_name": "<full name>", "scores": {{"<criterion ID>": <0-5>}}}}}}}}
+        Include every resume ID exactly once and use each criterion ID (e.g. "C1") exactly as written above as a key in "scores".
+        If you can't find a name, use "Unnamed Candidate".
+        """
+    
+    @staticmethod
+    def _batch_output_tokens(num_resumes: int, criteria: List[str]) -> int:
+        return num_resumes * (BATCH_OUTPUT_TOKENS_PER_RESUME + BATCH_OUTPUT_TOKENS_PER_CRITERION * len(criteria))
+    
+    def pack_resume_batches(self, resume_texts: List[str], criteria: List[str]) -> List[List[int]]:
+        """
+        Group resumes into batches that fit the batched scoring token budget.
+        
+        Resumes are packed greedily in order. A batch is closed once adding the next resume
+        would exceed settings.BATCH_SCORING_TOKEN_BUDGET, settings.BATCH_SCORING_MAX_RESUMES or,
+        together with the expected output, settings.LLM_CONTEXT_WINDOW. A resume that does not
+        fit on its own ends up in a batch of one.
+        
+        Args:
+            resume_texts: Text of every resume
+            criteria: List of criteria to score against
+            
+        Returns:
+            List[List[int]]: Batches of indexes into resume_texts
+        """
+        overhead = (estimate_tokens(BATCH_SCORING_SYSTEM_PROMPT)
+                    + estimate_tokens(self._build_batch_prompt([], criteria)))
+        prompt_limit = min(settings.BATCH_SCORING_TOKEN_BUDGET, settings.LLM_CONTEXT_WINDOW)
+        
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = overhead
+        for index, resume_text in enumerate(resume_texts):
+            resume_text = self._compact_resume(resume_text, record_stats=False)
+            tokens = estimate_tokens(self._format_batch_resume(f"R{index}", resume_text))
+            size = len(current) + 1
+            fits = (
+                size <= settings.BATCH_SCORING_MAX_RESUMES
+                and current_tokens + tokens <= prompt_limit
+                and current_tokens + tokens + self._batch_output_tokens(size, criteria) <= settings.LLM_CONTEXT_WINDOW
+            )
+            if current and not fits:
+                batches.append(current)
+                current, current_tokens = [], overhead
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    def pack_criteria_sets(self, criteria_sets: List[List[str]]) -> List[List[int]]:
+        """
+        Group criteria sets whose criteria can be scored together in one prompt per resume.
+        
+        Sets are added first-fit, in order, to the first group whose combined criteria
+        (criteria shared between sets counted once) still fit the completion budget of a
+        single-resume scoring call. A set that does not fit on its own is a group of one.
+        
+        Args:
+            criteria_sets: Criteria of every set, e.g. of every role of a multi-job request
+            
+        Returns:
+            List[List[int]]: Groups of indexes into criteria_sets
+        """
+        max_criteria = max(1, (SCORING_MAX_TOKENS - BATCH_OUTPUT_TOKENS_PER_RESUME)
+                           // SCORING_OUTPUT_TOKENS_PER_CRITERION)
+        groups: List[Tuple[List[int], Set[str]]] = []
+        for index, criteria in enumerate(criteria_sets):
+            keys = {normalize_criterion(criterion) for criterion in criteria}
+            group = next((group for group in groups if len(group[1] | keys) <= max_criteria), None)
+            if group is None:
+                groups.append(([index], keys))
+            else:
+                group[0].append(index)
+                group[1].update(keys)
+        return [indexes for indexes, _ in groups]
+    
+    @metrics.timed("llm_scoring")
+    async def score_resumes_batch(self, resumes: Dict[str, str], criteria: List[str],
+                                  use_cache: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Extract names and score several resumes against the criteria in a single LLM call.
+        
+        Memoized names and scores (shared with score_resume_with_name) are reused: resumes with
+        everything memoized are not sent again, and the call only covers criteria that some
+        remaining resume is missing. Resumes whose part of the response is missing or malformed
+        are left out of the result, so the caller can retry them individually.
+        
+        Args:
+            resumes: Mapping of stable resume ID to resume text
+            criteria: List of criteria to score against
+            use_cache: Whether memoized results may be used (fresh results are always memoized)
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: Resume ID -> "candidate_name" and "scores" (criterion -> 0-5)
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        memoized: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        pending = {}
+        for resume_id, resume_text in resumes.items():
+            resume_text = self._compact_resume(resume_text)
+            memo = await self._get_memoized_scores(resume_text, criteria) if use_cache else {}
+            candidate_name = await llm_cache.get(self._name_memo_key(resume_text)) if use_cache else None
+            if candidate_name is not None and all(criterion in memo for criterion in criteria):
+                results[resume_id] = {
+                    "candidate_name": candidate_name,
+                    "scores": self._split_results(memo, criteria)[0],
+                }
+            else:
+                memoized[resume_id] = memo
+                pending[resume_id] = resume_text
+        if not pending:
+            return results
+        
+        # Criteria still missing for any pending resume, in request order
+        to_score = [c for c in criteria if any(c not in memoized[resume_id] for resume_id in pending)] or criteria
+        
+        resume_blocks = [self._format_batch_resume(resume_id, text) for resume_id, text in pending.items()]
+        prompt = self._build_batch_prompt(resume_blocks, to_score)
+        
+        try:
+            response = await self._create_chat_completion(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": BATCH_SCORING_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,  # Low temperature for more consistent scoring
+                max_tokens=self._batch_output_tokens(len(pending), to_score) + 200,
+                response_format={"type": "json_object"}
+            )
+            
+            content = response.choices[0].message.content
+            data = json.loads(content).get("results")
+            if not isinstance(data, dict):
+                raise ValueError("Results not found in the expected format")
+        except Exception as e:
+            raise Exception(f"Error scoring resume batch: {str(e)}")
+        
+        for resume_id, resume_text in pending.items():
+            entry = data.get(resume_id)
+            try:
+                if not isinstance(entry, dict) or not isinstance(entry.get("scores"), dict):
+                    raise ValueError("missing or malformed result")
+                fresh = self._parse_scores(entry["scores"], to_score)
+            except (TypeError, ValueError) as e:
+                print(f"Malformed batched result for resume {resume_id}: {str(e)}")
+                continue
+            candidate_name = str(entry.get("candidate_name") or "").strip() or "Unnamed Candidate"
+            
+            await llm_cache.set(self._name_memo_key(resume_text), candidate_name)
+            await self._memoize_scores(resume_text, fresh, justified=False)
+            merged = {**memoized[resume_id], **fresh}
+            results[resume_id] = {"candidate_name": candidate_name, "scores": self._split_results(merged, criteria)[0]}
+        
+        return results
+    
+    @staticmethod
+    def _parse_scores(data: Dict[str, Any], criteria: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Map an LLM scoring response onto the requested criteria.
+        
+        Entries are matched by the exact criterion ID from the prompt (see criterion_ids),
+        or by the exact criterion text if the model echoed it instead.
+        
+        Args:
+            data: JSON object returned by the LLM, keyed by criterion ID
+            criteria: List of criteria that were scored, in prompt order
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: Criterion -> "score" (0-5) and "justification",
+            for the criteria present in the response
+        """
+        results = {}
+        for criterion_id, criterion in criterion_ids(criteria).items():
+            raw_score = data.get(criterion_id, data.get(criterion))
+            if raw_score is None:
+                continue
+            
+            # Get the score, ensuring it's an integer from 0-5
+            if isinstance(raw_score, dict) and "score" in raw_score:
+                # Handle if the LLM returns objects with score property
+                score = min(5, max(0, int(raw_score["score"])))
+                justification = str(raw_score.get("justification", ""))
+            else:
+                # Handle if the LLM returns direct score values
+                score = min(5, max(0, int(raw_score)))
+                justification = ""
+            results[criterion] = {"score": score, "justification": justification}
+        
+        return results
+    
+    @staticmethod
+    def _split_results(results: Dict[str, Dict[str, Any]],
+                       criteria: List[str]) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        Split parsed or memoized results into scores and justifications per criterion.
+        
+        Criteria without a result default to a score of 0.
+        """
+        scores = {}
+        justifications = {}
+        for criterion in criteria:
+            entry = results.get(criterion, {"score": 0, "justification": ""})
+            scores[criterion] = entry["score"]
+            justifications[criterion] = entry["justification"]
+        return scores, justifications
 
 llm_service = LLMService()
\ No newline at end of file
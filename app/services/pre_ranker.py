@@ -0,0 +1,116 @@
+import re
+import zlib
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+
+class PreRanker:
+    """
+    Cheap local relevance scoring used to shortlist resumes before LLM scoring.
+
+    Resumes and criteria are turned into TF-IDF weighted, hashed unigram and bigram
+    vectors with NumPy. A resume's pre-screen score is its mean cosine similarity to
+    the criteria, scaled to 0-100. NumPy is imported on first use, since pre-ranking is
+    optional.
+    """
+
+    @staticmethod
+    def _features(text: str, dim: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Hash the unigrams and bigrams of a text into feature indexes.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Unique feature indexes and their counts
+        """
+        import numpy as np
+
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        grams = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+        if not grams:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        # crc32 is stable across processes, unlike hash()
+        hashed = np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams),
+                             dtype=np.int64, count=len(grams)) % dim
+        indexes, counts = np.unique(hashed, return_counts=True)
+        return indexes, counts.astype(np.float32)
+
+    @staticmethod
+    def score(resume_texts: List[str], criteria: List[str]) -> "np.ndarray":
+        """
+        Compute pre-screen scores for resumes against the criteria.
+
+        Args:
+            resume_texts: Text of every resume
+            criteria: List of criteria
+
+        Returns:
+            np.ndarray: Score from 0 to 100 per resume
+        """
+        import numpy as np
+
+        dim = settings.PRE_RANK_HASH_DIM
+        resume_features = [PreRanker._features(text, dim) for text in resume_texts]
+        criteria_features = [PreRanker._features(criterion, dim) for criterion in criteria]
+
+        # Smoothed inverse document frequency over resumes and criteria together
+        document_frequency = np.zeros(dim, dtype=np.float32)
+        for indexes, _ in resume_features + criteria_features:
+            document_frequency[indexes] += 1
+        num_documents = len(resume_features) + len(criteria_features)
+        idf = np.log((1 + num_documents) / (1 + document_frequency)) + 1
+
+        def weights(indexes: "np.ndarray", counts: "np.ndarray") -> "np.ndarray":
+            # Sublinear term frequency, L2-normalized
+            values = (1 + np.log(counts)) * idf[indexes]
+            norm = np.linalg.norm(values)
+            return values / norm if norm else values
+
+        # Criteria are few, so they are kept dense; resumes stay sparse
+        criteria_matrix = np.zeros((len(criteria), dim), dtype=np.float32)
+        for row, (indexes, counts) in enumerate(criteria_features):
+            criteria_matrix[row, indexes] = weights(indexes, counts)
+
+        scores = np.zeros(len(resume_texts), dtype=np.float32)
+        for position, (indexes, counts) in enumerate(resume_features):
+            if len(indexes) and len(criteria):
+                similarities = criteria_matrix[:, indexes] @ weights(indexes, counts)
+                scores[position] = similarities.mean()
+        return np.round(scores * 100, 1)
+
+    @staticmethod
+    def shortlist(scores: "np.ndarray", top_k: Optional[int] = None,
+                  threshold: Optional[float] = None) -> List[bool]:
+        """
+        Select which resumes go on to LLM scoring.
+
+        A resume is selected if it is among the top_k pre-screen scores or scores at
+        least threshold. With neither limit, every resume is selected.
+
+        Args:
+            scores: Pre-screen score per resume
+            top_k: Number of best-scoring resumes to keep
+            threshold: Minimum pre-screen score (0-100) to keep a resume
+
+        Returns:
+            List[bool]: Whether each resume was selected
+        """
+        import numpy as np
+
+        if top_k is None and threshold is None:
+            return [True] * len(scores)
+
+        selected = np.zeros(len(scores), dtype=bool)
+        if top_k is not None:
+            # Stable sort, so ties keep upload order
+            selected[np.argsort(-scores, kind="stable")[:top_k]] = True
+        if threshold is not None:
+            selected |= scores >= threshold
+        return selected.tolist()
+
+pre_ranker = PreRanker()
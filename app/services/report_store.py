@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from itertools import groupby
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.utils.excel_generator import Sheet, excel_generator
+
+# Formats a report can be downloaded in, with their media types
+REPORT_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "json": "application/json",
+}
+REPORT_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+CANONICAL_EXTENSION = "jsonl"
+
+
+class ReportStore:
+    """
+    Storage for generated reports.
+
+    Each report is written once in a canonical JSON Lines file under
+    settings.UPLOAD_DIR/reports: a "report" record, then for every sheet a "sheet"
+    record with its columns followed by one "row" record per row. Downloadable formats
+    (xlsx, csv, json) are rendered from it on first request and kept next to it. A
+    janitor deletes reports older than settings.REPORT_TTL_SECONDS and, above
+    settings.REPORTS_MAX_BYTES, the least recently downloaded files first.
+    """
+
+    def __init__(self):
+        """Initialize the store."""
+        self._janitor_task: Optional[asyncio.Task] = None
+
+    @property
+    def reports_dir(self) -> str:
+        return os.path.join(settings.UPLOAD_DIR, "reports")
+
+    def path(self, report_id: str, extension: str) -> str:
+        """Get the path of a report file in the given format (or CANONICAL_EXTENSION)."""
+        return os.path.join(self.reports_dir, f"{report_id}.{extension}")
+
+    @staticmethod
+    def _atomic_write_path(path: str) -> str:
+        return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+
+    def save_report(self, sheets: List[Tuple[str, List[str], Iterable[Dict[str, Any]]]]) -> str:
+        """
+        Store a report in canonical form.
+
+        Args:
+            sheets: (sheet name, columns, rows) per sheet; rows are dicts keyed by column
+
+        Returns:
+            str: ID of the new report
+        """
+        report_id = f"resume_ranking_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        os.makedirs(self.reports_dir, exist_ok=True)
+        path = self.path(report_id, CANONICAL_EXTENSION)
+        temp_path = self._atomic_write_path(path)
+        with open(temp_path, "w", encoding="utf-8") as report_file:
+            report_file.write(json.dumps({"type": "report", "id": report_id, "created_at": time.time()}) + "\n")
+            for sheet_name, columns, rows in sheets:
+                report_file.write(json.dumps({"type": "sheet", "name": sheet_name, "columns": columns}) + "\n")
+                for row in rows:
+                    values = [row.get(column) for column in columns]
+                    report_file.write(json.dumps({"type": "row", "values": values}) + "\n")
+        os.replace(temp_path, path)
+        return report_id
+
+    def iter_sheets(self, report_id: str) -> Iterator[Sheet]:
+        """
+        Read a stored report sheet by sheet without loading it into memory.
+
+        Raises:
+            FileNotFoundError: If the report does not exist
+        """
+        with open(self.path(report_id, CANONICAL_EXTENSION), encoding="utf-8") as report_file:
+            records = (json.loads(line) for line in report_file if line.strip())
+            sheet: Optional[Dict[str, Any]] = None
+            for is_row, group in groupby(records, key=lambda record: record["type"] == "row"):
+                if is_row:
+                    yield sheet["name"], sheet["columns"], (record["values"] for record in group)
+                    sheet = None
+                    continue
+                for record in group:
+                    if record["type"] != "sheet":
+                        continue
+                    if sheet is not None:
+                        # The previous sheet has no rows
+                        yield sheet["name"], sheet["columns"], iter(())
+                    sheet = record
+            if sheet is not None:
+                yield sheet["name"], sheet["columns"], iter(())
+
+    def _write_json(self, path: str, report_id: str) -> None:
+        with open(path, "w", encoding="utf-8") as json_file:
+            json_file.write(f'{{"report_id": {json.dumps(report_id)}, "sheets": [')
+            for sheet_number, (sheet_name, columns, rows) in enumerate(self.iter_sheets(report_id)):
+                if sheet_number:
+                    json_file.write(", ")
+                json_file.write(f'{{"name": {json.dumps(sheet_name)}, "columns": {json.dumps(columns)}, "rows": [')
+                for row_number, values in enumerate(rows):
+                    if row_number:
+                        json_file.write(", ")
+                    json_file.write(json.dumps(dict(zip(columns, values))))
+                json_file.write("]}")
+            json_file.write("]}")
+
+    def render(self, report_id: str, report_format: str) -> str:
+        """
+        Get a report in a downloadable format, rendering it if it was not requested before.
+
+        Args:
+            report_id: ID of the report
+            report_format: One of REPORT_FORMATS
+
+        Returns:
+            str: Path of the rendered file
+
+        Raises:
+            ValueError: If the format is not supported
+            FileNotFoundError: If the report does not exist
+        """
+        if report_format not in REPORT_FORMATS:
+            raise ValueError(f"Unsupported report format: {report_format}")
+        path = self.path(report_id, report_format)
+        if os.path.exists(path):
+            # Mark the artifact as recently used for the janitor
+            os.utime(path)
+            return path
+        if not os.path.exists(self.path(report_id, CANONICAL_EXTENSION)):
+            raise FileNotFoundError(f"Report not found: {report_id}")
+
+        # Render to a temporary file first, so concurrent downloads never see a partial file
+        temp_path = self._atomic_write_path(path)
+        try:
+            with metrics.stage("report_rendering"):
+                if report_format == "xlsx":
+                    excel_generator.write_xlsx(temp_path, self.iter_sheets(report_id))
+                elif report_format == "csv":
+                    # CSV holds a single table: the first sheet
+                    sheets = self.iter_sheets(report_id)
+                    try:
+                        _, columns, rows = next(sheets)
+                        excel_generator.write_csv(temp_path, columns, rows)
+                    finally:
+                        sheets.close()
+                else:
+                    self._write_json(temp_path, report_id)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return path
+
+    def cleanup(self) -> int:
+        """
+        Delete expired reports, then the least recently used files above the size limit.
+
+        Rendered files are evicted before canonical reports, since they can be rendered again.
+
+        Returns:
+            int: Number of files deleted
+        """
+        if not os.path.isdir(self.reports_dir):
+            return 0
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.reports_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                files.append((entry.path, stat.st_mtime, stat.st_size))
+
+        deleted = set()
+
+        def delete(path: str) -> None:
+            try:
+                os.remove(path)
+                deleted.add(path)
+            except FileNotFoundError:
+                pass
+
+        # A report expires with its canonical file; files without one expire by their own age
+        created = {
+            os.path.basename(path).split(".")[0]: mtime
+            for path, mtime, _ in files if path.endswith(f".{CANONICAL_EXTENSION}")
+        }
+        for path, mtime, _ in files:
+            if now - created.get(os.path.basename(path).split(".")[0], mtime) > settings.REPORT_TTL_SECONDS:
+                delete(path)
+
+        remaining = [(path, mtime, size) for path, mtime, size in files if path not in deleted]
+        total_size = sum(size for _, _, size in remaining)
+        if total_size > settings.REPORTS_MAX_BYTES:
+            # Rendered files first, then canonical reports, oldest first within each group
+            remaining.sort(key=lambda item: (item[0].endswith(f".{CANONICAL_EXTENSION}"), item[1]))
+            for path, _, size in remaining:
+                if total_size <= settings.REPORTS_MAX_BYTES:
+                    break
+                delete(path)
+                total_size -= size
+        return len(deleted)
+
+    async def _run_janitor(self) -> None:
+        while True:
+            try:
+                deleted = await asyncio.get_running_loop().run_in_executor(None, self.cleanup)
+                if deleted:
+                    print(f"Report janitor deleted {deleted} files")
+            except Exception as e:
+                print(f"Error cleaning up reports: {str(e)}")
+            await asyncio.sleep(settings.REPORT_JANITOR_INTERVAL_SECONDS)
+
+    def start_janitor(self) -> None:
+        """Start deleting old reports periodically in the background."""
+        if self._janitor_task is None:
+            self._janitor_task = asyncio.create_task(self._run_janitor())
+
+    async def stop_janitor(self) -> None:
+        """Stop the background janitor."""
+        if self._janitor_task is not None:
+            self._janitor_task.cancel()
+            try:
+                await self._janitor_task
+            except asyncio.CancelledError:
+                pass
+            self._janitor_task = None
+
+report_store = ReportStore()
@@ -1,60 +1,716 @@
+import asyncio
+import bisect
 import os
-from typing import Dict, List, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 
-import pandas as pd
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
 
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.candidate_store import candidate_store
 from app.services.document_processor import document_processor
+from app.services.duplicate_detector import duplicate_detector
 from app.services.llm_service import llm_service
-from app.utils.excel_generator import excel_generator
+from app.services.pre_ranker import pre_ranker
+from app.services.report_store import report_store
+from app.utils.criteria import normalize_criterion
+from app.utils.excel_generator import OPTIONAL_COLUMNS, SHEET_NAME, excel_generator
+
+
+# Callbacks invoked as each resume finishes: (index in files, report row) or (index, error)
+ResultCallback = Callable[[int, Dict], Awaitable[None]]
+ErrorCallback = Callable[[int, Exception], Awaitable[None]]
+
+# Values of the "Stage" report column when pre-ranking is used
+LLM_STAGE = "LLM"
+PRE_SCREEN_STAGE = "Pre-screen"
+
+
+class _ProgressReporter:
+    """Routes per-resume outcomes to the optional result and error callbacks."""
+
+    def __init__(self, on_result: Optional[ResultCallback], on_error: Optional[ErrorCallback]):
+        self.on_result = on_result
+        self.on_error = on_error
+
+    async def run(self, index: int, row_coro: Awaitable[Dict]) -> Optional[Dict]:
+        """Await a report row, reporting it or its error. Without on_error, errors propagate."""
+        try:
+            row = await row_coro
+        except Exception as e:
+            await self.fail(index, e)
+            return None
+        if self.on_result is not None:
+            await self.on_result(index, row)
+        return row
+
+    async def fail(self, index: int, error: Exception) -> None:
+        if self.on_error is None:
+            raise error
+        await self.on_error(index, error)
 
 
 class ResumeScorer:
     """Service for scoring resumes against criteria."""
-    
+
     @staticmethod
-    async def score_resumes(criteria: List[str], files: List[UploadFile]) -> str:
+    async def score_resumes(criteria: List[str], files: List[UploadFile], use_cache: bool = True,
+                            pre_rank_top_k: Optional[int] = None) -> str:
         """
         Score multiple resumes against provided criteria.
-        
+
         Args:
             criteria: List of criteria to score against
             files: List of resume files to evaluate
-            
+            use_cache: Whether cached LLM responses may be used
+            pre_rank_top_k: Only send this many best pre-ranked resumes to the LLM
+                (overrides settings.PRE_RANK_TOP_K and enables pre-ranking)
+
         Returns:
             str: Path to the generated Excel/CSV file
         """
-        # Process each resume and collect scores
-        results = []
-        
-        for resume_file in files:
-            # Extract text from resume
-            resume_text = await document_processor.extract_text_from_file(resume_file)
-            
-            # Try to extract candidate name
-            candidate_name = await document_processor.get_candidate_name_from_resume(resume_text)
-            
-            # Score the resume against criteria
-            scores = await llm_service.score_resume_against_criteria(resume_text, criteria)
-            
-            # Calculate total score
-            total_score = sum(scores.values())
-            
-            # Add to results
-            result = {
-                "Candidate Name": candidate_name,
-                **scores,
-                "Total Score": total_score
+        results = await ResumeScorer.score_rows(criteria, files, use_cache, pre_rank_top_k=pre_rank_top_k)
+        return ResumeScorer.generate_report(results, criteria)
+
+    @staticmethod
+    async def score_multi_job(jobs: List[Tuple[str, List[str]]], files: List[UploadFile],
+                              use_cache: bool = True) -> str:
+        """
+        Score one pool of resumes against the criteria of several roles.
+
+        Every resume is read, parsed, deduplicated and stored once. Criteria that several
+        roles share (ignoring case, whitespace and punctuation) are scored once per resume,
+        and with settings.MULTI_JOB_COMBINED_SCORING the criteria of as many roles as fit
+        the scoring budget (see LLMService.pack_criteria_sets) are scored in the same
+        prompt. The report has one sheet per role; resumes that could not be scored are
+        logged and left out of it.
+
+        Args:
+            jobs: (role name, criteria) per role
+            files: List of resume files to evaluate
+            use_cache: Whether cached LLM responses may be used
+
+        Returns:
+            str: Path to the generated Excel file
+        """
+        # The first wording of each criterion is the one sent to the LLM
+        canonical: Dict[str, str] = {}
+        for _, criteria in jobs:
+            for criterion in criteria:
+                canonical.setdefault(normalize_criterion(criterion), criterion)
+        role_criteria = [[canonical[normalize_criterion(criterion)] for criterion in criteria]
+                         for _, criteria in jobs]
+
+        if settings.MULTI_JOB_COMBINED_SCORING:
+            groups = llm_service.pack_criteria_sets(role_criteria)
+        else:
+            groups = [[role] for role in range(len(jobs))]
+
+        criteria_groups = [list(dict.fromkeys(criterion for role in group for criterion in role_criteria[role]))
+                           for group in groups]
+        all_criteria = list(dict.fromkeys(criterion for group in criteria_groups for criterion in group))
+
+        async def on_error(index: int, error: Exception) -> None:
+            print(f"Error scoring resume {files[index].filename}: {str(error)}")
+
+        semaphore = asyncio.Semaphore(max(1, settings.SCORING_CONCURRENCY))
+        reporter = _ProgressReporter(None, on_error)
+        rows = await ResumeScorer._score_extracted(all_criteria, files, semaphore, reporter, use_cache,
+                                                   criteria_groups=criteria_groups)
+
+        sheet_names = excel_generator.get_sheet_names([name for name, _ in jobs])
+        sheets = []
+        for role, (_, criteria) in enumerate(jobs):
+            role_rows = [ResumeScorer._role_row(row, criteria, role_criteria[role]) if row is not None else None
+                         for row in rows]
+            sheets.append(ResumeScorer._build_sheet(sheet_names[role], role_rows, criteria))
+        with metrics.stage("report_writing"):
+            report_id = report_store.save_report(sheets)
+        return report_store.path(report_id, "xlsx")
+
+    @staticmethod
+    def _role_row(row: Dict, criteria: List[str], scored_criteria: List[str]) -> Dict:
+        """Build a role's report row from a row scored on the criteria of every role."""
+        role_row = ResumeScorer._build_row(
+            row["Candidate Name"],
+            {criterion: row[scored] for criterion, scored in zip(criteria, scored_criteria)})
+        if "Duplicate Of" in row:
+            role_row["Duplicate Of"] = row["Duplicate Of"]
+        return role_row
+
+    @staticmethod
+    async def score_rows(criteria: List[str], files: List[UploadFile], use_cache: bool = True,
+                         on_result: Optional[ResultCallback] = None,
+                         on_error: Optional[ErrorCallback] = None,
+                         pre_rank_top_k: Optional[int] = None) -> List[Optional[Dict]]:
+        """
+        Score resumes and return one report row per file, without writing a report.
+
+        Resumes are processed concurrently, bounded by settings.SCORING_CONCURRENCY.
+        With settings.BATCH_SCORING_ENABLED, several resumes share one LLM request.
+        With pre-ranking (settings.PRE_RANK_ENABLED or pre_rank_top_k), only the resumes
+        shortlisted by a local similarity score are sent to the LLM; the others get a
+        pre-screen row. With settings.DEDUP_ENABLED, near-duplicates of another resume in
+        the upload or of a stored candidate reuse its scores instead of being sent to the
+        LLM, and are flagged in the "Duplicate Of" column. Rows are returned in the order
+        of the uploaded files.
+
+        Args:
+            criteria: List of criteria to score against
+            files: List of resume files to evaluate
+            use_cache: Whether cached LLM responses may be used
+            on_result: Awaited with (index, row) as soon as each resume is scored
+            on_error: Awaited with (index, error) when a resume fails; its row is then None.
+                Without it, the first failure is raised.
+            pre_rank_top_k: Only send this many best pre-ranked resumes to the LLM
+                (overrides settings.PRE_RANK_TOP_K and enables pre-ranking)
+
+        Returns:
+            List[Optional[Dict]]: Report rows in upload order
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.SCORING_CONCURRENCY))
+        reporter = _ProgressReporter(on_result, on_error)
+
+        async def score_with_limit(resume_file: UploadFile) -> Dict:
+            async with semaphore:
+                return await ResumeScorer._score_resume(criteria, resume_file, use_cache)
+
+        pre_rank = ((settings.PRE_RANK_ENABLED or pre_rank_top_k is not None)
+                    and len(files) > settings.PRE_RANK_MIN_POOL)
+        if pre_rank_top_k is None:
+            pre_rank_top_k = settings.PRE_RANK_TOP_K
+
+        if pre_rank or settings.DEDUP_ENABLED or (settings.BATCH_SCORING_ENABLED and len(files) > 1):
+            return await ResumeScorer._score_extracted(
+                criteria, files, semaphore, reporter, use_cache, pre_rank, pre_rank_top_k)
+
+        # Process all resumes concurrently; gather preserves the input order
+        return await asyncio.gather(*(
+            reporter.run(index, score_with_limit(f)) for index, f in enumerate(files)
+        ))
+
+    @staticmethod
+    async def stream_scores(criteria: List[str], files: List[UploadFile], use_cache: bool = True,
+                            pre_rank_top_k: Optional[int] = None) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Score resumes and yield each result as soon as it is available.
+
+        Yields ("result", data) for every scored resume, with its current rank among the
+        resumes scored so far, ("error", data) for every resume that failed, and finally
+        ("complete", data) with the leaderboard and the path of the generated report.
+
+        Args:
+            criteria: List of criteria to score against
+            files: List of resume files to evaluate
+            use_cache: Whether cached LLM responses may be used
+            pre_rank_top_k: Only send this many best pre-ranked resumes to the LLM
+
+        Yields:
+            Tuple[str, Dict[str, Any]]: Event name and payload
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def on_result(index: int, row: Dict) -> None:
+            await queue.put(("result", index, row))
+
+        async def on_error(index: int, error: Exception) -> None:
+            await queue.put(("error", index, error))
+
+        task = asyncio.create_task(
+            ResumeScorer.score_rows(criteria, files, use_cache, on_result=on_result, on_error=on_error,
+                                    pre_rank_top_k=pre_rank_top_k))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+
+        # Negated totals of the resumes scored so far, kept sorted to rank new results
+        scored_totals: List[int] = []
+        try:
+            while (item := await queue.get()) is not None:
+                kind, index, payload = item
+                if kind == "result":
+                    rank = bisect.bisect_left(scored_totals, -payload["Total Score"]) + 1
+                    bisect.insort(scored_totals, -payload["Total Score"])
+                    yield "result", {
+                        "index": index,
+                        "filename": files[index].filename,
+                        "rank": rank,
+                        "result": ResumeScorer.to_score_response(payload, criteria),
+                    }
+                else:
+                    yield "error", {"index": index, "filename": files[index].filename, "detail": str(payload)}
+
+            results = await task
+            output_path = ResumeScorer.generate_report(results, criteria)
+            leaderboard = sorted((row for row in results if row is not None),
+                                 key=ResumeScorer._rank_key, reverse=True)
+            yield "complete", {
+                "scored": len(leaderboard),
+                "failed": sum(1 for row in results if row is None),
+                "leaderboard": [ResumeScorer.to_score_response(row, criteria)
+                                for row in leaderboard[:settings.STREAM_LEADERBOARD_SIZE]],
+                "output_path": output_path,
             }
-            
-            results.append(result)
-        
-        # Sort results by total score (descending)
-        sorted_results = sorted(results, key=lambda x: x["Total Score"], reverse=True)
-        
-        # Generate Excel/CSV report
-        output_path = excel_generator.generate_report(sorted_results, criteria)
-        
-        return output_path
-
-resume_scorer = ResumeScorer()
\ No newline at end of file
+        finally:
+            if not task.done():
+                task.cancel()
+
+    @staticmethod
+    def to_score_response(row: Dict, criteria: List[str]) -> Dict[str, Any]:
+        """Convert a report row to the fields of ResumeScoreResponse."""
+        response = {
+            "candidate_name": row["Candidate Name"],
+            # Pre-screened resumes have no LLM scores
+            "scores": {criterion: row[criterion] for criterion in criteria if row.get(criterion) is not None},
+            "total_score": row["Total Score"],
+        }
+        if "Pre-Screen Score" in row:
+            response["pre_screen_score"] = row["Pre-Screen Score"]
+        if "Duplicate Of" in row:
+            response["duplicate_of"] = row["Duplicate Of"]
+        return response
+
+    @staticmethod
+    def _rank_key(row: Dict) -> Tuple[bool, int, float]:
+        """Sort key ranking LLM-scored resumes above pre-screened ones, then by total score."""
+        return row.get("Stage") != PRE_SCREEN_STAGE, row["Total Score"], row.get("Pre-Screen Score") or 0.0
+
+    @staticmethod
+    def generate_report(results: List[Optional[Dict]], criteria: List[str]) -> str:
+        """
+        Sort report rows and store the report.
+
+        The report is stored once in canonical form; the Excel file whose path is returned
+        is rendered when it is first downloaded.
+
+        Args:
+            results: Report rows in upload order; None entries (failed resumes) are skipped
+            criteria: List of criteria used for scoring
+
+        Returns:
+            str: Path to the Excel report
+        """
+        sheet = ResumeScorer._build_sheet(SHEET_NAME, results, criteria)
+        with metrics.stage("report_writing"):
+            report_id = report_store.save_report([sheet])
+        return report_store.path(report_id, "xlsx")
+
+    @staticmethod
+    def _build_sheet(sheet_name: str, results: List[Optional[Dict]],
+                     criteria: List[str]) -> Tuple[str, List[str], List[Dict]]:
+        """Sort report rows and get the columns of a report sheet."""
+        # Sort results by total score (descending); sorting is stable so ties keep upload order
+        with metrics.stage("sorting"):
+            sorted_results = sorted((row for row in results if row is not None),
+                                    key=ResumeScorer._rank_key, reverse=True)
+
+        optional_columns = [column for column in OPTIONAL_COLUMNS if any(column in row for row in sorted_results)]
+        return sheet_name, excel_generator.get_columns(criteria, optional_columns), sorted_results
+
+    @staticmethod
+    async def _score_resume(criteria: List[str], resume_file: UploadFile, use_cache: bool = True) -> Dict:
+        """
+        Extract, name and score a single resume.
+
+        Args:
+            criteria: List of criteria to score against
+            resume_file: Resume file to evaluate
+            use_cache: Whether cached LLM responses may be used
+
+        Returns:
+            Dict: Report row for the resume
+        """
+        # Extract text from resume
+        candidate_id, resume_text = await ResumeScorer._extract(resume_file)
+
+        candidate_name, scores = await ResumeScorer._name_and_score(resume_text, criteria, use_cache)
+        await ResumeScorer._remember(candidate_id, resume_file.filename, resume_text, candidate_name, scores)
+
+        return ResumeScorer._build_row(candidate_name, scores)
+
+    @staticmethod
+    async def rank_candidates(criteria: List[str], candidate_ids: Optional[List[str]] = None,
+                              use_cache: bool = True) -> str:
+        """
+        Rank stored candidates against criteria without uploading their resumes again.
+
+        Scores already stored for a candidate and criterion are reused; only the criteria
+        a candidate has never been scored on are sent to the LLM.
+
+        Args:
+            criteria: List of criteria to score against
+            candidate_ids: IDs of the stored candidates to rank; all candidates if None
+            use_cache: Whether cached LLM responses may be used
+
+        Returns:
+            str: Path to the generated Excel/CSV file
+
+        Raises:
+            ValueError: If no candidates are found or some candidate IDs are unknown
+        """
+        candidates = await run_in_threadpool(candidate_store.get_candidates, candidate_ids)
+        if candidate_ids is not None and len(candidates) < len(set(candidate_ids)):
+            found = {candidate["id"] for candidate in candidates}
+            unknown = [candidate_id for candidate_id in candidate_ids if candidate_id not in found]
+            raise ValueError(f"Unknown candidate IDs: {', '.join(unknown)}")
+        if not candidates:
+            raise ValueError("No stored candidates to rank")
+
+        stored_scores = await run_in_threadpool(
+            candidate_store.get_scores, [candidate["id"] for candidate in candidates], criteria, llm_service.model)
+        semaphore = asyncio.Semaphore(max(1, settings.SCORING_CONCURRENCY))
+
+        async def rank_one(candidate: Dict[str, Any]) -> Dict:
+            scores = stored_scores[candidate["id"]]
+            missing = [criterion for criterion in criteria if criterion not in scores]
+            candidate_name = candidate["candidate_name"]
+
+            if missing or not candidate_name:
+                async with semaphore:
+                    if candidate_name:
+                        new_scores = await llm_service.score_resume_against_criteria(
+                            candidate["text"], missing, use_cache=use_cache)
+                    else:
+                        candidate_name, new_scores = await ResumeScorer._name_and_score(
+                            candidate["text"], missing or criteria, use_cache)
+                await ResumeScorer._remember(candidate["id"], candidate["filename"], candidate["text"],
+                                             candidate_name, new_scores)
+                scores = {**scores, **new_scores}
+
+            return ResumeScorer._build_row(candidate_name, {criterion: scores[criterion] for criterion in criteria})
+
+        results = await asyncio.gather(*(rank_one(candidate) for candidate in candidates))
+        return ResumeScorer.generate_report(results, criteria)
+
+    @staticmethod
+    async def _extract(resume_file: UploadFile) -> Tuple[str, str]:
+        """
+        Extract the text of a resume.
+
+        Returns:
+            Tuple[str, str]: Candidate ID (content hash) and extracted text
+        """
+        with metrics.stage("upload_read"):
+            content = await resume_file.read()
+        resume_text = await document_processor.extract_text_from_bytes(content, resume_file.filename)
+        return candidate_store.make_id(content), resume_text
+
+    @staticmethod
+    async def _extract_all(files: List[UploadFile],
+                           semaphore: asyncio.Semaphore) -> List[Union[Tuple[str, str], Exception]]:
+        """
+        Extract the text of every resume concurrently.
+
+        Returns:
+            List[Union[Tuple[str, str], Exception]]: Candidate ID and text, or the error
+            raised, per file
+        """
+        async def extract_with_limit(resume_file: UploadFile) -> Tuple[str, str]:
+            async with semaphore:
+                return await ResumeScorer._extract(resume_file)
+
+        return await asyncio.gather(*(extract_with_limit(f) for f in files), return_exceptions=True)
+
+    @staticmethod
+    async def _remember(candidate_id: str, filename: str, resume_text: str,
+                        candidate_name: Optional[str] = None, scores: Optional[Dict[str, int]] = None,
+                        signature: Optional[bytes] = None) -> None:
+        """Add a resume, its scores and its MinHash signature to the candidate store, off the event loop."""
+        try:
+            band_hashes = duplicate_detector.band_hashes(signature) if signature else None
+            await run_in_threadpool(candidate_store.save_candidate, candidate_id, filename, resume_text,
+                                    candidate_name, scores, llm_service.model, signature, band_hashes)
+        except Exception as e:
+            # The store is an optimization; never fail scoring because of it
+            print(f"Error saving candidate {filename}: {str(e)}")
+
+    @staticmethod
+    def _find_stored_duplicates(candidate_ids: Dict[int, str], signatures: Dict[int, bytes],
+                                criteria: List[str]) -> Dict[int, Tuple[Dict[str, Any], Dict[str, int]]]:
+        """
+        Find stored candidates that resumes nearly duplicate and that have all the scores needed.
+
+        The band hashes of all the resumes are looked up in one query and the scores of all
+        the matches in another. Blocking; run it off the event loop.
+
+        Args:
+            candidate_ids: Candidate ID per resume index
+            signatures: MinHash signature per resume index (the resumes to look up)
+            criteria: Criteria the stored candidate must have been scored on
+
+        Returns:
+            Dict[int, Tuple[Dict[str, Any], Dict[str, int]]]: Resume index -> the stored
+            candidate and its scores per criterion, for the resumes with a match
+        """
+        band_hashes = {index: duplicate_detector.band_hashes(signature) for index, signature in signatures.items()}
+        try:
+            stored = candidate_store.find_by_bands(
+                band_hash for hashes in band_hashes.values() for band_hash in hashes)
+            by_band: Dict[int, List[Dict[str, Any]]] = {}
+            for match in stored:
+                for band_hash in match["band_hashes"]:
+                    by_band.setdefault(band_hash, []).append(match)
+
+            matches: Dict[int, List[Dict[str, Any]]] = {}
+            for index, signature in signatures.items():
+                seen = set()
+                for band_hash in band_hashes[index]:
+                    for match in by_band.get(band_hash, ()):
+                        if match["id"] in seen:
+                            continue
+                        seen.add(match["id"])
+                        # A resume with the same bytes is the same candidate, and is served by the caches
+                        if (match["id"] != candidate_ids[index] and match["candidate_name"]
+                                and duplicate_detector.similarity(signature, match["signature"])
+                                >= settings.DEDUP_THRESHOLD):
+                            matches.setdefault(index, []).append(match)
+            if not matches:
+                return {}
+            stored_scores = candidate_store.get_scores(
+                {match["id"] for found in matches.values() for match in found}, criteria, llm_service.model)
+        except Exception as e:
+            # The store is an optimization; score the resumes instead
+            print(f"Error looking up stored duplicates: {str(e)}")
+            return {}
+
+        duplicates = {}
+        for index, found in matches.items():
+            # Prefer the earliest stored candidate, as the in-upload deduplication does
+            for match in sorted(found, key=lambda match: (match["created_at"], match["id"])):
+                scores = stored_scores[match["id"]]
+                if all(criterion in scores for criterion in criteria):
+                    duplicates[index] = match, {criterion: scores[criterion] for criterion in criteria}
+                    break
+        return duplicates
+
+    @staticmethod
+    async def _score_extracted(criteria: List[str], files: List[UploadFile], semaphore: asyncio.Semaphore,
+                               reporter: _ProgressReporter, use_cache: bool = True, pre_rank: bool = False,
+                               pre_rank_top_k: Optional[int] = None,
+                               criteria_groups: Optional[List[List[str]]] = None) -> List[Optional[Dict]]:
+        """
+        Score resumes in stages: extract all, deduplicate, optionally pre-rank, then LLM-score.
+
+        With settings.DEDUP_ENABLED, a near-duplicate of an earlier resume in the upload
+        gets a copy of that resume's row once it is scored, and (with use_cache) one of a
+        stored candidate scored on all criteria gets the stored scores. With pre_rank,
+        resumes outside the shortlist get a pre-screen row instead of an LLM call. With
+        settings.BATCH_SCORING_ENABLED, the remaining resumes are packed into
+        token-budgeted batches that are scored concurrently; resumes missing from a batched
+        answer are retried on their own. With criteria_groups, each group of criteria is
+        scored in its own LLM request per resume (or batch), while extraction,
+        deduplication and the candidate store see every criterion at once.
+
+        Args:
+            criteria: List of criteria to score against
+            files: List of resume files to evaluate
+            semaphore: Limits the number of concurrent extractions and LLM requests
+            reporter: Receives each resume's row or error
+            use_cache: Whether cached LLM responses may be used
+            pre_rank: Whether to shortlist resumes with the local pre-ranker
+            pre_rank_top_k: Number of best pre-ranked resumes to keep
+            criteria_groups: Groups of criteria, together covering criteria, that are scored in
+                separate requests; all of criteria in one request if None
+
+        Returns:
+            List[Optional[Dict]]: Report rows in upload order
+        """
+        extracted = await ResumeScorer._extract_all(files, semaphore)
+        criteria_groups = criteria_groups or [criteria]
+
+        rows: List[Optional[Dict]] = [None] * len(files)
+        candidate_ids: Dict[int, str] = {}
+        resume_texts: Dict[int, str] = {}
+        for index, outcome in enumerate(extracted):
+            if isinstance(outcome, Exception):
+                await reporter.fail(index, outcome)
+            else:
+                candidate_ids[index], resume_texts[index] = outcome
+
+        indexes = list(resume_texts)
+        signatures: Dict[int, bytes] = {}
+        # Index of each near-duplicate -> index of the earlier resume it duplicates
+        duplicates: Dict[int, int] = {}
+        if settings.DEDUP_ENABLED and indexes:
+            with metrics.stage("deduplication"):
+                signature_list = await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: [duplicate_detector.signature(resume_texts[index]) for index in indexes])
+                signatures = dict(zip(indexes, signature_list))
+                duplicates = {
+                    indexes[position]: indexes[original] for position, original
+                    in duplicate_detector.find_duplicates(signature_list, settings.DEDUP_THRESHOLD).items()
+                }
+            indexes = [index for index in indexes if index not in duplicates]
+
+            async def stored_duplicate_row(index: int, match: Dict[str, Any], scores: Dict[str, int]) -> Dict:
+                await ResumeScorer._remember(candidate_ids[index], files[index].filename, resume_texts[index],
+                                             match["candidate_name"], scores, signatures[index])
+                return {**ResumeScorer._build_row(match["candidate_name"], scores), "Duplicate Of": match["filename"]}
+
+            if use_cache and indexes:
+                with metrics.stage("deduplication"):
+                    stored_duplicates = await run_in_threadpool(
+                        ResumeScorer._find_stored_duplicates, candidate_ids,
+                        {index: signatures[index] for index in indexes}, criteria)
+                for index, found in stored_duplicates.items():
+                    rows[index] = await reporter.run(index, stored_duplicate_row(index, *found))
+                indexes = [index for index in indexes if index not in stored_duplicates]
+
+        async def duplicate_row(index: int) -> Dict:
+            original = duplicates[index]
+            if rows[original] is None:
+                raise ValueError(f"Near-duplicate of {files[original].filename}, which could not be scored")
+            row = dict(rows[original])
+            if row.get("Stage") == PRE_SCREEN_STAGE:
+                row["Candidate Name"] = files[index].filename
+                await ResumeScorer._remember(candidate_ids[index], files[index].filename, resume_texts[index],
+                                             signature=signatures[index])
+            else:
+                scores = {criterion: row[criterion] for criterion in criteria}
+                await ResumeScorer._remember(candidate_ids[index], files[index].filename, resume_texts[index],
+                                             row["Candidate Name"], scores, signatures[index])
+            row["Duplicate Of"] = files[original].filename
+            return row
+
+        async def finish() -> List[Optional[Dict]]:
+            # Near-duplicates are reported once the resumes they duplicate are scored
+            for index in duplicates:
+                rows[index] = await reporter.run(index, duplicate_row(index))
+            return rows
+
+        pre_screen_scores: Dict[int, float] = {}
+        if pre_rank and indexes:
+            with metrics.stage("pre_ranking"):
+                # Vectorizing the whole pool is CPU-bound, so keep it off the event loop
+                scores = await run_in_threadpool(
+                    pre_ranker.score, [resume_texts[index] for index in indexes], criteria)
+            selected = pre_ranker.shortlist(scores, pre_rank_top_k, settings.PRE_RANK_THRESHOLD)
+            pre_screen_scores = {index: round(float(score), 1) for index, score in zip(indexes, scores)}
+
+            async def pre_screen_row(index: int) -> Dict:
+                # Keep the resume in the candidate store so it can be ranked later
+                await ResumeScorer._remember(candidate_ids[index], files[index].filename, resume_texts[index],
+                                             signature=signatures.get(index))
+                return {
+                    "Candidate Name": files[index].filename,
+                    **{criterion: None for criterion in criteria},
+                    "Total Score": 0,
+                    "Pre-Screen Score": pre_screen_scores[index],
+                    "Stage": PRE_SCREEN_STAGE,
+                }
+
+            for index, keep in zip(indexes, selected):
+                if not keep:
+                    rows[index] = await reporter.run(index, pre_screen_row(index))
+            indexes = [index for index, keep in zip(indexes, selected) if keep]
+
+        async def llm_row(index: int, candidate_name: str, scores: Dict[str, int]) -> Dict:
+            await ResumeScorer._remember(candidate_ids[index], files[index].filename, resume_texts[index],
+                                         candidate_name, scores, signatures.get(index))
+            row = ResumeScorer._build_row(candidate_name, scores)
+            if pre_rank:
+                row.update({"Pre-Screen Score": pre_screen_scores[index], "Stage": LLM_STAGE})
+            return row
+
+        async def score_single(index: int) -> Dict:
+            async def name_and_score(group: List[str]) -> Tuple[str, Dict[str, int]]:
+                async with semaphore:
+                    return await ResumeScorer._name_and_score(resume_texts[index], group, use_cache)
+
+            async def score_only(group: List[str]) -> Dict[str, int]:
+                async with semaphore:
+                    return await llm_service.score_resume_against_criteria(
+                        resume_texts[index], group, use_cache=use_cache)
+
+            # The name comes with the first group's scores
+            (candidate_name, scores), *group_scores = await asyncio.gather(
+                name_and_score(criteria_groups[0]), *(score_only(group) for group in criteria_groups[1:]))
+            for more_scores in group_scores:
+                scores = {**scores, **more_scores}
+            return await llm_row(index, candidate_name, scores)
+
+        async def store_row(index: int, row_coro: Awaitable[Dict]) -> None:
+            rows[index] = await reporter.run(index, row_coro)
+
+        if not settings.BATCH_SCORING_ENABLED:
+            await asyncio.gather(*(store_row(index, score_single(index)) for index in indexes))
+            return await finish()
+
+        async def score_group_batch(batch: List[int], group: List[str]) -> Dict[str, Dict[str, Any]]:
+            async with semaphore:
+                return await llm_service.score_resumes_batch(
+                    {f"R{index}": resume_texts[index] for index in batch}, group, use_cache=use_cache)
+
+        async def score_batch(batch: List[int]) -> None:
+            batch_results = {}
+            if len(batch) > 1:
+                try:
+                    group_results = await asyncio.gather(
+                        *(score_group_batch(batch, group) for group in criteria_groups))
+                    # Resumes missing from any group's answer are retried on their own
+                    batch_results = {
+                        resume_id: {
+                            "candidate_name": result["candidate_name"],
+                            "scores": {criterion: score for results in group_results
+                                       for criterion, score in results[resume_id]["scores"].items()},
+                        }
+                        for resume_id, result in group_results[0].items()
+                        if all(resume_id in results for results in group_results)
+                    }
+                except Exception as e:
+                    print(f"Batched scoring failed, retrying resumes individually: {str(e)}")
+
+            async def row_for(index: int) -> Dict:
+                result = batch_results.get(f"R{index}")
+                if result is None:
+                    return await score_single(index)
+                return await llm_row(index, result["candidate_name"], result["scores"])
+
+            await asyncio.gather(*(store_row(index, row_for(index)) for index in batch))
+
+        batches = llm_service.pack_resume_batches([resume_texts[index] for index in indexes],
+                                                  max(criteria_groups, key=len))
+        await asyncio.gather(*(score_batch([indexes[position] for position in batch]) for batch in batches))
+
+        return await finish()
+
+    @staticmethod
+    def _build_row(candidate_name: str, scores: Dict[str, int]) -> Dict:
+        """Build a report row from a candidate name and criteria scores."""
+        return {
+            "Candidate Name": candidate_name,
+            **scores,
+            "Total Score": sum(scores.values())
+        }
+
+    @staticmethod
+    async def _name_and_score(resume_text: str, criteria: List[str],
+                              use_cache: bool = True) -> Tuple[str, Dict[str, int]]:
+        """
+        Get the candidate name and criteria scores for a resume.
+
+        Uses a single combined LLM call when settings.COMBINED_EXTRACTION_ENABLED is set,
+        falling back to separate name and scoring calls if that call fails.
+
+        Args:
+            resume_text: The extracted text from a resume
+            criteria: List of criteria to score against
+            use_cache: Whether cached LLM responses may be used
+
+        Returns:
+            Tuple[str, Dict[str, int]]: Candidate name and scores per criterion
+        """
+        if settings.COMBINED_EXTRACTION_ENABLED:
+            try:
+                result = await llm_service.score_resume_with_name(resume_text, criteria, use_cache=use_cache)
+                return result["candidate_name"], result["scores"]
+            except Exception as e:
+                print(f"Combined scoring failed, falling back to separate calls: {str(e)}")
+
+        # Name extraction and scoring are independent, so run both LLM calls together
+        candidate_name, scores = await asyncio.gather(
+            document_processor.get_candidate_name_from_resume(resume_text, use_cache=use_cache),
+            llm_service.score_resume_against_criteria(resume_text, criteria, use_cache=use_cache),
+        )
+        return candidate_name, scores
+
+resume_scorer = ResumeScorer()
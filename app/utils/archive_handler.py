@@ -0,0 +1,254 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.utils.file_handler import DOCX_CONTENT_TYPE, PDF_CONTENT_TYPE, SNIFF_BYTES, ZIP_SIGNATURE, FileHandler
+
+# Resume types accepted inside archives, by extension
+MEMBER_CONTENT_TYPES = {".pdf": PDF_CONTENT_TYPE, ".docx": DOCX_CONTENT_TYPE}
+
+# Entries every DOCX package has; a "ZIP archive" containing them is a DOCX document
+DOCX_ENTRIES = {"[Content_Types].xml", "word/document.xml"}
+
+
+def _is_resume(name: str) -> bool:
+    basename = os.path.basename(name)
+    # Skip macOS resource forks and other hidden files
+    if name.startswith("__MACOSX/") or basename.startswith("."):
+        return False
+    return os.path.splitext(basename)[1].lower() in MEMBER_CONTENT_TYPES
+
+
+class _ArchiveReader:
+    """
+    Random access to the members of an uploaded ZIP or tar archive.
+
+    Seeking back in a compressed tar decompresses it again from the start, so the
+    resumes of a compressed tar are copied to a temporary file, in archive order, while
+    the archive is listed.
+    """
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        # Members share the underlying upload, so reads are serialized
+        self.lock = threading.Lock()
+        self.zip_file: Optional[zipfile.ZipFile] = None
+        self.tar_file: Optional[tarfile.TarFile] = None
+        # Deleted once the reader, and so every member of the archive, is released
+        self.spool: Optional[BinaryIO] = None
+        # Offset in the spool of each spooled tar member (names may repeat in a tar)
+        self.spooled: Dict[tarfile.TarInfo, int] = {}
+
+    def open(self) -> None:
+        # Decide by the leading bytes: zipfile.is_zipfile also accepts a tar ending with a DOCX
+        self.file.seek(0)
+        is_zip = self.file.read(len(ZIP_SIGNATURE)) == ZIP_SIGNATURE
+        self.file.seek(0)
+        if is_zip:
+            self.zip_file = zipfile.ZipFile(self.file)
+        else:
+            # Transparently decompresses gzip, bz2 and xz tars
+            self.tar_file = tarfile.open(fileobj=self.file, mode="r:*")
+            if self.tar_file.fileobj is not self.file:
+                self.spool = tempfile.TemporaryFile()
+
+    def is_docx(self) -> bool:
+        return self.zip_file is not None and DOCX_ENTRIES <= set(self.zip_file.namelist())
+
+    def entries(self) -> Iterator[Tuple[str, Any, int, bool]]:
+        """
+        Yield (name, member, size, is resume) for every entry, in archive order.
+
+        Tar archives are scanned in a single forward pass, so compressed tars are
+        decompressed once while listing. Call header for a resume before taking the next
+        entry; the data of a skipped entry is only read (or decompressed) when the next
+        entry is taken.
+        """
+        if self.zip_file is not None:
+            for info in self.zip_file.infolist():
+                if not info.is_dir():
+                    yield info.filename, info, info.file_size, _is_resume(info.filename)
+        else:
+            for member in self.tar_file:
+                yield member.name, member, member.size, member.isfile() and _is_resume(member.name)
+
+    def decompresses_skipped(self) -> bool:
+        """Whether skipped entries are decompressed too, as in a compressed tar."""
+        return self.spool is not None
+
+    def header(self, member: Any) -> bytes:
+        """Read the leading bytes of a member, spooling it first if it is in a compressed tar."""
+        if self.spool is not None:
+            self.spooled[member] = self.spool.seek(0, os.SEEK_END)
+            # The tar stream is at this member, so it is decompressed without seeking back
+            shutil.copyfileobj(self.tar_file.extractfile(member), self.spool)
+            self.spool.seek(self.spooled[member])
+            return self.spool.read(SNIFF_BYTES)
+        if self.zip_file is not None:
+            return self._read_zip(member, SNIFF_BYTES)
+        return self._read_tar(member, SNIFF_BYTES)
+
+    def _read_zip(self, info: zipfile.ZipInfo, size: int = -1) -> bytes:
+        with self.zip_file.open(info) as member_file:
+            return member_file.read(size)
+
+    def _read_tar(self, member: tarfile.TarInfo, size: int = -1) -> bytes:
+        if self.spool is not None:
+            self.spool.seek(self.spooled[member])
+            return self.spool.read(member.size if size < 0 else min(size, member.size))
+        return self.tar_file.extractfile(member).read(size)
+
+    def read(self, member: Any) -> bytes:
+        """Read one member completely."""
+        with self.lock:
+            if self.zip_file is not None:
+                return self._read_zip(member)
+            return self._read_tar(member)
+
+
+class ArchiveMember(UploadFile):
+    """
+    A resume inside an uploaded archive.
+
+    It behaves like an uploaded file, but its content is only decompressed from the
+    archive when it is read.
+    """
+
+    def __init__(self, reader: _ArchiveReader, member: Any, filename: str, size: int, content_type: str):
+        super().__init__(file=io.BytesIO(), size=size, filename=filename,
+                         headers=Headers({"content-type": content_type}))
+        self._reader = reader
+        self._member = member
+        self._loaded = False
+
+    async def read(self, size: int = -1) -> bytes:
+        if not self._loaded:
+            self._loaded = True
+            content = await run_in_threadpool(self._reader.read, self._member)
+            if size < 0:
+                # The pipeline reads each resume once, so whole reads are not kept in memory
+                return content
+            self.file = io.BytesIO(content)
+        return await super().read(size)
+
+
+class ArchiveHandler:
+    """Utility for expanding uploaded resume archives (ZIP or tar) into their resumes."""
+
+    @staticmethod
+    async def expand_archives(files: List[UploadFile]) -> List[UploadFile]:
+        """
+        Replace every uploaded archive by the resumes it contains.
+
+        Args:
+            files: Validated uploads; archives are recognized by their content type
+
+        Returns:
+            List[UploadFile]: Uploaded documents and archive members, in upload and archive order
+
+        Raises:
+            HTTPException: If an archive is invalid, exceeds the limits or has no resumes
+        """
+        expanded: List[UploadFile] = []
+        for file in files:
+            if FileHandler.is_archive(file.content_type):
+                expanded.extend(await run_in_threadpool(ArchiveHandler.open_archive, file))
+            else:
+                expanded.append(file)
+        return expanded
+
+    @staticmethod
+    def open_archive(file: UploadFile) -> List[UploadFile]:
+        """
+        List the resumes in an uploaded archive without extracting it.
+
+        Only .pdf and .docx members are used; other files, directories and hidden files
+        are ignored. The archive may contain at most settings.ARCHIVE_MAX_MEMBERS resumes
+        totalling settings.ARCHIVE_MAX_UNCOMPRESSED_SIZE bytes, each within
+        settings.MAX_FILE_SIZE and starting with the signature of its type. In a compressed
+        tar, the ignored members count towards that total too, since they are decompressed
+        while listing. A ZIP upload that is actually a DOCX document is returned as that
+        document.
+
+        Args:
+            file: Uploaded archive
+
+        Returns:
+            List[UploadFile]: One lazily read member per resume
+
+        Raises:
+            HTTPException: If the archive is invalid, exceeds the limits or has no resumes
+        """
+        reader = _ArchiveReader(file.file)
+        try:
+            reader.open()
+            if reader.is_docx():
+                # Documents are parsed by extension, so name it as a DOCX file
+                file.file.seek(0)
+                filename = f"{os.path.splitext(file.filename or 'resume')[0]}.docx"
+                return [UploadFile(file=file.file, size=file.size, filename=filename,
+                                   headers=Headers({"content-type": DOCX_CONTENT_TYPE}))]
+            members = ArchiveHandler._list_members(file, reader)
+        except (zipfile.BadZipFile, tarfile.TarError, RuntimeError, EOFError, OSError) as e:
+            # RuntimeError: encrypted ZIP members
+            raise HTTPException(status_code=400, detail=f"Invalid archive {file.filename}: {str(e)}")
+
+        if not members:
+            raise HTTPException(status_code=400, detail=f"No PDF or DOCX resumes found in archive {file.filename}")
+        return members
+
+    @staticmethod
+    def _list_members(file: UploadFile, reader: _ArchiveReader) -> List[UploadFile]:
+        """Check the resumes in an opened archive against the limits, stopping at the first violation."""
+        members: List[UploadFile] = []
+        total_size = 0
+        for name, member, size, is_resume in reader.entries():
+            if not is_resume:
+                if reader.decompresses_skipped():
+                    # Moving past the entry decompresses it, so it counts towards the limit
+                    total_size += size
+                    ArchiveHandler._check_total_size(file, total_size)
+                continue
+            content_type = MEMBER_CONTENT_TYPES[os.path.splitext(name)[1].lower()]
+            if len(members) >= settings.ARCHIVE_MAX_MEMBERS:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Too many resumes in archive {file.filename}. "
+                           f"Maximum allowed: {settings.ARCHIVE_MAX_MEMBERS}"
+                )
+            if size > settings.MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"{name} in archive {file.filename} is too large. "
+                           f"Maximum size allowed: {settings.MAX_FILE_SIZE / (1024 * 1024)}MB"
+                )
+            total_size += size
+            ArchiveHandler._check_total_size(file, total_size)
+            if not FileHandler.matches_signature(content_type, reader.header(member)):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{name} in archive {file.filename} is not a valid {os.path.splitext(name)[1]} file"
+                )
+            members.append(ArchiveMember(reader, member, name, size, content_type))
+        return members
+
+    @staticmethod
+    def _check_total_size(file: UploadFile, total_size: int) -> None:
+        if total_size > settings.ARCHIVE_MAX_UNCOMPRESSED_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Archive {file.filename} is too large when uncompressed. "
+                       f"Maximum size allowed: {settings.ARCHIVE_MAX_UNCOMPRESSED_SIZE / (1024 * 1024)}MB"
+            )
+
+archive_handler = ArchiveHandler()
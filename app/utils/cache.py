@@ -0,0 +1,433 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.utils.criteria import normalize_criterion
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache with optional time-to-live."""
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept before evicting the least recently used
+            ttl_seconds: Seconds after which an entry expires (None disables expiry)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, evicting the least recently used entries if needed."""
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    Text cache storing one file per key in a directory.
+
+    Entries expire after ttl_seconds and the least recently used files are removed
+    once the directory grows beyond max_bytes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Directory holding the cache files
+            max_bytes: Maximum total size of the cache files
+            ttl_seconds: Seconds after which an entry expires (None disables expiry)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for key, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            modified_at = os.path.getmtime(path)
+            if self.ttl_seconds is not None and time.time() - modified_at > self.ttl_seconds:
+                self._remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as cache_file:
+                text = cache_file.read()
+            # Touch the file so size-based eviction keeps recently used entries
+            os.utime(path, None)
+            return text
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, text: str) -> None:
+        """Store text under key and evict old entries if the size limit is exceeded."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        data = text.encode("utf-8")
+        # Write to a temporary file first so readers never see a partial entry
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as cache_file:
+            cache_file.write(data)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - previous_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path: str) -> None:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def _scan_size(self) -> int:
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory)
+                   if entry.is_file() and entry.name.endswith(".txt"))
+
+    def _evict(self) -> None:
+        """Remove expired entries, then the least recently used ones until under max_bytes."""
+        entries = [entry for entry in os.scandir(self.directory)
+                   if entry.is_file() and entry.name.endswith(".txt")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        now = time.time()
+        size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            expired = self.ttl_seconds is not None and now - entry.stat().st_mtime > self.ttl_seconds
+            if not expired and size <= self.max_bytes:
+                break
+            try:
+                os.remove(entry.path)
+                size -= entry.stat().st_size
+            except FileNotFoundError:
+                continue
+        self._size = size
+
+
+class SQLiteCache:
+    """
+    Persistent key/value cache backed by a local SQLite file.
+
+    Values are stored as JSON. Entries expire after ttl_seconds and the least recently
+    used entries are removed once the table grows beyond max_entries.
+    """
+
+    # Eviction is checked every this many writes to keep inserts cheap
+    EVICTION_INTERVAL = 100
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the cache and create the table if needed.
+
+        Args:
+            path: Path of the SQLite database file
+            max_entries: Maximum number of entries kept
+            ttl_seconds: Seconds after which an entry expires (None disables expiry)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds is not None and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under key."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            self._writes += 1
+            if self._writes % self.EVICTION_INTERVAL == 0:
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            self._conn.execute("DELETE FROM cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            "SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class TextExtractionCache:
+    """
+    Content-addressed cache for text extracted from documents.
+
+    Entries are keyed by a SHA-256 hash of the file bytes, with an in-memory LRU tier
+    in front of an optional on-disk tier under settings.UPLOAD_DIR.
+    """
+
+    def __init__(self):
+        """Initialize the cache tiers from settings."""
+        self.enabled = settings.TEXT_CACHE_ENABLED
+        self.memory = LRUCache(settings.TEXT_CACHE_MAX_ENTRIES, settings.TEXT_CACHE_TTL_SECONDS)
+        self.disk = None
+        if settings.TEXT_CACHE_DISK_ENABLED:
+            self.disk = DiskCache(
+                os.path.join(settings.UPLOAD_DIR, "cache", "text"),
+                settings.TEXT_CACHE_DISK_MAX_BYTES,
+                settings.TEXT_CACHE_TTL_SECONDS,
+            )
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(content: bytes, file_ext: str) -> str:
+        """
+        Build the cache key for a document.
+
+        Args:
+            content: Raw file bytes
+            file_ext: Lower-cased file extension, so the same bytes parsed differently never collide
+
+        Returns:
+            str: Cache key
+        """
+        return f"{hashlib.sha256(content).hexdigest()}{file_ext}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached text for key, checking memory before disk."""
+        if not self.enabled:
+            return None
+        text = self.memory.get(key)
+        if text is not None:
+            self.memory_hits += 1
+            return text
+        if self.disk is not None:
+            text = self.disk.get(key)
+            if text is not None:
+                self.disk_hits += 1
+                self.memory.set(key, text)
+                return text
+        self.misses += 1
+        return None
+
+    def set(self, key: str, text: str) -> None:
+        """Store extracted text in every enabled tier."""
+        if not self.enabled:
+            return
+        self.memory.set(key, text)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, text)
+            except OSError as e:
+                print(f"Error writing text cache entry: {str(e)}")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current in-memory size."""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+        }
+
+class LLMResponseCache:
+    """
+    Cache for parsed LLM responses.
+
+    Keys combine the request kind, model name, prompt version, normalized input text
+    and the criteria set, so a change to any of them results in a fresh LLM call.
+    The backend is selected by settings.LLM_CACHE_BACKEND ("memory" or "sqlite").
+    """
+
+    def __init__(self):
+        """Initialize the configured backend."""
+        self.enabled = settings.LLM_CACHE_ENABLED
+        self._backend = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        """Backend instance, created on first use so the SQLite file is only opened when needed."""
+        if self._backend is None:
+            if settings.LLM_CACHE_BACKEND == "sqlite":
+                path = settings.LLM_CACHE_SQLITE_PATH or os.path.join(
+                    settings.UPLOAD_DIR, "cache", "llm_cache.sqlite3")
+                self._backend = SQLiteCache(path, settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_TTL_SECONDS)
+            elif settings.LLM_CACHE_BACKEND == "memory":
+                self._backend = LRUCache(settings.LLM_CACHE_MAX_ENTRIES, settings.LLM_CACHE_TTL_SECONDS)
+            else:
+                raise ValueError(f"Unsupported LLM cache backend: {settings.LLM_CACHE_BACKEND}")
+        return self._backend
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """Collapse whitespace so formatting-only differences share a cache entry."""
+        return re.sub(r"\s+", " ", text).strip()
+
+    @staticmethod
+    def make_key(kind: str, model: str, prompt_version: str, text: str,
+                 criteria: Optional[Iterable[str]] = None) -> str:
+        """
+        Build the cache key for an LLM request.
+
+        Args:
+            kind: Request type, e.g. "score" or "criteria"
+            model: Model name
+            prompt_version: Version of the prompt template
+            text: Input text sent to the model
+            criteria: Criteria the response depends on, if any (order, case, whitespace and punctuation do not matter)
+
+        Returns:
+            str: Cache key
+        """
+        payload = json.dumps({
+            "kind": kind,
+            "model": model,
+            "prompt_version": prompt_version,
+            "text": LLMResponseCache.normalize_text(text),
+            "criteria": sorted(normalize_criterion(c) for c in criteria) if criteria else None,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def _offload(self, function, *args):
+        # SQLite reads and writes block, so they run in the threadpool, off the event loop
+        if settings.LLM_CACHE_BACKEND == "sqlite":
+            return await run_in_threadpool(function, *args)
+        return function(*args)
+
+    def _read(self, keys: List[str]) -> List[Optional[Any]]:
+        values = []
+        for key in keys:
+            try:
+                value = self.backend.get(key)
+            except sqlite3.Error as e:
+                print(f"Error reading LLM cache entry: {str(e)}")
+                value = None
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            values.append(value)
+        return values
+
+    def _write(self, entries: Dict[str, Any]) -> None:
+        for key, value in entries.items():
+            try:
+                self.backend.set(key, value)
+            except sqlite3.Error as e:
+                print(f"Error writing LLM cache entry: {str(e)}")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached response for key, or None on a miss."""
+        return (await self.get_many([key]))[0]
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """Return the cached response for each key, None for each miss, in one backend round trip."""
+        if not self.enabled:
+            return [None] * len(keys)
+        return await self._offload(self._read, keys)
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable response under key."""
+        await self.set_many({key: value})
+
+    async def set_many(self, entries: Dict[str, Any]) -> None:
+        """Store JSON-serializable responses by key, in one backend round trip."""
+        if not self.enabled or not entries:
+            return
+        await self._offload(self._write, entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters."""
+        return {"hits": self.hits, "misses": self.misses}
+
+text_cache = TextExtractionCache()
+llm_cache = LLMResponseCache()
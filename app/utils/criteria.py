@@ -0,0 +1,34 @@
+import re
+import unicodedata
+from typing import Dict, List
+
+# Keep "+" and "#" so that e.g. "C++" and "C#" stay distinct from "C"
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s+#]")
+
+
+def normalize_criterion(criterion: str) -> str:
+    """
+    Normalize a criterion so that case, whitespace and punctuation differences are ignored.
+
+    Args:
+        criterion: Criterion as written by the user or extracted from a job description
+
+    Returns:
+        str: Normalized criterion, e.g. "5+ years of python" for "5+ Years of  Python."
+    """
+    text = unicodedata.normalize("NFKC", criterion).casefold()
+    text = PUNCTUATION_PATTERN.sub(" ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def criterion_ids(criteria: List[str]) -> Dict[str, str]:
+    """
+    Assign a short, exact ID to each criterion for use in LLM prompts and responses.
+
+    Args:
+        criteria: List of criteria in prompt order
+
+    Returns:
+        Dict[str, str]: ID ("C1", "C2", ...) -> criterion
+    """
+    return {f"C{position}": criterion for position, criterion in enumerate(criteria, start=1)}
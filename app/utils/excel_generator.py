@@ -1,63 +1,118 @@
-import os
-from datetime import datetime
-from typing import Dict, List
+import csv
+import re
+from typing import Any, Iterable, List, Tuple
 
-import pandas as pd
+# Columns appended after "Total Score" when present in the data
+OPTIONAL_COLUMNS = ["Pre-Screen Score", "Stage", "Duplicate Of"]
 
-from app.core.config import settings
+SHEET_NAME = "Resume Rankings"
+COLUMN_WIDTH = 20
+
+# Excel sheet names are at most 31 characters long and cannot contain these characters
+MAX_SHEET_NAME_LENGTH = 31
+INVALID_SHEET_NAME_PATTERN = re.compile(r"[\[\]:*?/\\]")
+
+# (sheet name, columns, rows of values in column order)
+Sheet = Tuple[str, List[str], Iterable[List[Any]]]
 
 
 class ExcelGenerator:
     """Service for generating Excel/CSV reports."""
-    
+
     @staticmethod
-    def generate_report(data: List[Dict], criteria: List[str]) -> str:
+    def get_columns(criteria: List[str], optional_columns: Iterable[str] = ()) -> List[str]:
         """
-        Generate an Excel/CSV report from resume scoring data.
-        
+        Get the report columns in order.
+
         Args:
-            data: List of dictionaries containing scoring data
             criteria: List of criteria used for scoring
-            
+            optional_columns: Optional columns present in the data
+
+        Returns:
+            List[str]: Column names
+        """
+        optional_columns = set(optional_columns)
+        return (["Candidate Name"] + criteria + ["Total Score"]
+                + [column for column in OPTIONAL_COLUMNS if column in optional_columns])
+
+    @staticmethod
+    def get_sheet_names(names: List[str]) -> List[str]:
+        """
+        Turn names, such as the roles of a multi-job report, into valid Excel sheet names.
+
+        Invalid characters are replaced, long names are shortened and names that are
+        equal ignoring case get a numbered suffix.
+
+        Args:
+            names: Requested sheet names, in order
+
         Returns:
-            str: Path to the generated file
-        """
-        # Create a DataFrame from the data
-        df = pd.DataFrame(data)
-        
-        # Ensure proper column order
-        columns = ["Candidate Name"] + criteria + ["Total Score"]
-        df = df[columns]
-        
-        # Generate timestamp for filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"resume_ranking_{timestamp}"
-        
-        # Create directory for reports if it doesn't exist
-        reports_dir = os.path.join(settings.UPLOAD_DIR, "reports")
-        os.makedirs(reports_dir, exist_ok=True)
-        
-        # Generate both Excel and CSV files
-        excel_path = os.path.join(reports_dir, f"{filename}.xlsx")
-        csv_path = os.path.join(reports_dir, f"{filename}.csv")
-        
-        # Write to Excel with formatting
-        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name="Resume Rankings")
-            
-            # Access the workbook and the worksheet
-            workbook = writer.book
-            worksheet = writer.sheets["Resume Rankings"]
-            
-            # Apply some basic formatting
-            for col_num, column in enumerate(df.columns):
-                # Set column width
-                worksheet.column_dimensions[chr(65 + col_num)].width = 20
-                
-        # Write to CSV as well
-        df.to_csv(csv_path, index=False)
-        
-        # Return the Excel file path
-        return excel_path
-
-excel_generator = ExcelGenerator()
\ No newline at end of file
+            List[str]: Unique sheet names, in the same order
+        """
+        sheet_names: List[str] = []
+        used = set()
+        for name in names:
+            base = re.sub(r"\s+", " ", INVALID_SHEET_NAME_PATTERN.sub(" ", name)).strip(" '") or SHEET_NAME
+            sheet_name = base[:MAX_SHEET_NAME_LENGTH].rstrip()
+            number = 2
+            while sheet_name.casefold() in used:
+                suffix = f" ({number})"
+                sheet_name = base[:MAX_SHEET_NAME_LENGTH - len(suffix)].rstrip() + suffix
+                number += 1
+            used.add(sheet_name.casefold())
+            sheet_names.append(sheet_name)
+        return sheet_names
+
+    @staticmethod
+    def write_xlsx(path: str, sheets: Iterable[Sheet]) -> None:
+        """
+        Write an Excel workbook.
+
+        Rows are streamed to a write-only workbook, so memory use does not grow with the
+        number of rows.
+
+        Args:
+            path: Path of the .xlsx file to write
+            sheets: Sheets to write, in order
+        """
+        # openpyxl is slow to import and only needed for Excel downloads
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+        from openpyxl.utils import get_column_letter
+
+        workbook = Workbook(write_only=True)
+        for sheet_name, columns, rows in sheets:
+            worksheet = workbook.create_sheet(sheet_name)
+            # Column widths must be set before the first row is written
+            for col_num in range(1, len(columns) + 1):
+                worksheet.column_dimensions[get_column_letter(col_num)].width = COLUMN_WIDTH
+
+            header = []
+            for column in columns:
+                cell = WriteOnlyCell(worksheet, value=column)
+                cell.font = Font(bold=True)
+                header.append(cell)
+            worksheet.append(header)
+
+            for values in rows:
+                worksheet.append(values)
+        workbook.save(path)
+
+    @staticmethod
+    def write_csv(path: str, columns: List[str], rows: Iterable[List[Any]]) -> None:
+        """
+        Write a CSV file, one row at a time.
+
+        Args:
+            path: Path of the .csv file to write
+            columns: Column names
+            rows: Rows of values in column order
+        """
+        with open(path, "w", newline="", encoding="utf-8") as csv_file:
+            csv_writer = csv.writer(csv_file)
+            csv_writer.writerow(columns)
+            for values in rows:
+                csv_writer.writerow(["" if value is None else value for value in values])
+
+excel_generator = ExcelGenerator()
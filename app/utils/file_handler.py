@@ -1,64 +1,150 @@
+import io
 import os
 from pathlib import Path
-from typing import List
+from typing import Callable, Dict, List, Optional
 
 from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
 
+PDF_CONTENT_TYPE = "application/pdf"
+DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Leading bytes of the supported formats; DOCX files are ZIP containers
+PDF_SIGNATURE = b"%PDF-"
+ZIP_SIGNATURE = b"PK\x03\x04"
+GZIP_SIGNATURE = b"\x1f\x8b"
+TAR_SIGNATURE = b"ustar"
+TAR_SIGNATURE_OFFSET = 257
+# PDF readers accept the header anywhere in the first 1024 bytes
+SNIFF_BYTES = 1024
+
+# Checks of the leading bytes per content type
+CONTENT_SIGNATURES: Dict[str, Callable[[bytes], bool]] = {
+    PDF_CONTENT_TYPE: lambda header: PDF_SIGNATURE in header[:SNIFF_BYTES],
+    DOCX_CONTENT_TYPE: lambda header: header.startswith(ZIP_SIGNATURE),
+    "application/zip": lambda header: header.startswith(ZIP_SIGNATURE),
+    "application/x-zip-compressed": lambda header: header.startswith(ZIP_SIGNATURE),
+    "application/x-tar": lambda header: (
+        header[TAR_SIGNATURE_OFFSET:TAR_SIGNATURE_OFFSET + len(TAR_SIGNATURE)] == TAR_SIGNATURE),
+    "application/gzip": lambda header: header.startswith(GZIP_SIGNATURE),
+    "application/x-gzip": lambda header: header.startswith(GZIP_SIGNATURE),
+}
+
 
 class FileHandler:
     """Utility for handling file uploads and validation."""
     
     @staticmethod
-    def validate_file_type(file: UploadFile) -> None:
+    def matches_signature(content_type: str, header: bytes) -> bool:
         """
-        Validate that the uploaded file has an allowed content type.
+        Check that the leading bytes of a file match its content type.
         
         Args:
-            file: The uploaded file to validate
+            content_type: One of CONTENT_SIGNATURES
+            header: Up to SNIFF_BYTES leading bytes of the file
+            
+        Returns:
+            bool: Whether the content looks like the given type
+        """
+        signature_check = CONTENT_SIGNATURES.get(content_type)
+        return signature_check is not None and signature_check(header)
+    
+    @staticmethod
+    def is_archive(content_type: Optional[str]) -> bool:
+        """Whether a content type is one of settings.SUPPORTED_ARCHIVE_TYPES."""
+        return content_type in settings.SUPPORTED_ARCHIVE_TYPES
+    
+    @staticmethod
+    def check_content_type(declared_type: Optional[str], header: Optional[bytes] = None,
+                           allow_archives: bool = False) -> None:
+        """
+        Check a declared content type and, if given, that the leading bytes match it.
+        
+        Args:
+            declared_type: Content type sent by the client
+            header: Leading bytes of the file
+            allow_archives: Whether resume archives (settings.SUPPORTED_ARCHIVE_TYPES) are accepted
             
         Raises:
-            HTTPException: If the file type is not supported
+            HTTPException: If the type is not supported or the content does not match it
         """
-        if file.content_type not in settings.SUPPORTED_FILE_TYPES:
-            allowed_extensions = ", ".join([".pdf", ".docx"])
+        supported_types = settings.SUPPORTED_FILE_TYPES
+        allowed_extensions = [".pdf", ".docx"]
+        if allow_archives:
+            supported_types = supported_types + settings.SUPPORTED_ARCHIVE_TYPES
+            allowed_extensions += [".zip", ".tar", ".tar.gz"]
+        if declared_type not in supported_types:
             raise HTTPException(
                 status_code=400,
-                detail=f"Unsupported file type: {file.content_type}. Allowed types: {allowed_extensions}"
+                detail=f"Unsupported file type: {declared_type}. Allowed types: {', '.join(allowed_extensions)}"
+            )
+        if header is not None and not FileHandler.matches_signature(declared_type, header):
+            raise HTTPException(
+                status_code=400,
+                detail=f"File content does not match its declared type: {declared_type}"
             )
     
+    @staticmethod
+    def file_too_large(max_size: Optional[int] = None) -> HTTPException:
+        """Error for a file larger than max_size (default settings.MAX_FILE_SIZE)."""
+        max_size_mb = (max_size or settings.MAX_FILE_SIZE) / (1024 * 1024)
+        return HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size allowed: {max_size_mb}MB"
+        )
+    
+    @staticmethod
+    def validate_file_type(file: UploadFile, allow_archives: bool = False) -> None:
+        """
+        Validate that the uploaded file has an allowed content type and matching content.
+        
+        Args:
+            file: The uploaded file to validate
+            allow_archives: Whether resume archives are accepted
+        
+        Raises:
+            HTTPException: If the file type is not supported or the content does not match it
+        """
+        file.file.seek(0)
+        header = file.file.read(SNIFF_BYTES)
+        file.file.seek(0)  # Reset file pointer
+        FileHandler.check_content_type(file.content_type, header, allow_archives)
+    
     @staticmethod
     def validate_file_size(file: UploadFile) -> None:
         """
         Validate that the uploaded file does not exceed the maximum file size.
         
+        HTTP uploads are already limited while they are received (see
+        UploadLimitMiddleware); this covers files that did not pass through it.
+        
         Args:
             file: The uploaded file to validate
-            
+        
         Raises:
             HTTPException: If the file is too large
         """
-        # This is an approximation, as we can't easily get the file size without reading it
-        # In a production environment, you might want to use a different approach
         file.file.seek(0, os.SEEK_END)
         file_size = file.file.tell()
         file.file.seek(0)  # Reset file pointer
         
-        if file_size > settings.MAX_FILE_SIZE:
-            max_size_mb = settings.MAX_FILE_SIZE / (1024 * 1024)
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size allowed: {max_size_mb}MB"
-            )
+        max_size = settings.MAX_ARCHIVE_SIZE if FileHandler.is_archive(file.content_type) else settings.MAX_FILE_SIZE
+        if file_size > max_size:
+            raise FileHandler.file_too_large(max_size)
     
     @staticmethod
-    def validate_files(files: List[UploadFile]) -> None:
+    def validate_files(files: List[UploadFile], allow_archives: bool = False) -> None:
         """
         Validate a list of uploaded files.
         
         Args:
             files: List of uploaded files to validate
+            allow_archives: Whether resume archives are accepted
             
         Raises:
             HTTPException: If any validation fails
@@ -70,9 +156,30 @@ class FileHandler:
             )
             
         for file in files:
-            FileHandler.validate_file_type(file)
+            FileHandler.validate_file_type(file, allow_archives)
             FileHandler.validate_file_size(file)
     
+    @staticmethod
+    def detach_uploads(files: List[UploadFile]) -> List[UploadFile]:
+        """
+        Take uploaded files over so they stay open after the request handler returns.
+        
+        FastAPI closes the uploads of a form as soon as the handler returns, which is before
+        a streamed response is sent. The returned uploads share the original files, which
+        are swapped for empty ones in the form; the caller must close them.
+        
+        Args:
+            files: Uploads of the request form
+            
+        Returns:
+            List[UploadFile]: Uploads owned by the caller, in the same order
+        """
+        detached = []
+        for file in files:
+            detached.append(UploadFile(file=file.file, size=file.size, filename=file.filename, headers=file.headers))
+            file.file = io.BytesIO()
+        return detached
+    
     @staticmethod
     def get_file_path(filename: str) -> Path:
         """
@@ -86,4 +193,154 @@ class FileHandler:
         """
         return Path(settings.UPLOAD_DIR) / filename
 
-file_handler = FileHandler()
\ No newline at end of file
+
+class _MultipartUploadValidator:
+    """
+    Checks the file parts of a multipart body while it is received.
+
+    Each file part's declared type is checked once its headers are complete, its leading
+    bytes are sniffed as soon as enough have arrived, and its size is counted as it
+    grows. Violations raise HTTPException from write().
+    """
+
+    def __init__(self, boundary: bytes, max_file_size: int, max_archive_size: int):
+        self.max_file_size = max_file_size
+        self.max_archive_size = max_archive_size
+        self.parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+        self._on_part_begin()
+
+    def write(self, chunk: bytes) -> None:
+        self.parser.write(chunk)
+
+    def _on_part_begin(self) -> None:
+        self.headers: Dict[bytes, bytes] = {}
+        self.header_field = b""
+        self.header_value = b""
+        self.declared_type: Optional[str] = None
+        self.is_file = False
+        self.max_size = self.max_file_size
+        self.size = 0
+        self.header = b""
+        self.sniffed = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self.header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self.header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self.headers[self.header_field.lower()] = self.header_value
+        self.header_field = b""
+        self.header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self.headers.get(b"content-disposition", b""))
+        self.is_file = b"filename" in options
+        if self.is_file:
+            self.declared_type = self.headers.get(b"content-type", b"").decode("latin-1").strip() or None
+            # Routes that do not take archives reject them when they validate their files
+            FileHandler.check_content_type(self.declared_type, allow_archives=True)
+            if FileHandler.is_archive(self.declared_type):
+                self.max_size = self.max_archive_size
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self.is_file:
+            return
+        self.size += end - start
+        if self.size > self.max_size:
+            raise FileHandler.file_too_large(self.max_size)
+        if not self.sniffed:
+            self.header += data[start:min(end, start + SNIFF_BYTES - len(self.header))]
+            # Decide as soon as the signature matches, otherwise once SNIFF_BYTES have arrived
+            if (FileHandler.matches_signature(self.declared_type, self.header)
+                    or len(self.header) >= SNIFF_BYTES):
+                self._check_header()
+
+    def _on_part_end(self) -> None:
+        if self.is_file and not self.sniffed:
+            self._check_header()
+
+    def _check_header(self) -> None:
+        self.sniffed = True
+        FileHandler.check_content_type(self.declared_type, self.header, allow_archives=True)
+
+
+class UploadLimitMiddleware:
+    """
+    ASGI middleware validating uploads while the request body streams in.
+
+    Requests declaring a Content-Length above max_request_size are rejected before any
+    of the body is read, and bodies are cut off once they grow past it. File parts of
+    multipart bodies are limited to max_file_size (max_archive_size for resume archives)
+    and must start with the signature of their declared type. A violation fails the request with 413 or 400 without reading
+    the rest of the body.
+    """
+
+    def __init__(self, app: ASGIApp, max_request_size: int, max_file_size: int, max_archive_size: int):
+        self.app = app
+        self.max_request_size = max_request_size
+        self.max_file_size = max_file_size
+        self.max_archive_size = max_archive_size
+
+    def request_too_large(self) -> HTTPException:
+        max_size_mb = self.max_request_size / (1024 * 1024)
+        return HTTPException(status_code=413, detail=f"Request too large. Maximum size allowed: {max_size_mb}MB")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        try:
+            content_length = int(headers.get("content-length", 0))
+        except ValueError:
+            content_length = 0
+        if content_length > self.max_request_size:
+            error = self.request_too_large()
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code,
+                                    headers={"Connection": "close"})
+            await response(scope, receive, send)
+            return
+
+        validator = None
+        content_type, options = parse_options_header(headers.get("content-type", ""))
+        if content_type == b"multipart/form-data" and b"boundary" in options:
+            validator = _MultipartUploadValidator(options[b"boundary"], self.max_file_size, self.max_archive_size)
+        received = 0
+        rejected = False
+
+        async def receive_with_limits() -> Message:
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+                try:
+                    if received > self.max_request_size:
+                        raise self.request_too_large()
+                    if validator is not None and body:
+                        validator.write(body)
+                except HTTPException:
+                    rejected = True
+                    raise
+            return message
+
+        async def send_closing_rejected(message: Message) -> None:
+            if rejected and message["type"] == "http.response.start":
+                # Close the connection instead of draining the rest of the upload
+                MutableHeaders(scope=message).append("Connection", "close")
+            await send(message)
+
+        await self.app(scope, receive_with_limits, send_closing_rejected)
+
+file_handler = FileHandler()
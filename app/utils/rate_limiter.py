@@ -0,0 +1,278 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+T = TypeVar("T")
+
+# Status codes worth retrying besides 429 and 5xx: request timeout and conflict
+RETRYABLE_STATUS_CODES = {408, 409}
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously up to its capacity."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            capacity: Maximum number of tokens in the bucket
+            refill_per_second: Tokens added per second
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> None:
+        """
+        Wait until amount tokens are available and take them.
+
+        Callers are served in arrival order. An amount above the capacity takes the whole bucket.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.refill_per_second)
+
+    def refund(self, amount: float) -> None:
+        """Return tokens that were taken but not used."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + amount)
+
+    def resize(self, capacity: float, refill_per_second: float) -> None:
+        """Change the capacity and refill rate, keeping the tokens currently available."""
+        self._refill()
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = min(self._tokens, capacity)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Async concurrency limit that adapts to provider pushback (AIMD).
+
+    The limit grows by about one slot per limit's worth of successful requests and is
+    halved whenever the provider throttles, never going below min_limit or above max_limit.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        """
+        Initialize the limiter at its maximum.
+
+        Args:
+            max_limit: Maximum number of requests in flight
+            min_limit: Minimum number of requests in flight
+        """
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self) -> None:
+        """Additively increase the limit after a successful request."""
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_throttle(self) -> None:
+        """Multiplicatively decrease the limit after the provider pushed back."""
+        self.limit = max(self.min_limit, self.limit / 2)
+
+
+class RateLimiter:
+    """
+    Client-side scheduler for OpenAI requests.
+
+    Every request passes through per-model token buckets for requests and tokens per minute
+    and a shared adaptive concurrency limit. Rate-limited and transient failures are retried
+    with jittered exponential backoff, honoring Retry-After; a rate-limit response also
+    pauses all requests to that model and shrinks the concurrency limit.
+    """
+
+    def __init__(self):
+        """Initialize the scheduler from settings."""
+        self.concurrency = AdaptiveConcurrencyLimiter(settings.OPENAI_MAX_CONCURRENT_REQUESTS,
+                                                      settings.OPENAI_MIN_CONCURRENT_REQUESTS)
+        self._buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}
+        self._paused_until: Dict[str, float] = {}
+
+    @staticmethod
+    def configured_limits(model: str) -> Tuple[int, int]:
+        """
+        Get the configured requests and tokens per minute for a model.
+
+        Returns:
+            Tuple[int, int]: Requests per minute and tokens per minute
+        """
+        limits = settings.OPENAI_MODEL_RATE_LIMITS.get(model, {})
+        return limits.get("rpm", settings.OPENAI_RPM_LIMIT), limits.get("tpm", settings.OPENAI_TPM_LIMIT)
+
+    def _get_buckets(self, model: str) -> Tuple[TokenBucket, TokenBucket]:
+        if model not in self._buckets:
+            rpm, tpm = self.configured_limits(model)
+            self._buckets[model] = (TokenBucket(rpm, rpm / 60), TokenBucket(tpm, tpm / 60))
+        return self._buckets[model]
+
+    def update_limits(self, model: str, headers: Mapping[str, str]) -> None:
+        """
+        Adopt the limits the API reports for a model in its x-ratelimit-limit-* headers.
+
+        Per-model limits set in settings.OPENAI_MODEL_RATE_LIMITS take precedence.
+        """
+        if not settings.OPENAI_RATE_LIMITS_FROM_HEADERS or model in settings.OPENAI_MODEL_RATE_LIMITS:
+            return
+        requests_bucket, tokens_bucket = self._get_buckets(model)
+        for header, bucket in (("x-ratelimit-limit-requests", requests_bucket),
+                               ("x-ratelimit-limit-tokens", tokens_bucket)):
+            try:
+                limit = int(headers[header])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if limit > 0 and limit != bucket.capacity:
+                bucket.resize(limit, limit / 60)
+
+    async def run(self, model: str, estimated_tokens: int,
+                  call: Callable[[], Awaitable[T]],
+                  used_tokens: Optional[Callable[[T], Optional[int]]] = None) -> T:
+        """
+        Run a request under the rate limits, retrying it when it is throttled or fails transiently.
+
+        Args:
+            model: Model the request is sent to
+            estimated_tokens: Tokens reserved for the request (prompt plus maximum completion), once for all attempts
+            call: Sends the request; called again for every attempt
+            used_tokens: Reads the tokens actually used from the result, so unused ones are returned
+
+        Returns:
+            The result of call
+
+        Raises:
+            Exception: The last error, once it is not retryable or the retries are exhausted
+        """
+        requests_bucket, tokens_bucket = self._get_buckets(model)
+        attempt = 0
+        reserved = False
+        while True:
+            pause = self._paused_until.get(model, 0) - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            await requests_bucket.acquire(1)
+            if not reserved:
+                # Retries reuse the tokens of the first attempt, since a failed attempt does not use them
+                await tokens_bucket.acquire(estimated_tokens)
+                reserved = True
+
+            async with self.concurrency:
+                try:
+                    result = await call()
+                except Exception as e:
+                    error = e
+                else:
+                    self.concurrency.on_success()
+                    used = used_tokens(result) if used_tokens else None
+                    if used is not None and used < estimated_tokens:
+                        tokens_bucket.refund(estimated_tokens - used)
+                    return result
+
+            if not self.is_retryable(error) or attempt >= settings.OPENAI_MAX_RETRIES:
+                tokens_bucket.refund(estimated_tokens)
+                raise error
+
+            delay = self.backoff_delay(attempt, self.retry_after(error))
+            if self.is_throttle(error):
+                self.concurrency.on_throttle()
+                self._paused_until[model] = max(self._paused_until.get(model, 0), time.monotonic() + delay)
+            metrics.llm_retries.inc(model=model)
+            print(f"Retrying {model} request in {delay:.1f}s after error: {str(error)}")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def is_throttle(error: Exception) -> bool:
+        """Whether the provider rejected the request because of load or rate limits."""
+        import openai
+
+        return isinstance(error, openai.RateLimitError) or getattr(error, "status_code", None) == 503
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """Whether a failed request may succeed when sent again."""
+        import openai
+
+        if isinstance(error, openai.RateLimitError):
+            # An exhausted quota does not recover by waiting
+            return getattr(error, "code", None) != "insufficient_quota"
+        if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.InternalServerError)):
+            return True
+        return getattr(error, "status_code", None) in RETRYABLE_STATUS_CODES
+
+    @staticmethod
+    def retry_after(error: Exception) -> Optional[float]:
+        """
+        Read the delay requested by the provider from the Retry-After headers.
+
+        Returns:
+            Optional[float]: Seconds to wait, or None if the response does not say
+        """
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        headers = response.headers
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000
+            if "retry-after" in headers:
+                value = headers["retry-after"]
+                try:
+                    return float(value)
+                except ValueError:
+                    return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    @staticmethod
+    def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Compute how long to wait before the next attempt.
+
+        Uses full-jitter exponential backoff, but never less than the provider's Retry-After.
+
+        Args:
+            attempt: Number of retries made so far
+            retry_after: Delay requested by the provider, if any
+
+        Returns:
+            float: Seconds to wait
+        """
+        ceiling = min(settings.OPENAI_RETRY_MAX_DELAY, settings.OPENAI_RETRY_BASE_DELAY * 2 ** attempt)
+        delay = random.uniform(0, ceiling)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, settings.OPENAI_RETRY_MAX_DELAY))
+        return delay
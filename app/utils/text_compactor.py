@@ -0,0 +1,290 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.tokens import count_tokens
+
+TRUNCATION_MARKER = "[...]"
+
+# Separates the pages of extracted PDF text
+PAGE_BREAK = "\f"
+# Lines at the top and at the bottom of a page that can be a running header or footer
+PAGE_EDGE_LINES = 3
+
+# Headings (lowercase, without trailing colon) that start a section, by section kind
+SECTION_HEADINGS: Dict[str, List[str]] = {
+    "summary": ["summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    "skills": ["skills", "technical skills", "key skills", "core competencies", "competencies",
+               "technologies", "tools", "skills and experience"],
+    "projects": ["projects", "key projects", "personal projects", "selected projects"],
+    "education": ["education", "academic background", "education and training"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications",
+                       "awards", "achievements", "publications"],
+    "requirements": ["requirements", "qualifications", "required qualifications", "preferred qualifications",
+                     "minimum qualifications", "must have", "nice to have", "what you'll need",
+                     "what we're looking for", "who you are"],
+    "responsibilities": ["responsibilities", "key responsibilities", "duties", "what you'll do",
+                         "the role", "about the role", "role overview"],
+    "company": ["about us", "about the company", "who we are", "company overview", "our mission"],
+    "benefits": ["benefits", "perks", "what we offer", "compensation", "compensation and benefits"],
+    "interests": ["interests", "hobbies", "references", "volunteering"],
+}
+HEADING_KINDS = {heading: kind for kind, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Relative share of the token budget per section kind. "header" is the text before the
+# first heading (name and contact details), "other" any unrecognized heading.
+SECTION_WEIGHTS: Dict[str, float] = {
+    "header": 1.0,
+    "summary": 2.0,
+    "experience": 5.0,
+    "skills": 3.0,
+    "projects": 3.0,
+    "education": 2.0,
+    "certifications": 1.0,
+    "requirements": 5.0,
+    "responsibilities": 4.0,
+    "company": 0.5,
+    "benefits": 0.5,
+    "interests": 0.5,
+    "other": 2.0,
+}
+
+# Lines that carry no information for scoring: page markers, document titles and stock phrases
+BOILERPLATE_PATTERNS = [
+    re.compile(r"page\s*\d+(\s*(of|/)\s*\d+)?", re.I),
+    re.compile(r"[-–—]\s*\d+\s*[-–—]"),
+    re.compile(r"(curriculum vitae|resume|résumé|cv)", re.I),
+    re.compile(r"references (are )?available (up)?on request\.?", re.I),
+]
+EEO_PATTERN = re.compile(r"equal (employment )?opportunity employer", re.I)
+
+INVISIBLE_CHARACTERS = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff\u00ad"))  # Zero-width and soft hyphen
+
+
+class TextCompactor:
+    """
+    Shrinks extracted document text before it is put into an LLM prompt.
+
+    Compaction normalizes whitespace and invisible characters, drops boilerplate
+    (page markers, separators, stock phrases) and running page headers and footers
+    (lines repeated at the top or bottom of several pages), and finally truncates the
+    text to a token budget that is shared out between its sections by SECTION_WEIGHTS.
+    """
+
+    def __init__(self):
+        """Initialize the token counters."""
+        self.documents = 0
+        self.truncated = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    @staticmethod
+    def _page_lines(page: str) -> Tuple[List[str], Dict[int, Tuple[int, str]]]:
+        """
+        Get the whitespace-normalized lines of a page and its edge lines.
+
+        Returns:
+            Tuple[List[str], Dict[int, Tuple[int, str]]]: Lines, and for each edge line its
+            position -> (offset from the top, or negative offset from the bottom, casefolded line)
+        """
+        lines = [re.sub(r"\s+", " ", raw_line).strip() for raw_line in page.splitlines()]
+        filled = [position for position, line in enumerate(lines) if line]
+        edges = {position: (-offset - 1, lines[position].casefold())
+                 for offset, position in enumerate(reversed(filled[-PAGE_EDGE_LINES:]))}
+        edges.update({position: (offset, lines[position].casefold())
+                      for offset, position in enumerate(filled[:PAGE_EDGE_LINES])})
+        return lines, edges
+
+    @staticmethod
+    def _clean_lines(text: str) -> List[str]:
+        """Normalize, drop boilerplate and running headers and footers, and collapse blank lines."""
+        text = unicodedata.normalize("NFKC", text).translate(INVISIBLE_CHARACTERS)
+        pages = [TextCompactor._page_lines(page) for page in text.split(PAGE_BREAK)]
+
+        # Lines at the same place from the top or bottom of several pages are running
+        # headers or footers
+        edge_counts: Dict[Tuple[int, str], int] = {}
+        for _, edges in pages:
+            for edge in edges.values():
+                edge_counts[edge] = edge_counts.get(edge, 0) + 1
+        running = {edge for edge, count in edge_counts.items() if count > 1}
+
+        lines: List[str] = []
+        seen = set()
+        for page_lines, edges in pages:
+            for position, line in enumerate(page_lines):
+                if not line:
+                    if lines and lines[-1]:
+                        lines.append("")
+                    continue
+                if not re.search(r"\w", line) or EEO_PATTERN.search(line):
+                    continue
+                if any(pattern.fullmatch(line) for pattern in BOILERPLATE_PATTERNS):
+                    continue
+                if edges.get(position) in running:
+                    # Only the first occurrence of a running header or footer is kept
+                    key = line.casefold()
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                lines.append(line)
+        while lines and not lines[-1]:
+            lines.pop()
+        return lines
+
+    @staticmethod
+    def _heading_kind(line: str) -> Optional[str]:
+        if len(line) > 60:
+            return None
+        heading = line.strip("#*•-–—:| ").casefold().replace("&", "and").replace("’", "'")
+        return HEADING_KINDS.get(re.sub(r"\s+", " ", heading))
+
+    @staticmethod
+    def _split_sections(lines: List[str]) -> List[Tuple[str, List[str]]]:
+        """Split lines into (section kind, lines) at recognized headings."""
+        sections: List[Tuple[str, List[str]]] = [("header", [])]
+        for line in lines:
+            kind = TextCompactor._heading_kind(line)
+            if kind is not None:
+                sections.append((kind, [line]))
+            else:
+                sections[-1][1].append(line)
+        return [(kind, section_lines) for kind, section_lines in sections if section_lines]
+
+    @staticmethod
+    def _allocate(sizes: List[int], weights: List[float], budget: int) -> List[int]:
+        """
+        Share a token budget out between sections in proportion to their weights.
+
+        Sections smaller than their share keep their full size and the rest of their
+        share goes to the other sections.
+        """
+        allocation = [0] * len(sizes)
+        active = list(range(len(sizes)))
+        remaining = budget
+        while active:
+            total_weight = sum(weights[index] for index in active)
+            shares = {index: remaining * weights[index] / total_weight for index in active}
+            fitting = [index for index in active if sizes[index] <= shares[index]]
+            if not fitting:
+                for index in active:
+                    allocation[index] = int(shares[index])
+                break
+            for index in fitting:
+                allocation[index] = sizes[index]
+                remaining -= sizes[index]
+                active.remove(index)
+        return allocation
+
+    @staticmethod
+    def _truncate(lines: List[str], budget: int) -> List[str]:
+        """Keep whole lines from the start of a section while they fit the budget."""
+        kept: List[str] = []
+        used = 0
+        for line in lines:
+            tokens = count_tokens(line)
+            if used + tokens > budget:
+                kept.append(TRUNCATION_MARKER)
+                break
+            kept.append(line)
+            used += tokens
+        return kept
+
+    def compact(self, text: str, max_tokens: Optional[int] = None, record_stats: bool = True) -> str:
+        """
+        Compact document text for use in a prompt.
+
+        Args:
+            text: Extracted resume or job description text
+            max_tokens: Token budget for the compacted text; no truncation if None
+            record_stats: Whether to count this call in stats()
+
+        Returns:
+            str: Compacted text (the input unchanged if settings.TEXT_COMPACTION_ENABLED is off)
+        """
+        if not settings.TEXT_COMPACTION_ENABLED:
+            return text
+
+        lines = self._clean_lines(text)
+        truncated = False
+        if max_tokens is not None:
+            sections = self._split_sections(lines)
+            sizes = [sum(count_tokens(line) for line in section_lines) for _, section_lines in sections]
+            if sum(sizes) > max_tokens:
+                truncated = True
+                weights = [SECTION_WEIGHTS.get(kind, SECTION_WEIGHTS["other"]) for kind, _ in sections]
+                budgets = self._allocate(sizes, weights, max_tokens)
+                lines = []
+                for (_, section_lines), size, budget in zip(sections, sizes, budgets):
+                    lines.extend(section_lines if size <= budget else self._truncate(section_lines, budget))
+        compacted = "\n".join(lines)
+
+        if record_stats:
+            self.documents += 1
+            self.truncated += int(truncated)
+            self.tokens_before += count_tokens(text)
+            self.tokens_after += count_tokens(compacted)
+        return compacted
+
+    @staticmethod
+    def split(text: str, max_tokens: int) -> List[str]:
+        """
+        Split text into chunks of at most max_tokens tokens, at section boundaries.
+
+        Consecutive sections are packed into a chunk while they fit; a section larger
+        than max_tokens is split between lines, and a single line larger than that
+        becomes a chunk of its own.
+
+        Args:
+            text: Compacted document text
+            max_tokens: Token budget per chunk
+
+        Returns:
+            List[str]: Chunks in document order
+        """
+        chunks: List[str] = []
+        chunk_lines: List[str] = []
+        used = 0
+
+        def flush() -> None:
+            nonlocal chunk_lines, used
+            if chunk_lines:
+                chunks.append("\n".join(chunk_lines).strip())
+            chunk_lines, used = [], 0
+
+        for _, section_lines in TextCompactor._split_sections(text.splitlines()):
+            size = sum(count_tokens(line) for line in section_lines)
+            if used + size <= max_tokens:
+                chunk_lines.extend(section_lines)
+                used += size
+                continue
+            flush()
+            for line in section_lines:
+                tokens = count_tokens(line)
+                if used + tokens > max_tokens:
+                    flush()
+                chunk_lines.append(line)
+                used += tokens
+        flush()
+        return [chunk for chunk in chunks if chunk]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get compaction statistics.
+
+        Returns:
+            Dict[str, int]: Documents compacted and truncated, and tokens before, after and saved
+        """
+        return {
+            "documents": self.documents,
+            "truncated": self.truncated,
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_before - self.tokens_after,
+        }
+
+text_compactor = TextCompactor()
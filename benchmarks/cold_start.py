@@ -0,0 +1,53 @@
+"""
+Cold start measurement, run in a fresh process for every sample by benchmarks.run.
+
+Imports the app, runs its startup (including the warm-up when WARMUP_ENABLED is set)
+and sends the same criteria extraction request twice, then prints the seconds taken
+by each phase as a JSON line. The app's settings come from the environment set up by
+benchmarks.run. The benchmark's own HTTP client and document generator are loaded
+after the import is timed and before the startup is.
+"""
+import argparse
+import asyncio
+import json
+import resource
+import time
+
+
+async def measure_startup_and_requests(app, seed: int) -> dict:
+    import httpx
+
+    from benchmarks.synthetic import generate_job_description
+
+    filename, content = generate_job_description(seed)
+    timings = {}
+    start = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        timings["startup"] = time.perf_counter() - start
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            for phase in ("first_request", "second_request"):
+                start = time.perf_counter()
+                response = await client.post("/api/v1/extract-criteria",
+                                             files={"file": (filename, content, "application/pdf")})
+                response.raise_for_status()
+                timings[phase] = time.perf_counter() - start
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the cold start of one app process")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    from app.main import app
+    timings = {"import": time.perf_counter() - start}
+    timings.update(asyncio.run(measure_startup_and_requests(app, args.seed)))
+    # ru_maxrss is in kilobytes on Linux
+    timings["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(timings))
+
+
+if __name__ == "__main__":
+    main()
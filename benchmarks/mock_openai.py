@@ -0,0 +1,242 @@
+"""
+Local mock of the OpenAI chat completions API for benchmarks.
+
+It recognizes the prompts the service sends: criteria extraction, name extraction, and
+single, combined and batched scoring. It answers with deterministic, well-formed
+responses after a configurable latency. Failures and provider rate limits can be
+simulated, with the same 429 responses and x-ratelimit-* headers as the real API.
+
+Usage:
+    python -m benchmarks.mock_openai --port 8765 --latency 0.5 --error-rate 0.01 --rpm 3000 --tpm 500000
+
+Then point the service at it with OPENAI_BASE_URL=http://localhost:8765/v1.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.synthetic import SKILLS
+
+CRITERION_PATTERN = re.compile(r"^\s*- (C\d+): (.+)$", re.M)
+RESUME_BLOCK_PATTERN = re.compile(r'<resume id="([^"]+)">\s*(.*?)</resume>', re.S)
+CHARS_PER_TOKEN = 4
+
+# Limits reported when no --rpm/--tpm is set
+UNLIMITED_RPM = 1_000_000
+UNLIMITED_TPM = 1_000_000_000
+
+
+@dataclass
+class MockConfig:
+    latency: float = 0.5  # Seconds per request
+    latency_jitter: float = 0.2  # Latency varies uniformly by this fraction
+    latency_per_1k_tokens: float = 0.0  # Extra seconds per 1000 prompt tokens
+    error_rate: float = 0.0  # Fraction of requests answered with a 500
+    rpm: Optional[int] = None  # Requests per minute before 429s; unlimited if None
+    tpm: Optional[int] = None  # Tokens per minute before 429s; unlimited if None
+
+
+class Bucket:
+    """Token bucket that reports how long until a request would fit."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def take(self, amount: float) -> float:
+        """Take amount tokens if available; otherwise return the seconds to wait."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        return (amount - self.tokens) * 60 / self.capacity
+
+
+def _score(text: str, criterion: str) -> int:
+    # Deterministic per resume and criterion, so repeated runs are comparable
+    return zlib.crc32(f"{text[:200]}|{criterion}".encode("utf-8")) % 6
+
+
+def _candidate_name(resume_text: str) -> str:
+    for line in resume_text.splitlines():
+        line = line.strip()
+        if line:
+            return line.split(" - ")[0]
+    return "Unnamed Candidate"
+
+
+def _section(prompt: str, start: str, end: Optional[str] = None) -> str:
+    """Get the part of a prompt after a marker line, up to an optional end marker."""
+    _, _, rest = prompt.partition(start)
+    if end:
+        rest = rest.partition(end)[0]
+    return rest
+
+
+def _respond(system: str, prompt: str) -> str:
+    """Build the content of the assistant message for a prompt."""
+    criteria = CRITERION_PATTERN.findall(prompt)
+
+    if "several resumes" in system:
+        results = {}
+        for resume_id, resume_text in RESUME_BLOCK_PATTERN.findall(prompt):
+            results[resume_id] = {
+                "candidate_name": _candidate_name(resume_text),
+                "scores": {criterion_id: _score(resume_text, criterion) for criterion_id, criterion in criteria},
+            }
+        return json.dumps({"results": results})
+
+    if "candidate_name" in system:
+        resume_text = _section(prompt, "Resume:", "Return a JSON object")
+        return json.dumps({
+            "candidate_name": _candidate_name(resume_text),
+            "scores": {
+                criterion_id: {"score": _score(resume_text, criterion), "justification": "Mock justification."}
+                for criterion_id, criterion in criteria
+            },
+        })
+
+    if "criteria" in system.lower() and "extract" in system.lower():
+        job_description = _section(prompt, "Job Description:")
+        found = [skill for skill in SKILLS if skill.lower() in job_description.lower()]
+        if not found and "section of a longer job description" not in prompt:
+            found = ["Relevant experience"]
+        return json.dumps({"criteria": found[:10]})
+
+    if criteria:
+        resume_text = _section(prompt, "Resume:", "For each criterion")
+        return json.dumps({
+            criterion_id: {"score": _score(resume_text, criterion), "justification": "Mock justification."}
+            for criterion_id, criterion in criteria
+        })
+
+    # Name extraction
+    return _candidate_name(_section(prompt, "Resume text:"))
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    """
+    Create the mock server.
+
+    Args:
+        config: Latency, failure and rate limit settings
+
+    Returns:
+        FastAPI: The mock application
+    """
+    app = FastAPI(title="Mock OpenAI API")
+    stats: Dict[str, Any] = {"requests": 0, "completed": 0, "errors": 0, "throttled": 0,
+                             "prompt_tokens": 0, "completion_tokens": 0}
+    request_bucket = Bucket(config.rpm) if config.rpm else None
+    token_bucket = Bucket(config.tpm) if config.tpm else None
+
+    def rate_limit_headers() -> Dict[str, str]:
+        # Like the real API, always report limits; an unlimited mock reports very high ones
+        headers = {"x-ratelimit-limit-requests": str(UNLIMITED_RPM), "x-ratelimit-limit-tokens": str(UNLIMITED_TPM)}
+        if request_bucket:
+            headers["x-ratelimit-limit-requests"] = str(request_bucket.capacity)
+            headers["x-ratelimit-remaining-requests"] = str(int(request_bucket.tokens))
+        if token_bucket:
+            headers["x-ratelimit-limit-tokens"] = str(token_bucket.capacity)
+            headers["x-ratelimit-remaining-tokens"] = str(int(token_bucket.tokens))
+        return headers
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        messages: List[Dict[str, str]] = body["messages"]
+        system = messages[0]["content"] if messages[0]["role"] == "system" else ""
+        prompt = messages[-1]["content"]
+        prompt_tokens = sum(len(message["content"]) for message in messages) // CHARS_PER_TOKEN
+
+        wait = max(request_bucket.take(1) if request_bucket else 0.0,
+                   token_bucket.take(prompt_tokens + (body.get("max_tokens") or 0)) if token_bucket else 0.0)
+        if wait > 0:
+            stats["throttled"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (mock)", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={**rate_limit_headers(), "retry-after-ms": str(int(wait * 1000) + 1)},
+            )
+
+        latency = config.latency * random.uniform(1 - config.latency_jitter, 1 + config.latency_jitter)
+        await asyncio.sleep(max(0.0, latency + config.latency_per_1k_tokens * prompt_tokens / 1000))
+
+        if random.random() < config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "Internal error (mock)", "type": "server_error"}},
+                                status_code=500)
+
+        content = _respond(system, prompt)
+        completion_tokens = len(content) // CHARS_PER_TOKEN
+        stats["completed"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["completion_tokens"] += completion_tokens
+        return JSONResponse(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body["model"],
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+            },
+            headers=rate_limit_headers(),
+        )
+
+    @app.get("/v1/models")
+    async def list_models():
+        # Used by the app's warm-up to open connections
+        return {"object": "list", "data": [{"id": "mock", "object": "model", "created": 0, "owned_by": "mock"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "config": asdict(config)}
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        for key in stats:
+            stats[key] = 0
+        return stats
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a mock OpenAI-compatible API for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=MockConfig.latency, help="Seconds per request")
+    parser.add_argument("--latency-jitter", type=float, default=MockConfig.latency_jitter)
+    parser.add_argument("--latency-per-1k-tokens", type=float, default=MockConfig.latency_per_1k_tokens)
+    parser.add_argument("--error-rate", type=float, default=MockConfig.error_rate,
+                        help="Fraction of requests failing with a 500")
+    parser.add_argument("--rpm", type=int, default=None, help="Requests per minute before 429s")
+    parser.add_argument("--tpm", type=int, default=None, help="Tokens per minute before 429s")
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.latency_jitter, args.latency_per_1k_tokens,
+                        args.error_rate, args.rpm, args.tpm)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+"""
+Benchmark runner.
+
+Starts the mock OpenAI server (benchmarks.mock_openai) in a subprocess, generates
+synthetic documents (benchmarks.synthetic) and runs the selected scenarios against the
+app in-process. It reports p50/p95/p99 latency, throughput and peak memory per scenario
+and saves the results as JSON so runs can be compared across commits. Peak memory is
+the resident set size of the benchmark process, which excludes document parser
+worker processes.
+
+Scenarios:
+    extract_criteria  POST /extract-criteria with a job description
+    score_resumes     POST /score-resumes with --batch-size resumes per request
+    services          document parsing, text compaction, pre-ranking and LLM scoring,
+                      each measured directly on its service
+    multi_job         the resumes ranked against --roles roles with overlapping criteria:
+                      one POST /score-resumes per role (multi_job.separate), then one
+                      POST /score-resumes/multi-job (multi_job.combined)
+    cold_start        import, startup and first two requests of a fresh app process
+                      (benchmarks.cold_start), --iterations times; latency is the time
+                      from import to the first response
+
+Usage:
+    python -m benchmarks.run --resumes 100 --latency 0.5 --output results.json
+    python -m benchmarks.run --env BATCH_SCORING_ENABLED=true --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from benchmarks.synthetic import generate_job_description, generate_resumes
+
+SCENARIOS = ["extract_criteria", "score_resumes", "multi_job", "services", "cold_start"]
+DEFAULT_CRITERIA = ["Python", "FastAPI", "PostgreSQL", "Docker", "Kubernetes", "5+ years of backend experience"]
+
+
+class PeakMemorySampler:
+    """Tracks the peak resident set size of this process while in use."""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current_rss() -> int:
+        try:
+            with open("/proc/self/statm") as statm:
+                return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # No /proc (e.g. macOS): fall back to the lifetime peak (bytes on macOS, KiB elsewhere)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self.current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "PeakMemorySampler":
+        self.peak_bytes = self.current_rss()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.current_rss())
+
+
+def summarize(latencies: List[float], errors: int, wall_seconds: float, items: int,
+              peak_bytes: int, **extra: Any) -> Dict[str, Any]:
+    """Summarize the measurements of one scenario."""
+    values = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "calls": len(latencies) + errors,
+        "errors": errors,
+        "items": items,
+        "wall_seconds": round(wall_seconds, 3),
+        "items_per_second": round(items / wall_seconds, 2) if wall_seconds else None,
+        "latency_ms": {
+            "p50": round(float(np.percentile(values, 50)), 2),
+            "p95": round(float(np.percentile(values, 95)), 2),
+            "p99": round(float(np.percentile(values, 99)), 2),
+            "mean": round(float(values.mean()), 2),
+            "max": round(float(values.max()), 2),
+        },
+        "peak_rss_mb": round(peak_bytes / (1024 * 1024), 1),
+        **extra,
+    }
+
+
+async def measure(calls: int, call: Callable[[int], Awaitable[Any]], concurrency: int,
+                  items_per_call: int = 1, warmup: int = 0) -> Dict[str, Any]:
+    """
+    Run call(0) ... call(calls - 1) with bounded concurrency and measure each one.
+
+    Args:
+        calls: Number of calls
+        call: Coroutine function taking the call number; raising counts as an error
+        concurrency: Maximum calls in flight
+        items_per_call: Items (e.g. resumes) processed by one successful call
+        warmup: Untimed calls made first, so one-off startup costs (process pool, connections) are not measured
+
+    Returns:
+        Dict[str, Any]: Summary from summarize
+    """
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(number: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(number)
+            except Exception as e:
+                errors += 1
+                print(f"  call {number} failed: {str(e)[:200]}")
+                return
+            latencies.append(time.perf_counter() - start)
+
+    for number in range(warmup):
+        await call(number)
+
+    with PeakMemorySampler() as sampler:
+        start = time.perf_counter()
+        await asyncio.gather(*(run_one(number) for number in range(calls)))
+        wall_seconds = time.perf_counter() - start
+    return summarize(latencies, errors, wall_seconds, len(latencies) * items_per_call, sampler.peak_bytes)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _mock_request(mock_url: str, path: str, method: str = "GET") -> Dict[str, Any]:
+    request = urllib.request.Request(f"{mock_url}{path}", method=method)
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def start_mock(args: argparse.Namespace) -> subprocess.Popen:
+    """Start the mock OpenAI server and wait until it answers."""
+    command = [sys.executable, "-m", "benchmarks.mock_openai", "--port", str(args.mock_port),
+               "--latency", str(args.latency), "--error-rate", str(args.error_rate)]
+    if args.rpm:
+        command += ["--rpm", str(args.rpm)]
+    if args.tpm:
+        command += ["--tpm", str(args.tpm)]
+    process = subprocess.Popen(command)
+    mock_url = f"http://127.0.0.1:{args.mock_port}"
+    for _ in range(100):
+        try:
+            _mock_request(mock_url, "/stats")
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Mock OpenAI server did not start")
+
+
+def cold_start(args: argparse.Namespace) -> Dict[str, Any]:
+    """Measure the cold start of --iterations fresh app processes, one at a time."""
+    phases: Dict[str, List[float]] = {}
+    latencies: List[float] = []
+    errors = 0
+    peak_rss_mb = 0.0
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        result = subprocess.run([sys.executable, "-m", "benchmarks.cold_start", "--seed", str(args.seed)],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            errors += 1
+            print(f"  cold start failed: {result.stderr.strip()[-200:]}")
+            continue
+        # The app may print before the measurements, which are the last line
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        peak_rss_mb = max(peak_rss_mb, timings.pop("peak_rss_mb"))
+        for phase, seconds in timings.items():
+            phases.setdefault(phase, []).append(seconds)
+        latencies.append(timings["import"] + timings["startup"] + timings["first_request"])
+    wall_seconds = time.perf_counter() - start
+    phases_ms = {phase: round(float(np.median(values)) * 1000, 1) for phase, values in phases.items()}
+    return summarize(latencies, errors, wall_seconds, len(latencies), int(peak_rss_mb * 1024 * 1024),
+                     phases_p50_ms=phases_ms)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenarios(args: argparse.Namespace, mock_url: str) -> Dict[str, Any]:
+    """Run the selected scenarios; the app is imported here, after the environment is set up."""
+    import httpx
+
+    from app.main import app
+    from app.services.document_processor import document_processor
+    from app.services.llm_service import llm_service
+    from app.services.pre_ranker import pre_ranker
+    from app.utils.text_compactor import text_compactor
+
+    resumes = generate_resumes(args.resumes, args.seed, args.pdf_ratio, args.experience_entries)
+    job_description = generate_job_description(args.seed)
+    content_types = {
+        ".pdf": "application/pdf",
+        ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    }
+
+    def upload(filename: str, content: bytes):
+        return filename, content, content_types[os.path.splitext(filename)[1]]
+
+    results: Dict[str, Any] = {}
+
+    def record(name: str, summary: Dict[str, Any]) -> None:
+        stats = _mock_request(mock_url, "/stats")
+        summary["llm"] = {key: stats[key] for key in ("requests", "throttled", "errors",
+                                                      "prompt_tokens", "completion_tokens")}
+        _mock_request(mock_url, "/stats/reset", "POST")
+        results[name] = summary
+        latency = summary["latency_ms"]
+        print(f"{name:<28} p50 {latency['p50']:>9.1f} ms  p95 {latency['p95']:>9.1f} ms  "
+              f"p99 {latency['p99']:>9.1f} ms  {summary['items_per_second'] or 0:>8.2f} items/s  "
+              f"peak {summary['peak_rss_mb']:>7.1f} MB  errors {summary['errors']}")
+
+    if "cold_start" in args.scenarios:
+        record("cold_start", cold_start(args))
+
+    # Run the app's startup and shutdown as a server would
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                     timeout=None) as client:
+            _mock_request(mock_url, "/stats/reset", "POST")
+
+            if "extract_criteria" in args.scenarios:
+                async def extract_criteria(_: int) -> None:
+                    response = await client.post("/api/v1/extract-criteria",
+                                                 files={"file": upload(*job_description)})
+                    response.raise_for_status()
+
+                record("extract_criteria", await measure(args.iterations, extract_criteria, args.concurrency,
+                                                         warmup=args.warmup))
+
+            if "score_resumes" in args.scenarios:
+                batch_size = args.batch_size or len(resumes)
+
+                async def score_resumes(number: int) -> None:
+                    start = number * batch_size % len(resumes)
+                    batch = [resumes[(start + offset) % len(resumes)] for offset in range(batch_size)]
+                    response = await client.post(
+                        "/api/v1/score-resumes",
+                        data={"criteria": args.criteria},
+                        files=[("files", upload(filename, content)) for filename, content in batch],
+                    )
+                    response.raise_for_status()
+
+                record("score_resumes", await measure(args.iterations, score_resumes, args.concurrency,
+                                                      items_per_call=batch_size, warmup=args.warmup))
+
+            if "multi_job" in args.scenarios:
+                # Each role takes a window of the criteria, so neighbouring roles share some
+                size = min(4, len(args.criteria))
+                roles = [{"name": f"Role {number + 1}",
+                          "criteria": [args.criteria[(number + offset) % len(args.criteria)] for offset in range(size)]}
+                         for number in range(args.roles)]
+                resume_files = [("files", upload(filename, content)) for filename, content in resumes]
+
+                async def score_separately(_: int) -> None:
+                    for role in roles:
+                        response = await client.post("/api/v1/score-resumes", data={"criteria": role["criteria"]},
+                                                     files=resume_files)
+                        response.raise_for_status()
+
+                async def score_multi_job(_: int) -> None:
+                    response = await client.post("/api/v1/score-resumes/multi-job",
+                                                 data={"roles": json.dumps(roles)}, files=resume_files)
+                    response.raise_for_status()
+
+                record("multi_job.separate", await measure(args.iterations, score_separately, args.concurrency,
+                                                           items_per_call=len(resumes), warmup=args.warmup))
+                record("multi_job.combined", await measure(args.iterations, score_multi_job, args.concurrency,
+                                                           items_per_call=len(resumes), warmup=args.warmup))
+
+        if "services" in args.scenarios:
+            texts: List[str] = [""] * len(resumes)
+
+            async def parse(number: int) -> None:
+                filename, content = resumes[number]
+                texts[number] = await document_processor.extract_text_from_bytes(content, filename)
+
+            record("services.document_parsing", await measure(len(resumes), parse, args.concurrency))
+
+            async def compact(number: int) -> None:
+                text_compactor.compact(texts[number], record_stats=False)
+
+            record("services.text_compaction", await measure(len(resumes), compact, 1))
+
+            async def pre_rank(_: int) -> None:
+                pre_ranker.score(texts, args.criteria)
+
+            record("services.pre_ranking", await measure(args.iterations, pre_rank, 1, items_per_call=len(texts)))
+
+            async def llm_score(number: int) -> None:
+                await llm_service.score_resume_with_name(texts[number], args.criteria, use_cache=args.use_cache)
+
+            record("services.llm_scoring", await measure(len(resumes), llm_score, args.concurrency))
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the change of the main metrics against a baseline run."""
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'}:")
+    for name, summary in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        changes = []
+        for label, current, previous in (
+            ("p50", summary["latency_ms"]["p50"], base["latency_ms"]["p50"]),
+            ("p95", summary["latency_ms"]["p95"], base["latency_ms"]["p95"]),
+            ("items/s", summary["items_per_second"], base["items_per_second"]),
+            ("peak MB", summary["peak_rss_mb"], base["peak_rss_mb"]),
+        ):
+            if current is not None and previous:
+                changes.append(f"{label} {(current - previous) / previous * 100:+.1f}%")
+        print(f"{name:<28} {'  '.join(changes)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the resume ranking API against a mock LLM")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated scenarios to run ({', '.join(SCENARIOS)})")
+    parser.add_argument("--resumes", type=int, default=50, help="Number of synthetic resumes")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Resumes per /score-resumes request (default: all)")
+    parser.add_argument("--iterations", type=int, default=5, help="Requests per HTTP scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="Calls in flight per scenario")
+    parser.add_argument("--warmup", type=int, default=1,
+                        help="Untimed requests before each HTTP scenario; 0 to include cold start costs")
+    parser.add_argument("--criteria", nargs="+", default=DEFAULT_CRITERIA)
+    parser.add_argument("--roles", type=int, default=5, help="Roles per multi_job request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf-ratio", type=float, default=0.5)
+    parser.add_argument("--experience-entries", type=int, default=4, help="Jobs per resume (document length)")
+    parser.add_argument("--use-cache", action="store_true", help="Keep the text and LLM caches enabled")
+    parser.add_argument("--latency", type=float, default=0.5, help="Mock LLM seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock LLM fraction of 500 responses")
+    parser.add_argument("--rpm", type=int, default=None, help="Mock LLM requests per minute")
+    parser.add_argument("--tpm", type=int, default=None, help="Mock LLM tokens per minute")
+    parser.add_argument("--mock-port", type=int, default=None)
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra app setting, e.g. BATCH_SCORING_ENABLED=true (repeatable)")
+    parser.add_argument("--output", default=None, help="Path of the JSON results file")
+    parser.add_argument("--compare", default=None, help="Baseline JSON results file to compare against")
+    args = parser.parse_args()
+    args.scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    args.mock_port = args.mock_port or _free_port()
+
+    upload_dir = tempfile.mkdtemp(prefix="resume-ranking-benchmark-")
+    overrides = dict(item.split("=", 1) for item in args.env)
+    os.environ.update({
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.mock_port}/v1",
+        "UPLOAD_DIR": upload_dir,
+        "TEXT_CACHE_ENABLED": str(args.use_cache).lower(),
+        "LLM_CACHE_ENABLED": str(args.use_cache).lower(),
+        **overrides,
+    })
+
+    mock = start_mock(args)
+    try:
+        scenarios = asyncio.run(run_scenarios(args, f"http://127.0.0.1:{args.mock_port}"))
+    finally:
+        mock.terminate()
+        mock.wait()
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {
+            "resumes": args.resumes, "batch_size": args.batch_size, "iterations": args.iterations,
+            "concurrency": args.concurrency, "warmup": args.warmup, "criteria": args.criteria, "roles": args.roles,
+            "seed": args.seed,
+            "experience_entries": args.experience_entries, "use_cache": args.use_cache,
+            "mock": {"latency": args.latency, "error_rate": args.error_rate, "rpm": args.rpm, "tpm": args.tpm},
+            "env": overrides,
+        },
+        "scenarios": scenarios,
+    }
+    output = args.output or os.path.join("benchmarks", "results", f"{results['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            compare(results, json.load(baseline_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Synthetic resumes and job descriptions for benchmarks.
+
+Documents are generated deterministically from a seed, as PDF (PyMuPDF) or DOCX
+(python-docx) bytes. Resumes repeat a header and footer on every page, like many
+real exports, so the text compaction stage has something to do.
+
+Usage:
+    python -m benchmarks.synthetic --resumes 50 --output /tmp/bench_docs
+"""
+import argparse
+import io
+import os
+import random
+from typing import List, Tuple
+
+import docx
+import fitz  # PyMuPDF
+
+FIRST_NAMES = ["Alex", "Priya", "Jordan", "Mei", "Carlos", "Fatima", "Liam", "Aisha", "Noah", "Elena",
+               "Kenji", "Sofia", "Omar", "Hannah", "Ravi", "Chloe", "Mateo", "Zara", "Lucas", "Ingrid"]
+LAST_NAMES = ["Smith", "Patel", "Garcia", "Chen", "Okafor", "Novak", "Kim", "Silva", "Johansson", "Haddad",
+              "Müller", "Rossi", "Tanaka", "Khan", "Dubois", "Nguyen", "Brown", "Ivanova", "Cohen", "Mensah"]
+SKILLS = ["Python", "FastAPI", "Django", "Flask", "PostgreSQL", "MySQL", "Redis", "Kafka", "Docker",
+          "Kubernetes", "AWS", "GCP", "Azure", "Terraform", "React", "TypeScript", "Go", "Rust", "Java",
+          "Spark", "Airflow", "pandas", "PyTorch", "TensorFlow", "CI/CD", "GraphQL", "REST APIs",
+          "Microservices", "Linux", "Git"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries", "Wayne Tech",
+             "Cyberdyne", "Soylent Systems", "Tyrell Analytics"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Backend Engineer", "Data Engineer",
+          "Platform Engineer", "Machine Learning Engineer", "Full Stack Developer", "Tech Lead"]
+ACHIEVEMENTS = [
+    "Designed and built {skill} services handling {n} requests per second",
+    "Reduced infrastructure cost by {n}% by migrating workloads to {skill}",
+    "Led a team of {n} engineers delivering a {skill} based platform",
+    "Automated deployment pipelines with {skill}, cutting release time by {n}%",
+    "Improved query latency by {n}% through {skill} tuning and caching",
+    "Mentored {n} junior developers on {skill} best practices",
+]
+DEGREES = ["BSc Computer Science", "MSc Software Engineering", "BEng Electrical Engineering",
+           "MSc Data Science", "BSc Mathematics"]
+
+# Lines per PDF page before a page break
+LINES_PER_PAGE = 45
+
+
+def resume_lines(index: int, seed: int = 0, experience_entries: int = 4) -> List[str]:
+    """
+    Build the text lines of a synthetic resume.
+
+    Args:
+        index: Resume number; different numbers give different candidates
+        seed: Seed shared by a whole benchmark run
+        experience_entries: Number of jobs listed under experience
+
+    Returns:
+        List[str]: Lines of the resume
+    """
+    rng = random.Random(seed * 100003 + index)
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, rng.randint(6, 14))
+    years = rng.randint(1, 15)
+
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {rng.randint(1000, 9999)}",
+        "",
+        "Summary",
+        f"{rng.choice(TITLES)} with {years} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "Experience",
+    ]
+    for _ in range(experience_entries):
+        start = rng.randint(2005, 2022)
+        lines.append(f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        for _ in range(rng.randint(3, 6)):
+            template = rng.choice(ACHIEVEMENTS)
+            lines.append("• " + template.format(skill=rng.choice(skills), n=rng.randint(2, 90)))
+        lines.append("")
+    lines += [
+        "Skills",
+        ", ".join(skills),
+        "",
+        "Education",
+        f"{rng.choice(DEGREES)}, University of {rng.choice(['Leeds', 'Toronto', 'Delhi', 'Lagos', 'Osaka'])}",
+    ]
+    return lines
+
+
+def job_description_lines(seed: int = 0, num_requirements: int = 8) -> List[str]:
+    """
+    Build the text lines of a synthetic job description.
+
+    Args:
+        seed: Seed shared by a whole benchmark run
+        num_requirements: Number of listed requirements
+
+    Returns:
+        List[str]: Lines of the job description
+    """
+    rng = random.Random(seed)
+    skills = rng.sample(SKILLS, num_requirements)
+    return [
+        f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)}",
+        "",
+        "About us",
+        "We build software that helps teams ship faster. We are an equal opportunity employer.",
+        "",
+        "Responsibilities",
+        *[f"• Build and operate services using {skill}" for skill in skills[:4]],
+        "",
+        "Requirements",
+        f"• {rng.randint(3, 8)}+ years of professional software development experience",
+        *[f"• Hands-on experience with {skill}" for skill in skills],
+        "",
+        "Benefits",
+        "• Remote-friendly, flexible hours, learning budget",
+    ]
+
+
+def to_pdf(lines: List[str], header: str = "", footer: str = "") -> bytes:
+    """
+    Render lines as a PDF, repeating the header and footer on every page.
+
+    Args:
+        lines: Text lines
+        header: Text at the top of every page
+        footer: Text at the bottom of every page
+
+    Returns:
+        bytes: PDF file content
+    """
+    document = fitz.open()
+    pages = [lines[start:start + LINES_PER_PAGE] for start in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    for page_number, page_lines in enumerate(pages, start=1):
+        page = document.new_page()
+        y = 40
+        if header:
+            page.insert_text((50, y), header, fontsize=9)
+            y += 20
+        for line in page_lines:
+            page.insert_text((50, y), line, fontsize=10)
+            y += 15
+        if footer:
+            page.insert_text((50, page.rect.height - 30), f"{footer}  Page {page_number} of {len(pages)}", fontsize=9)
+    content = document.tobytes()
+    document.close()
+    return content
+
+
+def to_docx(lines: List[str]) -> bytes:
+    """
+    Render lines as a DOCX document, one paragraph per line.
+
+    Args:
+        lines: Text lines
+
+    Returns:
+        bytes: DOCX file content
+    """
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def generate_resumes(count: int, seed: int = 0, pdf_ratio: float = 0.5,
+                     experience_entries: int = 4) -> List[Tuple[str, bytes]]:
+    """
+    Generate synthetic resume files.
+
+    Args:
+        count: Number of resumes
+        seed: Seed shared by a whole benchmark run
+        pdf_ratio: Fraction of resumes generated as PDF; the rest are DOCX
+        experience_entries: Number of jobs per resume, which controls document length
+
+    Returns:
+        List[Tuple[str, bytes]]: File name and content per resume
+    """
+    files = []
+    for index in range(count):
+        lines = resume_lines(index, seed, experience_entries)
+        if index < round(count * pdf_ratio):
+            files.append((f"resume_{index:05d}.pdf",
+                          to_pdf(lines, header=f"{lines[0]} - Curriculum Vitae", footer="Confidential")))
+        else:
+            files.append((f"resume_{index:05d}.docx", to_docx(lines)))
+    return files
+
+
+def generate_job_description(seed: int = 0, file_format: str = "pdf") -> Tuple[str, bytes]:
+    """
+    Generate a synthetic job description file.
+
+    Args:
+        seed: Seed shared by a whole benchmark run
+        file_format: "pdf" or "docx"
+
+    Returns:
+        Tuple[str, bytes]: File name and content
+    """
+    lines = job_description_lines(seed)
+    content = to_pdf(lines) if file_format == "pdf" else to_docx(lines)
+    return f"job_description.{file_format}", content
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write synthetic resumes and a job description to a directory")
+    parser.add_argument("--resumes", type=int, default=20, help="Number of resumes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pdf-ratio", type=float, default=0.5, help="Fraction of resumes written as PDF")
+    parser.add_argument("--experience-entries", type=int, default=4, help="Jobs per resume (document length)")
+    parser.add_argument("--output", required=True, help="Directory to write the files to")
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    files = generate_resumes(args.resumes, args.seed, args.pdf_ratio, args.experience_entries)
+    files.append(generate_job_description(args.seed))
+    for filename, content in files:
+        with open(os.path.join(args.output, filename), "wb") as output_file:
+            output_file.write(content)
+    print(f"Wrote {len(files)} files to {args.output}")
+
+
+if __name__ == "__main__":
+    main()